@@ -0,0 +1,242 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Cost units: one unit is about the time to analyze one character of code
+# split into ordinary lines. Lexing a line also rescans what is left of it
+# at every token, which adds about len(line)² / QUADRATIC_CHARS units.
+QUADRATIC_CHARS = 220
+
+
+def estimate_cost(snippet):
+    """
+    Estimated analysis cost of `snippet`, in cost units, from its size and
+    the lengths of its lines; no lexing involved.
+    """
+    return len(snippet) + sum(len(line) ** 2 for line in snippet.split('\n')) // QUADRATIC_CHARS
+
+
+class Rejected(Exception):
+    """
+    A request the admission controller refused. `status` is the HTTP status
+    to answer with: 413 for a job above the cost limit, 429 for a client
+    whose queue is full.
+    """
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class _Job:
+    def __init__(self, client, cost, function, args, local=False):
+        self.client = client
+        self.cost = cost
+        self.function = function
+        self.args = args
+        self.local = local
+        self.queued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Lane:
+    """
+    Per-client FIFO queues served by deficit round robin (DRR) on
+    `workers` threads.
+
+    Clients with queued jobs take turns; each turn adds `quantum` times the
+    client's weight to its deficit, and the client runs jobs while the next
+    one costs no more than its deficit. Over time every backlogged client
+    gets a share of the cost proportional to its weight, however large or
+    small its jobs. Rounds in which nobody could run a job are skipped in
+    one step.
+
+    With an `executor`, jobs run on it (e.g. a process pool) and the worker
+    threads only wait for them, except `local` jobs, which need this
+    process's state and run on the worker thread. The threads start with
+    the first job, so a lane created before the server forks its workers
+    still works in them.
+    """
+
+    def __init__(self, name, quantum, workers=1, weights=None, max_backlog=None, executor=None):
+        self.name = name
+        self.quantum = quantum
+        self.weights = weights if weights is not None else {}
+        self.max_backlog = max_backlog
+        self.executor = executor
+        self._queues = {}         # client -> deque of jobs
+        self._backlog = {}        # client -> queued cost
+        self._deficit = {}
+        self._active = deque()    # clients with queued jobs, in turn order
+        self._turn = None         # client whose turn it is
+        self._idle_turns = 0      # turns in a row that ran nothing
+        self._changed = threading.Condition()
+        self.served = 0
+        self.rejected = 0
+        self.running = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+        self.workers = workers
+        self._started = False
+
+    def weight(self, client):
+        return self.weights.get(client, 1)
+
+    def submit(self, client, cost, function, *args, local=False):
+        """
+        Queue `function(*args)` for `client`; returns the job to wait on.
+        Raises Rejected when the client's queued cost would exceed
+        `max_backlog` (a client with nothing queued is always admitted).
+        """
+        job = _Job(client, cost, function, args, local)
+        with self._changed:
+            if not self._started:
+                for n in range(self.workers):
+                    threading.Thread(target=self._work, name=f'{self.name}-lane-{n}', daemon=True).start()
+                self._started = True
+            queue = self._queues.get(client)
+            if queue and self.max_backlog is not None and self._backlog[client] + cost > self.max_backlog:
+                self.rejected += 1
+                raise Rejected(f'too much work queued for {client!r}', 429)
+            if not queue:
+                queue = self._queues[client] = deque()
+                self._backlog[client] = 0
+                self._deficit[client] = 0
+                self._active.append(client)
+            queue.append(job)
+            self._backlog[client] += cost
+            self._changed.notify()
+        return job
+
+    def _next(self):
+        # Called with the condition held and at least one job queued
+        while True:
+            if self._turn is None:
+                self._turn = self._active[0]
+                self._deficit[self._turn] += self.quantum * self.weight(self._turn)
+            client = self._turn
+            queue = self._queues[client]
+            if queue[0].cost <= self._deficit[client]:
+                job = queue.popleft()
+                self._deficit[client] -= job.cost
+                self._backlog[client] -= job.cost
+                self._idle_turns = 0
+                if not queue:
+                    del self._queues[client], self._backlog[client], self._deficit[client]
+                    self._active.popleft()
+                    self._turn = None
+                return job
+
+            self._active.rotate(-1)
+            self._turn = None
+            self._idle_turns += 1
+            if self._idle_turns >= len(self._active):
+                # Nobody could run a job this round: skip the empty rounds
+                # until the first client can
+                rounds = min(math.ceil((self._queues[c][0].cost - self._deficit[c]) / (self.quantum * self.weight(c)))
+                             for c in self._active)
+                for c in self._active:
+                    self._deficit[c] += (rounds - 1) * self.quantum * self.weight(c)
+                self._idle_turns = 0
+
+    def _work(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._active)
+                job = self._next()
+                self.running += 1
+                wait = time.perf_counter() - job.queued_at
+                self.waited += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                if self.executor is not None and not job.local:
+                    job.result = self.executor.submit(job.function, *job.args).result()
+                else:
+                    job.result = job.function(*job.args)
+            except BaseException as e:
+                job.error = e
+            finally:
+                with self._changed:
+                    self.running -= 1
+                    self.served += 1
+                job.done.set()
+
+    def info(self):
+        with self._changed:
+            return {
+                'queued': sum(len(queue) for queue in self._queues.values()),
+                'queued_cost': sum(self._backlog.values()),
+                'clients': len(self._active),
+                'running': self.running,
+                'served': self.served,
+                'rejected': self.rejected,
+                'mean_wait_ms': self.waited / self.served * 1000 if self.served else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+
+class AdmissionController:
+    """
+    Cost-based admission in front of the analyses.
+
+    A request's cost is estimated from its snippet before any work is
+    done. Jobs above `max_cost` are refused; jobs above `slow_cost` go to
+    the slow lane, which runs them one at a time in a separate process
+    (started on first use, so it is never forked), so large uploads
+    neither hold the interactive workers nor share their interpreter.
+    Everything else goes to the interactive lane. Both lanes schedule
+    clients fairly by weight (see Lane).
+    """
+
+    def __init__(self, slow_cost=200_000, max_cost=None, weights=None, interactive_workers=2,
+                 interactive_quantum=20_000, slow_quantum=1_000_000, max_backlog=2_000_000, slow_processes=1):
+        self.slow_cost = slow_cost
+        self.max_cost = max_cost
+        self.weights = weights if weights is not None else {}
+        self.interactive = Lane('interactive', interactive_quantum, interactive_workers, self.weights, max_backlog)
+        self.slow_processes = slow_processes
+        self._slow = None
+        self._slow_quantum = slow_quantum
+        self._max_backlog = max_backlog
+        self._lock = threading.Lock()
+
+    @property
+    def slow(self):
+        with self._lock:
+            if self._slow is None:
+                executor = ProcessPoolExecutor(max_workers=self.slow_processes) if self.slow_processes else None
+                self._slow = Lane('slow', self._slow_quantum, max(self.slow_processes, 1), self.weights,
+                                  max(self._max_backlog, self.max_cost or 0), executor)
+            return self._slow
+
+    def lane(self, cost):
+        """
+        Return the lane a job of `cost` goes to.
+        """
+        return self.slow if cost > self.slow_cost else self.interactive
+
+    def run(self, client, cost, function, *args, local=False):
+        """
+        Return `function(*args)` once `client`'s job of `cost` has been
+        scheduled and run; a `local` job runs in this process even in the
+        slow lane. Raises Rejected if it is not admitted.
+        """
+        if self.max_cost is not None and cost > self.max_cost:
+            raise Rejected(f'estimated cost {cost} is above the limit of {self.max_cost}', 413)
+        job = self.lane(cost).submit(client, cost, function, *args, local=local)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def info(self):
+        return {
+            'slow_cost': self.slow_cost,
+            'max_cost': self.max_cost,
+            'interactive': self.interactive.info(),
+            'slow': self._slow.info() if self._slow is not None else None,
+        }
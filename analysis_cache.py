@@ -0,0 +1,171 @@
+import hashlib
+import marshal
+import os
+import zlib
+
+from lexical_analysis import lexer
+from syntactic_analysis import parser
+from semantic_analysis import semantic_analyzer
+
+ANALYZER_MODULES = ('objects.py', 'lexical_analysis.py', 'syntactic_analysis.py', 'parse_table.py',
+                    'semantic_analysis.py', 'control_flow.py')
+EVICT_TO = 0.9  # fraction of max_bytes an eviction frees the cache down to
+_analyzer_version = None
+
+
+def analyzer_version():
+    """
+    Hash of the analyzer sources, so any change to them invalidates the cache.
+    """
+    global _analyzer_version
+    if _analyzer_version is None:
+        digest = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in ANALYZER_MODULES:
+            with open(os.path.join(here, name), 'rb') as source:
+                digest.update(source.read())
+        _analyzer_version = digest.hexdigest()[:16]
+    return _analyzer_version
+
+
+def run_analysis(code):
+    """
+    Run the three stages over `code` and return a plain, serializable record:
+    tokens, lex_errors, valid, parse_errors, semantic_valid,
+    semantic_errors, warnings and symbols (the final symbol table dump).
+    """
+    tokens = lexer(code)
+    valid, symbol_table, parse_errors = parser(tokens)
+    semantic_valid, semantic_errors, warnings, symbols = semantic_analyzer(tokens, symbol_table)
+    return {
+        'tokens': tokens,
+        'lex_errors': [t for t in tokens if t['type'] == 'LEXICAL ERROR'],
+        'valid': valid,
+        'parse_errors': parse_errors,
+        'semantic_valid': semantic_valid,
+        'semantic_errors': semantic_errors,
+        'warnings': warnings,
+        'symbols': symbols,
+    }
+
+
+class AnalysisCache:
+    """
+    Persistent cache of `run_analysis` records shared across processes.
+
+    Entries are keyed by the hash of the source, the analyzer version and the
+    language, stored as zlib-compressed marshal data under `directory`.
+    Writes go to a temporary file renamed into place, so concurrent workers
+    never read a partial entry. Once the directory grows past `max_bytes`
+    the least recently used entries are evicted down to EVICT_TO of it, so
+    the next few writes fit without walking the directory again.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # running estimate of the directory size
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, code, language='c'):
+        digest = hashlib.sha256()
+        digest.update(f'{analyzer_version()}\0{language}\0'.encode())
+        digest.update(code.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + '.bin')
+
+    def get(self, key):
+        """
+        Return the cached record for `key`, or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entry:
+                record = marshal.loads(zlib.decompress(entry.read()))
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            self.misses += 1
+            self._remove(path)  # corrupt entry
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, key, record):
+        """
+        Store `record` under `key` atomically, then evict if over budget.
+        """
+        import tempfile  # only writers pay for it
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(marshal.dumps(record))
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                entry.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            self._remove(temporary)
+            raise
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def analyze(self, code, language='c'):
+        """
+        Return the `run_analysis` record for `code`, computing it on a miss.
+        """
+        key = self.key(code, language)
+        record = self.get(key)
+        if record is None:
+            record = run_analysis(code)
+            self.put(key, record)
+        return record
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in EVICT_TO
+        of `max_bytes`.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            self._remove(path)
+            total -= size
+        self._size = total
+
+    def _entries(self):
+        """
+        Return (last use, size, path) for every entry on disk.
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.bin'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,61 @@
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import AnalysisCache, run_analysis
+from translation_unit import analyze_translation_unit
+
+
+def format_record(path, record):
+    """
+    Render the diagnostics of one analyzed file, one per line. The parser
+    also reports redeclarations as plain messages, without a location.
+    """
+    lines = []
+    for error in record['lex_errors'] + record['parse_errors']:
+        if isinstance(error, str):
+            lines.append(f"{path}: {error}")
+        else:
+            lines.append(f"{path}:{error['line']}:{error['position']}: {error['type']}: {error.get('message')}")
+    for message in record['semantic_errors'] + record['warnings']:
+        lines.append(f"{path}: {message}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Analyze C source files.')
+    arguments.add_argument('files', nargs='+')
+    arguments.add_argument('--cache-dir', default='.analysis_cache',
+                           help='persistent analysis cache directory')
+    arguments.add_argument('--cache-size', type=int, default=256,
+                           help='cache size limit in MiB')
+    arguments.add_argument('--no-cache', action='store_true')
+    arguments.add_argument('--workers', type=int, default=0,
+                           help='analyze function bodies on this many processes (bypasses the cache)')
+    options = arguments.parse_args(argv)
+
+    cache = None if options.no_cache or options.workers else \
+        AnalysisCache(options.cache_dir, options.cache_size * 1024 * 1024)
+    pool = ProcessPoolExecutor(options.workers) if options.workers > 1 else None
+    failed = False
+    for path in options.files:
+        with open(path, encoding='utf-8') as source:
+            code = source.read()
+        if options.workers:
+            record = analyze_translation_unit(code, workers=1, executor=pool)
+        else:
+            record = cache.analyze(code) if cache else run_analysis(code)
+        report = format_record(path, record)
+        if report:
+            print(report)
+        failed = failed or bool(record['lex_errors'] or not record['valid'] or not record['semantic_valid'])
+
+    if pool:
+        pool.shutdown()
+    if cache:
+        print(f"cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import threading
+
+
+def request_key(endpoint, snippet, **options):
+    """
+    Coalescing key of a request: the endpoint, a hash of the snippet and
+    the options that change its result.
+    """
+    digest = hashlib.sha256(snippet.encode('utf-8', 'surrogatepass')).hexdigest()
+    return endpoint, digest, json.dumps(options, sort_keys=True, default=str)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Single-flight execution: while a call for a key is running, further
+    calls with the same key wait for it and share its result (or its
+    exception) instead of computing it again. Nothing is kept once the
+    call has finished, so this is coalescing, not caching.
+
+    Counters: `leaders` calls actually executed, `deduplicated` calls that
+    were served by a concurrent leader. `on_join(key)`, if given, is called
+    when a call starts waiting for the leader of `key`.
+    """
+
+    def __init__(self, on_join=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.deduplicated = 0
+        self.on_join = on_join
+
+    def do(self, key, function, *args, **kwargs):
+        """
+        Return `function(*args, **kwargs)`, run at most once at a time per `key`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.deduplicated += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            if self.on_join is not None:
+                self.on_join(key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def info(self):
+        """
+        Return the counters and the number of calls in flight.
+        """
+        with self._lock:
+            total = self.leaders + self.deduplicated
+            return {
+                'executed': self.leaders,
+                'deduplicated': self.deduplicated,
+                'dedup_rate': self.deduplicated / total if total else 0.0,
+                'in_flight': len(self._calls),
+            }
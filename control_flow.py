@@ -0,0 +1,544 @@
+from collections import deque
+
+from lexical_analysis import SKIPPED_TYPES
+from objects import Token
+
+
+# --- Statements ---
+
+class Statement:
+    """
+    A statement as seen by the flow analyses.
+
+    Fields:
+        - kind: 'declaration', 'assignment', 'return', 'expression',
+          'condition', 'if' or 'while'
+        - line: Line of its first token
+        - effects: ('read' | 'write', name, line) in evaluation order; a
+          right-hand side is read before its target is written
+        - declares: Names declared by a declaration
+        - condition: The 'condition' statement of an if/while
+        - body: Statements of an if/while block
+        - orelse: Statements of the else branch of an if
+        - order: Position in source order, over all statements
+    """
+
+    def __init__(self, kind, line, effects=(), declares=(), condition=None, body=(), orelse=()):
+        self.kind = kind
+        self.line = line
+        self.effects = list(effects)
+        self.declares = list(declares)
+        self.condition = condition
+        self.body = list(body)
+        self.orelse = list(orelse)
+        self.order = None
+
+    def __repr__(self):
+        return f'Statement({self.kind!r}, line={self.line})'
+
+
+def build_statements(tokens: list[Token]):
+    """
+    Group a token list into nested statements, following the same shapes
+    the parser accepts: declarations, assignments, calls, returns,
+    if/while blocks and function definitions (kept as one opaque
+    statement). Invalid input is grouped as well as it can be; the parser
+    is the one that reports it.
+    """
+    preproc_lines = {t['line'] for t in tokens if t['type'] == 'PREPROCESSOR'}
+    tokens = [t for t in tokens if t['type'] not in SKIPPED_TYPES and t['line'] not in preproc_lines]
+    statements, _ = _block(tokens, 0)
+    counter = 0
+
+    def number(statements):
+        nonlocal counter
+        for statement in statements:
+            if statement.condition is not None:
+                statement.condition.order = counter
+                counter += 1
+            statement.order = counter
+            counter += 1
+            number(statement.body)
+            number(statement.orelse)
+    number(statements)
+    return statements
+
+
+def _block(tokens, i):
+    """
+    Read statements from `tokens[i]` up to the closing '}' of the block.
+    Returns (statements, index after the '}').
+    """
+    statements = []
+    while i < len(tokens):
+        if tokens[i]['token'] == '}':
+            return statements, i + 1
+        if tokens[i]['token'] == '{':  # bare block
+            body, i = _block(tokens, i + 1)
+            statements.extend(body)
+            continue
+        statement, i = _statement(tokens, i)
+        statements.append(statement)
+    return statements, i
+
+
+def _statement(tokens, i):
+    """
+    Read the statement starting at `tokens[i]`. Returns (statement, next index).
+    """
+    n = len(tokens)
+    token = tokens[i]
+    text = token['token']
+    if token['type'] == 'KEYWORD' and text in ('if', 'while') and i + 1 < n and tokens[i + 1]['token'] == '(':
+        close = _closing_parenthesis(tokens, i + 1)
+        condition = _simple(tokens[i + 2:close], 'condition', token['line'])
+        i = close + 1
+        body = orelse = []
+        if i < n and tokens[i]['token'] == '{':
+            body, i = _block(tokens, i + 1)
+        if text == 'if' and i < n and tokens[i]['token'] == 'else':
+            if i + 1 < n and tokens[i + 1]['token'] == '{':
+                orelse, i = _block(tokens, i + 2)
+            elif i + 1 < n:
+                nested, i = _statement(tokens, i + 1)
+                orelse = [nested]
+            else:
+                i += 1
+        return Statement(text, token['line'], condition=condition, body=body, orelse=orelse), i
+
+    if (token['type'] == 'KEYWORD' and i + 2 < n and tokens[i + 1]['type'] == 'IDENTIFIER'
+            and tokens[i + 2]['token'] == '('):
+        # Function prototype or definition: its body is analyzed in its own scope
+        close = _closing_parenthesis(tokens, i + 2)
+        if close + 1 < n and tokens[close + 1]['token'] in ('{', ';'):
+            i = close + 2
+            if tokens[close + 1]['token'] == '{':
+                _, i = _block(tokens, i)
+            return Statement('function', token['line']), i
+
+    end, depth = i, 0
+    while end < n:
+        value = tokens[end]['token']
+        if value in ('(', '['):
+            depth += 1
+        elif value in (')', ']'):
+            depth -= 1
+        elif value in ('{', '}') or (value == ';' and depth <= 0):
+            break
+        end += 1
+    statement = _simple(tokens[i:end], line=token['line'])
+    return statement, end + 1 if end < n and tokens[end]['token'] == ';' else max(end, i + 1)
+
+
+def _closing_parenthesis(tokens, i):
+    depth = 0
+    for k in range(i, len(tokens)):
+        value = tokens[k]['token']
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            depth -= 1
+            if depth == 0:
+                return k
+        elif value in ('{', '}', ';'):
+            return k - 1
+    return len(tokens)
+
+
+def _simple(tokens, kind=None, line=-1):
+    """
+    Build a non-block statement from its tokens (without the ';').
+    """
+    first = tokens[0] if tokens else None
+    declares = []
+    if kind is None and first is None:
+        kind = 'expression'
+    elif kind is None:
+        if first['type'] == 'KEYWORD' and first['token'] == 'return':
+            kind = 'return'
+        elif first['type'] == 'KEYWORD':
+            kind = 'declaration'
+        else:
+            kind = 'expression'
+
+    segments = [tokens]
+    if kind == 'declaration':
+        # `int a = 1, b = a;` declares and initializes one name per segment
+        segments, start, depth = [], 0, 0
+        for k, token in enumerate(tokens):
+            if token['token'] in ('(', '['):
+                depth += 1
+            elif token['token'] in (')', ']'):
+                depth -= 1
+            elif token['token'] == ',' and depth == 0:
+                segments.append(tokens[start:k])
+                start = k + 1
+        segments.append(tokens[start:])
+
+    effects = []
+    for segment in segments:
+        if kind == 'declaration':
+            while segment and segment[0]['type'] == 'KEYWORD':
+                segment = segment[1:]
+            if segment and segment[0]['type'] == 'IDENTIFIER':
+                declares.append(segment[0]['token'])
+        targets, reads = [], []
+        for k, token in enumerate(segment):
+            if token['type'] != 'IDENTIFIER':
+                continue
+            after = segment[k + 1]['token'] if k + 1 < len(segment) else None
+            if after == '=' and (k + 2 >= len(segment) or segment[k + 2]['token'] != '='):
+                targets.append(token)
+            elif after != '(' and not (kind == 'declaration' and k == 0):  # calls name functions
+                reads.append(token)
+        effects.extend(('read', t['token'], t['line']) for t in reads)
+        effects.extend(('write', t['token'], t['line']) for t in reversed(targets))
+    if kind == 'expression' and any(effect[0] == 'write' for effect in effects):
+        kind = 'assignment'
+    return Statement(kind, line, effects, declares)
+
+
+# --- Control-flow graph ---
+
+class BasicBlock:
+    """
+    Straight-line run of statements with its edges in the graph.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.statements = []
+        self.successors = []
+        self.predecessors = []
+
+    def __repr__(self):
+        return f'BasicBlock({self.index}, {self.statements})'
+
+
+class ControlFlowGraph:
+    """
+    Control-flow graph of a statement list.
+
+    `entry` and `exit` are empty blocks. An `if` ends its block with the
+    condition and branches to its body and to its else branch (or straight
+    to the join block); a `while`
+    gets a header block holding the condition, with edges into the body,
+    back from the body's end and out of the loop. Statements after a
+    `return` start a block without predecessors.
+
+    Every variable touched by a statement gets a bit (`bits`), so sets of
+    variables are plain ints.
+    """
+
+    def __init__(self, statements):
+        self.blocks = []
+        self.entry = self._new_block()
+        self.exit = self._new_block()
+        end = self._build(statements, self.entry)
+        if end is not None:
+            self._link(end, self.exit)
+        self.end = end  # Block control falls out of the statements from, or None
+
+        self.variables = []
+        self.bits = {}
+        for block in self.blocks:
+            for statement in block.statements:
+                for _, name, _ in statement.effects:
+                    if name not in self.bits:
+                        self.bits[name] = 1 << len(self.variables)
+                        self.variables.append(name)
+        self.universe = (1 << len(self.variables)) - 1
+        self._order = None
+
+    def _new_block(self):
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    @staticmethod
+    def _link(source, target):
+        source.successors.append(target)
+        target.predecessors.append(source)
+
+    def _build(self, statements, current):
+        """
+        Append `statements` to the graph from `current`; returns the block
+        control reaches afterwards, or None after a `return`.
+        """
+        for statement in statements:
+            if current is None:  # unreachable
+                current = self._new_block()
+            if statement.kind == 'if':
+                current.statements.append(statement.condition)
+                body = self._new_block()
+                self._link(current, body)
+                body_end = self._build(statement.body, body)
+                if statement.orelse:
+                    orelse = self._new_block()
+                    self._link(current, orelse)
+                    ends = [body_end, self._build(statement.orelse, orelse)]
+                else:
+                    ends = [body_end, current]
+                ends = [end for end in ends if end is not None]
+                if not ends:  # both branches return
+                    current = None
+                    continue
+                join = self._new_block()
+                for end in ends:
+                    self._link(end, join)
+                current = join
+            elif statement.kind == 'while':
+                header = self._new_block()
+                self._link(current, header)
+                header.statements.append(statement.condition)
+                body = self._new_block()
+                self._link(header, body)
+                body_end = self._build(statement.body, body)
+                if body_end is not None:
+                    self._link(body_end, header)
+                current = self._new_block()
+                self._link(header, current)
+            else:
+                current.statements.append(statement)
+                if statement.kind == 'return':
+                    self._link(current, self.exit)
+                    current = None
+        return current
+
+    def mask(self, names):
+        """
+        Bitset of `names`.
+        """
+        bits = 0
+        for name in names:
+            bits |= self.bits.get(name, 0)
+        return bits
+
+    def names(self, bits):
+        """
+        Names in the bitset `bits`, in first-seen order.
+        """
+        return [name for name in self.variables if bits & self.bits[name]]
+
+    def reverse_postorder(self):
+        """
+        Blocks reachable from `entry`, in reverse postorder.
+        """
+        if self._order is not None:
+            return list(self._order)
+        order, seen = [], {self.entry.index}
+        stack = [(self.entry, iter(self.entry.successors))]
+        while stack:
+            block, successors = stack[-1]
+            for successor in successors:
+                if successor.index not in seen:
+                    seen.add(successor.index)
+                    stack.append((successor, iter(successor.successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        self._order = order
+        return list(order)
+
+    def reachable(self):
+        """
+        Indices of the blocks reachable from `entry`.
+        """
+        return {block.index for block in self.reverse_postorder()}
+
+
+# --- Dataflow engine ---
+
+def solve(cfg, transfer, forward=True, must=False, boundary=0):
+    """
+    Worklist solver for bitset dataflow problems.
+
+    `transfer(block, value)` maps the value flowing into a block to the
+    value flowing out of it. Values meet by intersection for a `must`
+    problem and by union otherwise; `boundary` is the value at `entry`
+    (forward) or `exit` (backward). Blocks are visited in reverse postorder
+    (postorder for backward problems), so acyclic regions settle in one
+    pass and each loop adds a pass per nesting level.
+
+    Returns (into, out_of): lists indexed by block, in flow direction.
+    """
+    initial = cfg.universe if must else 0
+    into = [initial] * len(cfg.blocks)
+    out_of = [initial] * len(cfg.blocks)
+
+    order = cfg.reverse_postorder()
+    reached = {block.index for block in order}
+    order += [block for block in cfg.blocks if block.index not in reached]
+    if not forward:
+        order.reverse()
+    start = cfg.entry if forward else cfg.exit
+
+    worklist = deque(order)
+    queued = {block.index for block in order}
+    while worklist:
+        block = worklist.popleft()
+        queued.discard(block.index)
+        sources = block.predecessors if forward else block.successors
+        if block is start:
+            value = boundary
+        elif sources:
+            value = out_of[sources[0].index]
+            for source in sources[1:]:
+                value = value & out_of[source.index] if must else value | out_of[source.index]
+        else:
+            value = initial
+        into[block.index] = value
+        result = transfer(block, value)
+        if result != out_of[block.index]:
+            out_of[block.index] = result
+            for target in (block.successors if forward else block.predecessors):
+                if target.index not in queued:
+                    queued.add(target.index)
+                    worklist.append(target)
+    return into, out_of
+
+
+def gen_kill(cfg, forward=True):
+    """
+    Per-block (gen, kill) bitsets for writes (forward) or for upward-exposed
+    reads and writes (backward).
+    """
+    gens, kills = [], []
+    for block in cfg.blocks:
+        gen = kill = 0
+        statements = block.statements if forward else reversed(block.statements)
+        for statement in statements:
+            effects = statement.effects if forward else reversed(statement.effects)
+            for action, name, _ in effects:
+                bit = cfg.bits[name]
+                if action == 'write':
+                    gen, kill = (gen | bit, kill) if forward else (gen & ~bit, kill | bit)
+                elif not forward:
+                    gen |= bit
+        gens.append(gen)
+        kills.append(kill)
+    return gens, kills
+
+
+def assigned_variables(cfg, must=True, boundary=0):
+    """
+    Variables assigned on every path (`must`) or on some path into each
+    block, with `boundary` assigned at the entry. Returns (into, out_of)
+    bitsets per block.
+    """
+    gens, _ = gen_kill(cfg)
+    return solve(cfg, lambda block, value: value | gens[block.index], forward=True, must=must, boundary=boundary)
+
+
+def live_variables(cfg):
+    """
+    Variables whose current value may still be read, at the end and at the
+    start of each block. Returns (live_out, live_in) bitsets per block.
+    """
+    gens, kills = gen_kill(cfg, forward=False)
+    return solve(cfg, lambda block, value: gens[block.index] | (value & ~kills[block.index]), forward=False)
+
+
+# --- Analyses built on the engine ---
+
+class FlowState:
+    """
+    What the assignment analyses carry from one top-level statement to the
+    next when a program is analyzed a statement at a time. Top-level
+    statements run in sequence, so the state after one is the state before
+    the next.
+
+    Fields:
+        - definitely / possibly: Names assigned on every / some path to the
+          end of the statements seen so far
+        - written: Names written anywhere in them
+        - reachable: False once control cannot get past them (a `return`)
+    """
+
+    def __init__(self):
+        self.definitely = set()
+        self.possibly = set()
+        self.written = set()
+        self.reachable = True
+
+
+def uninitialized_reads(cfg, state=None):
+    """
+    Classify every variable read by what reaches it: a dict per read with
+    name, line, `definitely` / `possibly` (assigned on all / some paths to
+    it) and `earlier` (assigned by a statement before it in source order).
+
+    With a FlowState, `cfg` continues the statements `state` describes, and
+    `state` is advanced past it.
+    """
+    if state is not None and not state.reachable:
+        return []
+    definite, definite_out = assigned_variables(cfg, must=True, boundary=cfg.mask(state.definitely) if state else 0)
+    possible, possible_out = assigned_variables(cfg, must=False, boundary=cfg.mask(state.possibly) if state else 0)
+    written = state.written if state is not None else ()
+
+    first_write = {}
+    for block in cfg.blocks:
+        for statement in block.statements:
+            for index, (action, name, _) in enumerate(statement.effects):
+                if action == 'write':
+                    first_write[name] = min(first_write.get(name, (statement.order, index)), (statement.order, index))
+
+    reads = []
+    for block in cfg.blocks:
+        must, may = definite[block.index], possible[block.index]
+        for statement in block.statements:
+            for index, (action, name, line) in enumerate(statement.effects):
+                bit = cfg.bits[name]
+                if action == 'write':
+                    must, may = must | bit, may | bit
+                    continue
+                reads.append({
+                    'name': name,
+                    'line': line,
+                    'definitely': bool(must & bit),
+                    'possibly': bool(may & bit),
+                    'earlier': name in written or first_write.get(name, (float('inf'),)) < (statement.order, index),
+                })
+
+    if state is not None:
+        if cfg.end is None or cfg.end.index not in cfg.reachable():
+            state.reachable = False
+        else:
+            state.definitely.update(cfg.names(definite_out[cfg.end.index]))
+            state.possibly.update(cfg.names(possible_out[cfg.end.index]))
+        state.written.update(first_write)
+    return reads
+
+
+def dead_stores(cfg):
+    """
+    (name, line) of every write whose value is never read afterwards.
+    """
+    live_out, _ = live_variables(cfg)
+    stores = []
+    for block in cfg.blocks:
+        live = live_out[block.index]
+        for statement in reversed(block.statements):
+            for action, name, line in reversed(statement.effects):
+                bit = cfg.bits[name]
+                if action == 'read':
+                    live |= bit
+                else:
+                    if not live & bit:
+                        stores.append((name, line))
+                    live &= ~bit
+    stores.sort(key=lambda store: store[1])
+    return stores
+
+
+def unreachable_statements(cfg):
+    """
+    Statements no path from the entry reaches, in source order.
+    """
+    reachable = cfg.reachable()
+    statements = [statement for block in cfg.blocks if block.index not in reachable
+                  for statement in block.statements]
+    return sorted(statements, key=lambda statement: statement.order)
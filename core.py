@@ -0,0 +1,45 @@
+import importlib
+
+# Public analyzer API -> module that defines it. Nothing in these modules may
+# import Flask; main.py is the only web entry point.
+EXPORTS = {
+    'lexer': 'lexical_analysis',
+    'iter_tokens': 'lexical_analysis',
+    'get_token_type': 'lexical_analysis',
+    'parser': 'syntactic_analysis',
+    'semantic_analyzer': 'semantic_analysis',
+    'SemanticAnalyzer': 'semantic_analysis',
+    'register_rule': 'semantic_analysis',
+    'SymbolTable': 'objects',
+    'TokenStream': 'objects',
+    'Tag': 'objects',
+    'Diagnostics': 'objects',
+    'fused_analysis': 'pipeline',
+    'vectorized_lexer': 'vectorized_lexer',
+    'AnalysisCache': 'analysis_cache',
+    'run_analysis': 'analysis_cache',
+    'analyze_translation_unit': 'translation_unit',
+    'EditorSession': 'sessions',
+    'SessionManager': 'sessions',
+    'AdmissionController': 'admission',
+    'estimate_cost': 'admission',
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    """
+    Import the module behind `name` on first access and cache the attribute,
+    so `import core` costs nothing until a stage is actually used.
+    """
+    module = EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))
@@ -0,0 +1,290 @@
+import argparse
+import math
+import random
+import sys
+from time import perf_counter
+
+from lexical_analysis import lexer, iter_tokens
+from syntactic_analysis import parser
+from pipeline import fused_analysis
+from vectorized_lexer import vectorized_lexer, load_numpy
+
+ATOMS = ('int', 'float', 'char', 'double', 'const', 'if', 'while', 'return', 'x', 'y', 'total_1', '_tmp',
+         '=', '+', '-', '*', '/', '<', '>', '!', '&', '|', '==', ';', ',', '.', '(', ')', '{', '}', '[', ']',
+         '0', '42', '3.14', '7.', '.5', '0x1F', "'a'", '"text"', '$', '@', '\n', '\t')
+
+
+# --- Generators: each returns C-like source that grows linearly with `size` ---
+
+def gen_soup(rng, size):
+    """Random token soup."""
+    return ' '.join(rng.choice(ATOMS) for _ in range(size))
+
+
+def gen_statements(rng, size):
+    """Mostly well-formed declarations, assignments and blocks, one per line."""
+    lines = []
+    for i in range(size):
+        kind = rng.random()
+        if kind < 0.4:
+            lines.append(f'{rng.choice(("int", "float", "char", "const int"))} v{i} = {rng.randint(0, 99)};')
+        elif kind < 0.7:
+            lines.append(f'v{rng.randrange(i + 1)} = v{rng.randrange(i + 1)} {rng.choice("+-*/")} {rng.randint(1, 9)};')
+        elif kind < 0.85:
+            lines.append(f'while (v{rng.randrange(i + 1)} < {rng.randint(1, 9)}) {{ v{i} = 1; }}')
+        else:
+            lines.append(rng.choice(ATOMS) + ' ' + rng.choice(ATOMS))
+    return '\n'.join(lines)
+
+
+def gen_brackets(rng, size):
+    """Nested and unbalanced brackets around short expressions."""
+    parts = []
+    for _ in range(size):
+        if rng.random() < 0.5:
+            parts.append(rng.choice('({[') * rng.randint(1, 4))
+        else:
+            parts.append(rng.choice(('x', '1', ';', 'x = 1;', ',')))
+        if rng.random() < 0.45:
+            parts.append(rng.choice(')}]') * rng.randint(1, 4))
+    return ' '.join(parts)
+
+
+def gen_unterminated(rng, size):
+    """Comments and strings that are left open, mixed with code."""
+    pieces = ('/* open', '*/', '/* closed */', '"open', '"closed"', '// line\n', "'", "'b'", 'int x = 1;', '\n')
+    return ' '.join(rng.choice(pieces) for _ in range(size))
+
+
+def gen_long_line(rng, size):
+    """Everything on a single line."""
+    return gen_soup(rng, size).replace('\n', ' ')
+
+
+GENERATORS = {
+    'soup': gen_soup,
+    'statements': gen_statements,
+    'brackets': gen_brackets,
+    'unterminated': gen_unterminated,
+    'long_line': gen_long_line,
+}
+
+
+# --- Properties ---
+
+def check_invariants(code, tokens):
+    """
+    Return the invariants `tokens` violates for `code`:
+    (line, position) strictly increases, every token is the source text at
+    its position, and every character outside tokens is whitespace.
+    """
+    line_starts = [0]
+    for line in code.split('\n'):
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    violations = []
+    covered = 0  # offset up to which the source is accounted for
+    previous = None
+    for token in tokens:
+        where = (token['line'], token['position'])
+        if previous is not None and where <= previous:
+            violations.append(f'position not increasing at {where} after {previous}')
+        previous = where
+        start = line_starts[token['line']] + token['position']
+        if code[start:start + len(token['token'])] != token['token']:
+            violations.append(f'token {token["token"]!r} is not the source text at {where}')
+            continue
+        if start < covered:
+            violations.append(f'token {token["token"]!r} at {where} overlaps the previous token')
+        elif code[covered:start].strip():
+            violations.append(f'{code[covered:start]!r} before {where} is not covered by any token')
+        covered = max(covered, start + len(token['token']))
+    if code[covered:].strip():
+        violations.append(f'{code[covered:]!r} at the end is not covered by any token')
+    return violations
+
+
+def _outcome(function, *args):
+    try:
+        return function(*args)
+    except Exception as e:
+        return f'raises {type(e).__name__}'
+
+
+def check_equivalence(code):
+    """
+    Return the disagreements between alternative engines on `code`:
+    the eager, lazy and vectorized lexers, and the batch parser against the
+    fused streaming pipeline.
+    """
+    differences = []
+    tokens = _outcome(lexer, code)
+    if _outcome(lambda c: list(iter_tokens(c)), code) != tokens:
+        differences.append('iter_tokens differs from lexer')
+    if load_numpy() is not None and _outcome(vectorized_lexer, code) != tokens:
+        differences.append('vectorized_lexer differs from lexer')
+    if isinstance(tokens, list):
+        batch = _outcome(lambda t: parser(t)[::2], tokens)
+        fused = _outcome(lambda c: fused_analysis(c)[1][::2], code)
+        if batch != fused:
+            differences.append('fused pipeline parse differs from parser')
+    return differences
+
+
+def shrink(code, fails):
+    """
+    Greedily remove chunks of `code` while `fails(code)` holds, returning a
+    small input that still fails.
+    """
+    chunk = max(len(code) // 2, 1)
+    while chunk >= 1:
+        start = 0
+        while start < len(code):
+            candidate = code[:start] + code[start + chunk:]
+            if candidate != code and fails(candidate):
+                code = candidate
+            else:
+                start += chunk
+        chunk //= 2
+    return code
+
+
+# --- Cost scaling ---
+
+def stage_costs(code, repeat=3):
+    """
+    Best-of-`repeat` seconds spent lexing and parsing `code`.
+    """
+    lex = parse = math.inf
+    for _ in range(repeat):
+        start = perf_counter()
+        tokens = lexer(code)
+        middle = perf_counter()
+        parser(tokens)
+        end = perf_counter()
+        lex, parse = min(lex, middle - start), min(parse, end - middle)
+    return {'lexer': lex, 'parser': parse}
+
+
+def _slope(sizes, times):
+    """Least-squares slope of log(time) over log(size)."""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(time, 1e-9)) for time in times]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def scaling(generator, seed, sizes=(100, 200, 400, 800), max_exponent=1.3):
+    """
+    Grow one input of `generator` through `sizes` and fit how each stage's
+    cost grows with the input length. A stage whose log-log slope exceeds
+    `max_exponent` is flagged as super-linear.
+
+    Returns {'lengths', 'microseconds_per_char': {stage: [...]},
+    'exponent': {stage: slope}, 'super_linear': [stages]}.
+    """
+    lengths, costs = [], {'lexer': [], 'parser': []}
+    for size in sizes:
+        code = generator(random.Random(seed), size)
+        lengths.append(max(len(code), 1))
+        try:
+            for stage, seconds in stage_costs(code).items():
+                costs[stage].append(seconds)
+        except Exception:  # crashes are reported by the property checks
+            return None
+    exponents = {stage: _slope(lengths, times) for stage, times in costs.items()}
+    return {
+        'lengths': lengths,
+        'microseconds_per_char': {stage: [round(t / n * 1e6, 3) for t, n in zip(times, lengths)]
+                                  for stage, times in costs.items()},
+        'exponent': exponents,
+        'super_linear': [stage for stage, exponent in exponents.items() if exponent > max_exponent],
+    }
+
+
+# --- Driver ---
+
+def fuzz(iterations=200, seed=0, generators=None, max_size=40, scale_every=25, max_exponent=1.3):
+    """
+    Run the property checks on `iterations` generated inputs per generator
+    and a scaling run every `scale_every` inputs. The reported failing
+    inputs are shrunk first.
+
+    Returns one finding per generator and kind, for its first occurrence:
+    {'generator', 'seed', 'kind', 'detail', 'input', 'count'}.
+    """
+    findings = {}
+
+    def report(name, case_seed, kind, detail, code):
+        finding = findings.get((name, kind))
+        if finding is None:
+            findings[name, kind] = {'generator': name, 'seed': case_seed, 'kind': kind,
+                                    'detail': detail, 'input': code, 'count': 1}
+        else:
+            finding['count'] += 1
+
+    for name in generators or GENERATORS:
+        generator = GENERATORS[name]
+        for i in range(iterations):
+            case_seed = seed * 1_000_003 + i
+            rng = random.Random(case_seed)
+            code = generator(rng, rng.randint(0, max_size))
+
+            tokens = _outcome(lexer, code)
+            if isinstance(tokens, str):
+                report(name, case_seed, 'crash', f'lexer {tokens}', code)
+            else:
+                violations = check_invariants(code, tokens)
+                if violations:
+                    report(name, case_seed, 'invariant', violations[0], code)
+                parsed = _outcome(parser, tokens)
+                if isinstance(parsed, str):
+                    report(name, case_seed, 'crash', f'parser {parsed}', code)
+
+            differences = check_equivalence(code)
+            if differences:
+                report(name, case_seed, 'equivalence', differences[0], code)
+
+            if scale_every and i % scale_every == 0:
+                result = scaling(generator, case_seed, max_exponent=max_exponent)
+                if result and result['super_linear']:
+                    stages = ', '.join(f'{stage} ~ n^{result["exponent"][stage]:.2f}'
+                                       for stage in result['super_linear'])
+                    report(name, case_seed, 'super-linear', stages,
+                           generator(random.Random(case_seed), 100))
+
+    # Shrink the reported inputs (scaling findings keep their full input)
+    failing = {
+        'crash': lambda c: isinstance(_outcome(lexer, c), str) or isinstance(_outcome(parser, lexer(c)), str),
+        'invariant': lambda c: not isinstance(_outcome(lexer, c), str) and bool(check_invariants(c, lexer(c))),
+        'equivalence': lambda c: bool(check_equivalence(c)),
+    }
+    for finding in findings.values():
+        if finding['kind'] in failing:
+            finding['input'] = shrink(finding['input'], failing[finding['kind']])
+    return list(findings.values())
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Fuzz the lexer and parser for invariant violations, '
+                                                    'engine disagreements and super-linear inputs.')
+    arguments.add_argument('--iterations', type=int, default=200, help='inputs per generator')
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--generator', action='append', choices=sorted(GENERATORS),
+                           help='only run these generators (repeatable)')
+    arguments.add_argument('--max-exponent', type=float, default=1.3,
+                           help='flag stages whose cost grows faster than n^this')
+    options = arguments.parse_args(argv)
+
+    findings = fuzz(options.iterations, options.seed, options.generator, max_exponent=options.max_exponent)
+    for finding in findings:
+        print(f"[{finding['kind']}] {finding['generator']} (seed {finding['seed']}, "
+              f"{finding['count']} input(s)): {finding['detail']}")
+        print(f"    input: {finding['input']!r}")
+    print(f'{len(findings)} finding(s)')
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
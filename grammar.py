@@ -0,0 +1,367 @@
+import argparse
+import os
+import pprint
+import re
+import sys
+
+# Grammar of the supported C subset, read by `load_grammar`.
+#
+#   name -> alternative            a rule; further alternatives start with '|'
+#   'text'                         a literal keyword, punctuation or operator
+#   KEYWORD, IDENTIFIER, NUMBER    any token of that type; a literal keyword is
+#                                  looked up first, so 'return' can have its own
+#                                  alternative next to KEYWORD
+#   $                              the end of input (not consumed)
+#   @name                          a parser action, run when reached
+#   ε                              the empty alternative
+#   %default                       alternative taken when no other one applies;
+#                                  an empty or only alternative is the default
+#   ! message                      syntax error reported inside the rule; {token}
+#                                  is the current token, {first} the first token
+#                                  of the statement (and where it is reported)
+#
+# Rules without a message report the message of the rule they are used in.
+# `item` and `block_item` are statements: after a syntax error the parser
+# skips to the end of the innermost one and continues with the next.
+GRAMMAR = r"""
+# Statements at file scope
+item                -> 'return' return_value
+                     | 'if' control
+                     | 'while' control
+                     | 'const' const_declaration
+                     | KEYWORD @type declarator_or_function
+                     | IDENTIFIER identifier_statement
+                     ! Unexpected token '{token}'
+
+# Statements in blocks, where functions cannot be defined
+block_item          -> 'return' return_value
+                     | 'if' control
+                     | 'while' control
+                     | 'const' const_declaration
+                     | KEYWORD @type declarator
+                     | IDENTIFIER identifier_statement
+                     ! Unexpected token '{token}'
+
+# Statements up to the closing '}'; an unclosed block ends with the input
+block               -> '}'
+                     | $
+                     | block_item @commit block             %default
+
+return_value        -> expression ';'                       ! Invalid return statement syntax
+control             -> '(' expression ')' '{' block         ! Invalid control structure syntax
+
+# Declarations
+const_declaration   -> KEYWORD @const_type declarator       ! Expected type after 'const'
+declarator          -> IDENTIFIER @name declaration         ! Expected variable name after type
+declaration         -> initializer @declare declaration_end
+initializer         -> '=' expression @initialized
+                     | ε
+                     ! Invalid assignment expression
+declaration_end     -> ',' declarator
+                     | ';'
+                     ! Expected ';' after declaration
+
+# Assignments and calls
+identifier_statement -> '=' assignment
+                     | '(' call_arguments
+                     ! Unexpected token '{first}'
+assignment          -> expression ';'                       ! Invalid assignment statement
+call_arguments      -> ')' call_end
+                     | expression call_more
+                     ! Invalid function call arguments
+call_more           -> ',' call_arguments
+                     | ')' call_end
+                     ! Expected ',' or ')' in function call
+call_end            -> ';'                                  ! Expected ';' after function call
+
+# Function definitions and prototypes
+declarator_or_function -> IDENTIFIER @name function_or_declaration
+                     ! Expected variable name after type
+function_or_declaration -> '(' @function parameters function_body
+                     | declaration                          %default
+parameters          -> ')'
+                     | 'void' void_parameters
+                     | parameter
+                     ! Invalid parameter declaration
+void_parameters     -> ')'
+                     | IDENTIFIER @parameter more_parameters
+                     ! Invalid parameter declaration
+parameter           -> 'const' @const_parameter KEYWORD IDENTIFIER @parameter more_parameters
+                     | KEYWORD IDENTIFIER @parameter more_parameters
+                     ! Invalid parameter declaration
+more_parameters     -> ')'
+                     | ',' parameter
+                     ! Expected ',' or ')' in parameter list
+function_body       -> ';' @prototype
+                     | '{' @enter_function block @leave_function
+                     ! Expected '{' or ';' after function declarator
+
+# Expressions
+expression          -> additive comparison
+comparison          -> '<' additive comparison
+                     | '<=' additive comparison
+                     | '>' additive comparison
+                     | '>=' additive comparison
+                     | '==' additive comparison
+                     | '!=' additive comparison
+                     | ε
+additive            -> term more_terms
+more_terms          -> '+' term more_terms
+                     | '-' term more_terms
+                     | ε
+term                -> primary more_factors
+more_factors        -> '*' primary more_factors
+                     | '/' primary more_factors
+                     | ε
+primary             -> IDENTIFIER call
+                     | NUMBER
+                     | '(' expression ')'
+call                -> '(' arguments
+                     | ε
+arguments           -> ')'
+                     | expression more_arguments
+more_arguments      -> ')'
+                     | ',' expression more_arguments
+"""
+
+STATEMENTS = ('item', 'block_item')
+START = {'file': 'item', 'block': 'block_item'}
+END = '$'
+EPSILON = 'ε'
+
+
+class GrammarError(Exception):
+    """
+    Raised when the grammar is malformed or not LL(1).
+    """
+
+
+def symbol_kind(symbol):
+    """
+    Kind of a grammar symbol: 'literal', 'type', 'end', 'action' or 'nonterminal'.
+    """
+    if symbol.startswith("'"):
+        return 'literal'
+    if symbol == END:
+        return 'end'
+    if symbol.startswith('@'):
+        return 'action'
+    if symbol.isupper():
+        return 'type'
+    return 'nonterminal'
+
+
+def load_grammar(text=GRAMMAR):
+    """
+    Read a grammar in the notation above.
+
+    Returns (productions, errors, defaults): productions is a list of
+    (name, right-hand side tuple) in the order written, errors maps rule
+    names to their message and defaults maps rule names to the index of
+    their %default alternative.
+    """
+    productions, errors, defaults = [], {}, {}
+    name = None
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.lstrip().startswith('#'):
+            continue
+        marker = re.search(r'(?:^|\s)!(?:\s|$)', line)
+        if marker:
+            line, message = line[:marker.start()], line[marker.end():].strip()
+        line = line.strip()
+        if '->' in line:
+            name, line = (part.strip() for part in line.split('->', 1))
+            if not name.isidentifier() or symbol_kind(name) != 'nonterminal':
+                raise GrammarError(f'line {number}: invalid rule name {name!r}')
+        elif line.startswith('|') and name is not None:
+            line = line[1:]
+        elif line or (marker and name is None):
+            raise GrammarError(f'line {number}: expected a rule or an alternative')
+        else:
+            line = None  # blank, or only a message
+        if marker:
+            errors[name] = message
+        if line is None:
+            continue
+        symbols = line.split()
+        if '%default' in symbols:
+            symbols.remove('%default')
+            defaults[name] = len(productions)
+        productions.append((name, tuple(symbol for symbol in symbols if symbol != EPSILON)))
+
+    rules = {lhs for lhs, _ in productions}
+    for lhs, rhs in productions:
+        for symbol in rhs:
+            if symbol_kind(symbol) == 'nonterminal' and symbol not in rules:
+                raise GrammarError(f'{lhs}: undefined rule {symbol!r}')
+    for rule in errors:
+        if rule not in rules:
+            raise GrammarError(f'message for undefined rule {rule!r}')
+    return productions, errors, defaults
+
+
+def _terminal(symbol):
+    return symbol[1:-1] if symbol_kind(symbol) == 'literal' else symbol
+
+
+def _name(symbol):
+    return symbol[1:] if symbol_kind(symbol) == 'action' else _terminal(symbol)
+
+
+def first_sets(productions):
+    """
+    FIRST set of every rule. Terminals are literal texts, token types or
+    END; None stands for the empty string.
+    """
+    first = {lhs: set() for lhs, _ in productions}
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in productions:
+            before = len(first[lhs])
+            first[lhs] |= sequence_first(rhs, first)
+            changed = changed or len(first[lhs]) != before
+    return first
+
+
+def sequence_first(symbols, first):
+    """
+    FIRST set of a sequence of symbols, given the FIRST sets of the rules.
+    """
+    result = set()
+    for symbol in symbols:
+        kind = symbol_kind(symbol)
+        if kind == 'action':
+            continue
+        if kind != 'nonterminal':
+            result.add(_terminal(symbol))
+            return result
+        result |= first[symbol] - {None}
+        if None not in first[symbol]:
+            return result
+    result.add(None)
+    return result
+
+
+def follow_sets(productions, first, starts):
+    """
+    FOLLOW set of every rule; the start rules can be followed by END.
+    """
+    follow = {lhs: set() for lhs, _ in productions}
+    for start in starts:
+        follow[start].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in productions:
+            for k, symbol in enumerate(rhs):
+                if symbol_kind(symbol) != 'nonterminal':
+                    continue
+                before = len(follow[symbol])
+                rest = sequence_first(rhs[k + 1:], first)
+                follow[symbol] |= rest - {None}
+                if None in rest:
+                    follow[symbol] |= follow[lhs]
+                changed = changed or len(follow[symbol]) != before
+    return follow
+
+
+def build_table(productions, starts=tuple(START.values())):
+    """
+    LL(1) prediction table: {rule: {terminal: production index}}.
+    A rule's empty alternative is predicted on its FOLLOW set and becomes
+    its default. Raises GrammarError listing every conflict.
+    """
+    missing = set(starts) - {lhs for lhs, _ in productions}
+    if missing:
+        raise GrammarError(f'undefined start rule(s): {", ".join(sorted(missing))}')
+    first = first_sets(productions)
+    follow = follow_sets(productions, first, starts)
+    table = {lhs: {} for lhs, _ in productions}
+    nullable = {}
+    conflicts = []
+    for index, (lhs, rhs) in enumerate(productions):
+        predicted = sequence_first(rhs, first)
+        if None in predicted:
+            predicted = (predicted - {None}) | follow[lhs]
+            nullable[lhs] = index
+        for terminal in predicted:
+            other = table[lhs].setdefault(terminal, index)
+            if other != index:
+                conflicts.append(f'{lhs} on {terminal!r}: {" ".join(productions[other][1]) or EPSILON} '
+                                 f'/ {" ".join(rhs) or EPSILON}')
+    if conflicts:
+        raise GrammarError('grammar is not LL(1):\n  ' + '\n  '.join(sorted(conflicts)))
+    return table, nullable, first, follow
+
+
+def generate(text=GRAMMAR):
+    """
+    Source of the parse table module the parser imports.
+    """
+    productions, errors, defaults = load_grammar(text)
+    table, nullable, _, _ = build_table(productions)
+    # A rule with a single alternative always takes it, so a mismatch is
+    # reported by the innermost rule that expected something else
+    counts = {}
+    for index, (lhs, _) in enumerate(productions):
+        counts[lhs] = counts.get(lhs, ()) + (index,)
+    single = {lhs: indexes[0] for lhs, indexes in counts.items() if len(indexes) == 1}
+    defaults = {**single, **nullable, **defaults}
+    literals = sorted({_terminal(symbol) for _, rhs in productions for symbol in rhs
+                       if symbol_kind(symbol) == 'literal'})
+    encoded = tuple((lhs, tuple((symbol_kind(symbol), _name(symbol)) for symbol in rhs))
+                    for lhs, rhs in productions)
+
+    def constant(name, value):
+        if isinstance(value, frozenset):  # sets print in hash order
+            return f'{name} = frozenset({pprint.pformat(sorted(value), width=100 - len(name), compact=True)})\n'
+        return f'{name} = {pprint.pformat(value, width=110, sort_dicts=True)}\n'
+
+    return ''.join([
+        '# Generated by grammar.py from its GRAMMAR; do not edit.\n',
+        '# Regenerate with `python grammar.py --write` after changing the grammar.\n\n',
+        constant('LITERALS', frozenset(literals)),
+        constant('STATEMENTS', frozenset(STATEMENTS)),
+        constant('START', START),
+        '\n# (rule, ((kind, symbol), ...)) per alternative, in grammar order\n',
+        constant('PRODUCTIONS', encoded),
+        '\n# rule -> {lookahead terminal: alternative}\n',
+        constant('TABLE', table),
+        '\n# rule -> alternative taken when the lookahead has no entry\n',
+        constant('DEFAULTS', defaults),
+        '\n# rule -> syntax error message\n',
+        constant('ERRORS', errors),
+    ])
+
+
+TABLE_MODULE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parse_table.py')
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Generate the LL(1) parse table from the grammar.')
+    arguments.add_argument('--write', action='store_true', help=f'write {os.path.basename(TABLE_MODULE)}')
+    arguments.add_argument('--check', action='store_true', help='fail if the table module is out of date')
+    options = arguments.parse_args(argv)
+
+    try:
+        source = generate()
+    except GrammarError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if options.check:
+        with open(TABLE_MODULE, encoding='utf-8') as module:
+            if module.read() != source:
+                print(f'{TABLE_MODULE} is out of date; run `python grammar.py --write`', file=sys.stderr)
+                return 1
+        return 0
+    if options.write:
+        with open(TABLE_MODULE, 'w', encoding='utf-8') as module:
+            module.write(source)
+        return 0
+    sys.stdout.write(source)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
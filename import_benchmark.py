@@ -0,0 +1,56 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Entry points, cheapest first
+TARGETS = ('core', 'lexical_analysis', 'cli', 'analysis_cache', 'pipeline', 'main')
+HEAVY_MODULES = ('flask', 'werkzeug', 'numpy')
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ','.join(heavy))
+'''
+
+
+def measure(target, runs=10):
+    """
+    Import `target` in `runs` fresh interpreters and return
+    (median seconds, best seconds, heavy modules it pulled in).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    heavy = ''
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(target=target, heavy=HEAVY_MODULES)],
+                                cwd=here, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'importing {target} failed:\n{result.stderr}')
+        elapsed, heavy = result.stdout.split(' ')
+        samples.append(float(elapsed))
+    return statistics.median(samples), min(samples), heavy.strip()
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Measure cold import time of the analyzer entry points.')
+    arguments.add_argument('targets', nargs='*', default=TARGETS)
+    arguments.add_argument('--runs', type=int, default=10)
+    options = arguments.parse_args(argv)
+
+    print(f"{'module':<20}{'median ms':>12}{'best ms':>10}  heavy imports")
+    for target in options.targets:
+        try:
+            median, best, heavy = measure(target, options.runs)
+        except RuntimeError as error:
+            print(f'{target:<20}{"failed":>12}  {str(error).splitlines()[-1]}')
+            continue
+        print(f'{target:<20}{median * 1000:>12.2f}{best * 1000:>10.2f}  {heavy or "-"}')
+
+
+if __name__ == '__main__':
+    main()
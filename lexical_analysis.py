@@ -1,8 +1,11 @@
 import re
+from collections import OrderedDict
+from threading import Lock
 from objects import Tag
-    
-def get_token_type(token):
-  token_types = [
+
+# Token rules per language, tried in order
+TOKEN_TYPES = {
+  'c': [
       {'regex': r'\s+', 'type': 'WHITESPACE'},
       {'regex': r'/\*[\s\S]*?\*/', 'type': 'COMMENT BLOCK'},
       {'regex': r'\b\d+(\.\d+)?\b', 'type': 'NUMBER'},
@@ -33,11 +36,117 @@ def get_token_type(token):
       # {'regex': r"'([^'\\]|\\.)*'", 'type': 'STRING'},
       {'regex': r'''[{}()\[\];,:.'"]''', 'type': 'PUNCTUATION'},
 
-      {'regex': r'[+\-*/=<>!&|]', 'type': 'OPERATOR'}]
+      {'regex': r'[+\-*/=<>!&|]', 'type': 'OPERATOR'},
+  ],
+}
+
+# Types whose lexemes form a small closed set; they are cached for good
+PERMANENT_TYPES = {'KEYWORD', 'PUNCTUATION', 'OPERATOR'}
+
+# Types of tokens that are not code; the analyses after parsing skip them
+SKIPPED_TYPES = {'COMMENT LINE', 'COMMENT BLOCK', 'MULTILINE COMMENT', 'PREPROCESSOR', 'LEXICAL ERROR'}
+
+
+class TokenTypeCache:
+    """
+    Bounded memo in front of the `get_token_type` rule cascade, keyed by
+    (language, lexeme).
+
+    Keywords, punctuation and operators go to a permanent table; everything
+    else lives in an LRU of at most `maxsize` hot lexemes. Lexemes longer
+    than `max_length` (e.g. whole-line probes from `try_n_catch`) are not kept.
+    """
+
+    def __init__(self, maxsize=4096, max_length=64):
+        self.maxsize = maxsize
+        self.max_length = max_length
+        self.permanent = {}
+        self.recent = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Return the cached type for `key`, or None on a miss.
+        """
+        token_type = self.permanent.get(key)
+        if token_type is None:
+            token_type = self.recent.get(key)
+            if token_type is None:
+                self.misses += 1
+                return None
+            try:
+                self.recent.move_to_end(key)
+            except KeyError:  # evicted by another thread meanwhile
+                pass
+        self.hits += 1
+        return token_type
+
+    def put(self, key, token_type):
+        """
+        Remember the type computed for `key`.
+        """
+        if len(key[1]) > self.max_length:
+            return
+        if token_type in PERMANENT_TYPES:
+            self.permanent[key] = token_type
+            return
+        with self._lock:
+            self.recent[key] = token_type
+            if len(self.recent) > self.maxsize:
+                self.recent.popitem(last=False)
+
+    def info(self):
+        """
+        Return hit/miss counters and table sizes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'permanent': len(self.permanent),
+            'recent': len(self.recent),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        """
+        Drop every cached entry and reset the counters.
+        """
+        with self._lock:
+            self.permanent.clear()
+            self.recent.clear()
+            self.hits = self.misses = 0
+
+
+token_type_cache = TokenTypeCache()
+_compiled_rules = {}
 
-  for token_type in token_types:
-      if re.fullmatch(token_type['regex'], token):
-          return token_type['type']
+
+def compiled_rules(language='c'):
+    """
+    Return the (compiled pattern, type) pairs of `language`, compiled on first use.
+    """
+    rules = _compiled_rules.get(language)
+    if rules is None:
+        rules = [(re.compile(rule['regex']), rule['type']) for rule in TOKEN_TYPES[language]]
+        _compiled_rules[language] = rules
+    return rules
+
+
+def get_token_type(token, language='c'):
+  key = (language, token)
+  cached = token_type_cache.get(key)
+  if cached is not None:
+      return cached
+
+  for pattern, token_type in compiled_rules(language):
+      if pattern.fullmatch(token):
+          token_type_cache.put(key, token_type)
+          return token_type
+  token_type_cache.put(key, Tag.UNKNOWN)
   return Tag.UNKNOWN
 
 
@@ -47,8 +156,8 @@ def try_n_catch (text):
         return {'token': text, 'type': test}
 
     parts = re.findall(r'\w+|\S', text) # splits everything up
-    # tests symbol+text combos like #define or malloc(
-    if len(parts) > 1 and (not parts[0].isalnum() or not parts[1].isalnum()):
+    # tests symbol+text combos like #define or malloc(, written together
+    if len(parts) > 1 and (not parts[0].isalnum() or not parts[1].isalnum()) and text.startswith(parts[0] + parts[1]):
         part = parts[0] + parts[1]
         test = get_token_type(part)
         if test != Tag.UNKNOWN:
@@ -69,11 +178,20 @@ def try_n_catch (text):
     return {'token': parts[0], 'type': test}
 
 
-def lexer(code):
+def lexer(code, diagnostics=None):
+    return list(iter_tokens(code, diagnostics))
+
+
+def iter_tokens(code, diagnostics=None, line=0, position=0):
+    """
+    Lazily yield the tokens of `code` in source order, starting at `line`
+    and `position` (where a token must start, or whitespace).
+    `lexer` is the eager form; the fused pipeline pulls from this directly.
+
+    With a `Diagnostics` collector, lexical errors are recorded there
+    instead of being yielded, so the stream holds only real tokens.
+    """
     code = code.split('\n')
-    tokens = []
-    position = 0
-    line = 0
 
     while line < len(code):
         if position >= len(code[line]):
@@ -85,72 +203,68 @@ def lexer(code):
             position += 1
             continue
 
-        # for multiline comment blocks
-        if code[line][position:position+2] == Tag.MULTILINE_BEGIN:
-            start_snippet = snippet = code[line][position:]  # captures the first comment line
-            if snippet.find(Tag.MULTILINE_END) != -1:  # single line comment block
-                snippet = snippet[:snippet.find(Tag.MULTILINE_END) + 2]
-                tokens.append({"line": line, "position": position,
-                               "type": Tag.MULTILINE, "token": snippet})
-                position += len(snippet)
-                continue
-
-            # searching the end of the comment
-            start_line = line
-            start_pos = position
-            end_found = False
-            end_pos = 0
-            line += 1
-            while line < len(code):
-                end_pos = code[line].find(Tag.MULTILINE_END)
-                if end_pos != -1:
-                    end_found = True
-                    snippet += '\n' + code[line][:end_pos + 2] # to include the */ in the snippet
-
-                    tokens.append({"line": start_line, "position": start_pos,
-                                   "type": Tag.MULTILINE, "token": snippet})
-                    break
-                snippet += '\n' + code[line]
-                line += 1
-            if end_found:
-                position = end_pos + len(Tag.MULTILINE_END)
-                if position < len(code[line]):
-                    continue
-            else:
-                position = 0
-                line = start_line + 1
-                tokens.append({"line": start_line, "position": start_pos,
-                               "type": 'LEXICAL ERROR', "message": 'Unclosed block comment',
-                               "token": start_snippet})
+        token, line, position = scan_at(code, line, position)
+        if diagnostics is not None and token['type'] == 'LEXICAL ERROR':
+            diagnostics.add('lexical', 'error', token['type'], token['message'], token['line'], token['position'])
             continue
+        yield token
+
+
+def scan_at(code, line, position):
+    """
+    Lex the token starting at `code[line][position]` (a non-space character)
+    given the source split into lines. Returns that token and the
+    line and position to resume from.
+    """
+    # for multiline comment blocks
+    if code[line][position:position+2] == Tag.MULTILINE_BEGIN:
+        start_snippet = snippet = code[line][position:]  # captures the first comment line
+        if snippet.find(Tag.MULTILINE_END) != -1:  # single line comment block
+            snippet = snippet[:snippet.find(Tag.MULTILINE_END) + 2]
+            return ({"line": line, "position": position,
+                     "type": Tag.MULTILINE, "token": snippet},
+                    line, position + len(snippet))
+
+        # searching the end of the comment
+        start_line = line
+        start_pos = position
+        line += 1
+        while line < len(code):
+            end_pos = code[line].find(Tag.MULTILINE_END)
+            if end_pos != -1:
+                snippet += '\n' + code[line][:end_pos + 2] # to include the */ in the snippet
+                return ({"line": start_line, "position": start_pos,
+                         "type": Tag.MULTILINE, "token": snippet},
+                        line, end_pos + len(Tag.MULTILINE_END))
+            snippet += '\n' + code[line]
+            line += 1
+        return ({"line": start_line, "position": start_pos,
+                 "type": 'LEXICAL ERROR', "message": 'Unclosed block comment',
+                 "token": start_snippet},
+                start_line + 1, 0)
+
+    # strings
+    if code[line][position] == Tag.QUOTATION_MARK:
+        try: # just gets a full inline string if enclosed
+            match = re.match(fr'^{re.escape(Tag.QUOTATION_MARK)}.*?{re.escape(Tag.QUOTATION_MARK)}',
+                             code[line][position:])
+            match = match.group(0)
+            test = get_token_type(match)
+            if test != Tag.UNKNOWN:
+                return ({"line": line, "position": position,
+                         "type": test, "token": match},
+                        line, position + len(match))
+        except AttributeError:
+            return ({"line": line, "position": position,
+                     "type": 'LEXICAL ERROR', "message": 'Unclosed string', "token": '"'},
+                    line, position + 1)
 
-        # strings
-        if code[line][position] == Tag.QUOTATION_MARK:
-            try: # just gets a full inline string if enclosed
-                match = re.match(fr'^{re.escape(Tag.QUOTATION_MARK)}.*?{re.escape(Tag.QUOTATION_MARK)}',
-                                 code[line][position:])
-                match = match.group(0)
-                test = get_token_type(match)
-                if test != Tag.UNKNOWN:
-                    tokens.append({"line": line, "position": position,
-                                   "type": test, "token": match})
-                    position += len(match)
-                    continue
-            except AttributeError:
-                tokens.append({"line": line, "position": position,
-                               "type": 'LEXICAL ERROR', "message": 'Unclosed string', "token": '"'})
-                position += 1
-                continue
-
-        # Last analysis
-        snippet = try_n_catch(code[line][position:])
-        if snippet['type'] != Tag.UNKNOWN:
-            tokens.append({"line": line, "position": position,
-               "type": snippet['type'], "token": snippet['token']})
-        else:
-            tokens.append({"line": line, "position": position,
-            "type": 'LEXICAL ERROR', "message": 'Unexpected character', "token": snippet['token']})
-        position += len(snippet['token'])
-        continue
-
-    return tokens
\ No newline at end of file
+    # Last analysis
+    snippet = try_n_catch(code[line][position:])
+    if snippet['type'] != Tag.UNKNOWN:
+        token = {"line": line, "position": position,
+                 "type": snippet['type'], "token": snippet['token']}
+    else:
+        token = {"line": line, "position": position,
+                 "type": 'LEXICAL ERROR', "message": 'Unexpected character', "token": snippet['token']}
+    return token, line, position + len(snippet['token'])
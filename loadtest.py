@@ -0,0 +1,392 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from fuzz import gen_statements
+
+ENDPOINTS = {'lexica': '/analise-lexica', 'completa': '/analise-completa'}
+# Snippet sizes, in statements (about one line each)
+SIZES = {'small': 10, 'medium': 200, 'large': 2000}
+DEFAULT_MIX = 'lexica:small=3,lexica:medium=1,completa:small=4,completa:medium=2'
+SCHEMA = 'loadtest/1'
+
+
+# --- Workload ---
+
+def parse_mix(text):
+    """
+    Parse 'endpoint:size=weight,...' into [((endpoint, size), weight)].
+    """
+    mix = []
+    for part in text.split(','):
+        kind, _, weight = part.strip().partition('=')
+        endpoint, _, size = kind.partition(':')
+        if endpoint not in ENDPOINTS or size not in SIZES:
+            raise ValueError(f'unknown request kind {kind!r}; endpoints: {", ".join(ENDPOINTS)}, '
+                             f'sizes: {", ".join(SIZES)}')
+        mix.append(((endpoint, size), float(weight or 1)))
+    return mix
+
+
+def workload(mix, count, seed=0, unique=True):
+    """
+    Return `count` requests (kind, path, payload) drawn from `mix`. The
+    snippets are generated from `seed`; with `unique` each one gets its own
+    comment, so identical requests are not coalesced by the server.
+    """
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix)
+    templates = {kind: gen_statements(random.Random(f'{seed}:{kind}'), SIZES[kind[1]]) for kind in kinds}
+    requests = []
+    for number in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        snippet = templates[kind] + (f'\n// request {number}' if unique else '')
+        requests.append((kind, ENDPOINTS[kind[0]], {'snippet': snippet}))
+    return requests
+
+
+# --- Targets ---
+
+def rss_bytes(pid='self'):
+    """
+    Resident set size of process `pid` from /proc, or None where unavailable.
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class InProcessTarget:
+    """
+    The Flask app of main.py, called through one test client per thread.
+    Its memory is this process's.
+    """
+
+    def __init__(self):
+        import main
+        self.app = main.app
+        self._local = threading.local()
+
+    def post(self, path, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.post(path, json=payload).status_code
+
+    def rss(self):
+        return rss_bytes()
+
+
+class HttpTarget:
+    """
+    A server on `base_url`, e.g. http://127.0.0.1:5000. Its memory is only
+    known when its `pid` is given and it runs on this machine.
+    """
+
+    def __init__(self, base_url, pid=None, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.pid = pid
+        self.timeout = timeout
+
+    def post(self, path, payload):
+        request = urllib.request.Request(self.base_url + path, data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def rss(self):
+        return rss_bytes(self.pid) if self.pid else None
+
+
+# --- Measurement ---
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of sorted `values`, or None when empty.
+    """
+    if not values:
+        return None
+    return values[min(max(math.ceil(fraction * len(values)) - 1, 0), len(values) - 1)]
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        'count': len(latencies),
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else None,
+        'mean': sum(latencies) / len(latencies) if latencies else None,
+    }
+
+
+class RssSampler:
+    """
+    Samples the target's RSS every `interval` seconds on a background thread.
+    """
+
+    def __init__(self, target, interval=0.5):
+        self.target = target
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _sample(self):
+        rss = self.target.rss()
+        if rss is not None:
+            self.samples.append((round(time.perf_counter() - self._start, 3), rss))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def summary(self):
+        if not self.samples:
+            return None
+        values = [rss for _, rss in self.samples]
+        return {'start': values[0], 'end': values[-1], 'peak': max(values),
+                'growth': values[-1] - values[0], 'samples': self.samples}
+
+
+def run_step(target, requests, concurrency=None, rate=None, seed=0, max_in_flight=256, sample_interval=0.5):
+    """
+    Send `requests` to `target` and measure them.
+
+    Closed loop: `concurrency` clients each send their next request as soon
+    as the previous one is answered. Open loop: requests arrive at `rate`
+    per second (Poisson arrivals) whatever the server's pace, and latency
+    counts from the scheduled arrival, so queueing is not hidden by a slow
+    client. Returns the step's record.
+    """
+    latencies, by_kind, errors = [], {}, 0
+    offered = None  # arrival rate actually generated (open loop)
+    lock = threading.Lock()
+
+    def send(kind, path, payload, scheduled=None):
+        nonlocal errors
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            status = target.post(path, payload)
+            failed = not 200 <= status < 300
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            by_kind.setdefault(f'{kind[0]}:{kind[1]}', []).append(elapsed)
+            errors += failed
+
+    # The service prints every snippet and report: discard them rather than
+    # buffer them, so the RSS samples measure the analyzer, not this harness
+    with (RssSampler(target, sample_interval) as sampler, open(os.devnull, 'w') as discard,
+          contextlib.redirect_stdout(discard)):
+        started = time.perf_counter()
+        if rate is None:
+            pending = iter(requests)
+
+            def client():
+                while True:
+                    with lock:
+                        request = next(pending, None)
+                    if request is None:
+                        return
+                    send(*request)
+
+            threads = [threading.Thread(target=client) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            rng = random.Random(seed)
+            with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+                arrival = first = time.perf_counter()
+                for request in requests:
+                    arrival += rng.expovariate(rate)
+                    delay = arrival - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(send, *request, scheduled=arrival)
+                offered = len(requests) / (arrival - first) if arrival > first else None
+        elapsed = time.perf_counter() - started
+
+    return {
+        'mode': 'closed' if rate is None else 'open',
+        'concurrency': concurrency,
+        'rate': rate,
+        'offered_rate': offered,
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else None,
+        'errors': errors,
+        'error_rate': errors / len(latencies) if latencies else 0.0,
+        'latency_ms': latency_summary(latencies),
+        'by_kind': {kind: latency_summary(values) for kind, values in sorted(by_kind.items())},
+        'rss': sampler.summary(),
+    }
+
+
+def saturation(steps, factor=2.0):
+    """
+    Index of the first step where the load stops being absorbed: p99 above
+    `factor` times the first step's, or (open loop) throughput under 90%
+    of the arrival rate generated. None if every step kept up.
+    """
+    if not steps:
+        return None
+    base = steps[0]['latency_ms']['p99']
+    for index, step in enumerate(steps):
+        p99 = step['latency_ms']['p99']
+        if p99 is not None and base and p99 > factor * base:
+            return index
+        if step['offered_rate'] and step['throughput'] < 0.9 * step['offered_rate']:
+            return index
+    return None
+
+
+def _version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_test(target, mix, levels, requests_per_step, open_loop=False, seed=0, unique=True, **options):
+    """
+    Run one step per level (a concurrency, or an arrival rate with
+    `open_loop`) with `requests_per_step` requests of `mix` each.
+    Returns the results record saved by `--output`.
+    """
+    steps = []
+    for index, level in enumerate(levels):
+        requests = workload(mix, requests_per_step, seed + index, unique)
+        if open_loop:
+            steps.append(run_step(target, requests, rate=level, seed=seed + index, **options))
+        else:
+            steps.append(run_step(target, requests, concurrency=int(level), **options))
+    return {
+        'schema': SCHEMA,
+        'version': _version(),
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'machine': {'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'target': type(target).__name__,
+        'mix': [[f'{endpoint}:{size}', weight] for (endpoint, size), weight in mix],
+        'seed': seed,
+        'steps': steps,
+        'saturation': saturation(steps),
+    }
+
+
+# --- Reporting ---
+
+def _ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def format_results(results):
+    lines = [f"{results['target']} @ {results['version'] or 'unknown version'}, mix "
+             + ', '.join(f'{kind}={weight:g}' for kind, weight in results['mix'])]
+    lines.append(f"{'level':>8} {'req':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'rss+MB':>8}")
+    for index, step in enumerate(results['steps']):
+        level = f"{step['rate']:g}/s" if step['mode'] == 'open' else f"c={step['concurrency']}"
+        latency, rss = step['latency_ms'], step['rss']
+        growth = '-' if rss is None else f"{rss['growth'] / 2 ** 20:.1f}"
+        marker = '  <- saturated' if index == results['saturation'] else ''
+        lines.append(f"{level:>8} {step['requests']:>6} {step['throughput']:>8.1f} {step['error_rate'] * 100:>6.1f} "
+                     f"{_ms(latency['p50']):>8} {_ms(latency['p95']):>8} {_ms(latency['p99']):>8} {growth:>8}{marker}")
+    return '\n'.join(lines)
+
+
+def compare(baseline, current):
+    """
+    Side by side of two saved results, step by step: throughput and
+    p50/p95/p99 with their relative change.
+    """
+    lines = [f"{baseline['version'] or 'baseline'} -> {current['version'] or 'current'}"]
+    if baseline['mix'] != current['mix'] or baseline['machine'] != current['machine']:
+        lines.append('warning: the runs used a different mix or machine')
+    for old, new in zip(baseline['steps'], current['steps']):
+        level = f"{new['rate']:g}/s" if new['mode'] == 'open' else f"c={new['concurrency']}"
+        if (old['mode'], old['rate'], old['concurrency']) != (new['mode'], new['rate'], new['concurrency']):
+            lines.append(f'{level}: not comparable with the baseline step')
+            continue
+        cells = []
+        for label, before, after in [('rps', old['throughput'], new['throughput'])] + [
+                (name, old['latency_ms'][name], new['latency_ms'][name]) for name in ('p50', 'p95', 'p99')]:
+            change = f'{(after - before) / before * 100:+.0f}%' if before and after is not None else 'n/a'
+            cells.append(f'{label} {_ms(before)} -> {_ms(after)} ({change})')
+        lines.append(f'{level}: ' + ', '.join(cells))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Load-test the analysis endpoints and report latency '
+                                                    'percentiles, throughput, errors and memory growth.')
+    arguments.add_argument('--url', help='server to test, e.g. http://127.0.0.1:5000 (default: the app in-process)')
+    arguments.add_argument('--server-pid', type=int, help='pid of the --url server, to sample its memory')
+    arguments.add_argument('--mix', default=DEFAULT_MIX, help=f'endpoint:size=weight,... (default {DEFAULT_MIX})')
+    arguments.add_argument('--concurrency', default='1,4,16', help='closed-loop steps (comma separated)')
+    arguments.add_argument('--rate', help='open-loop steps in requests per second, instead of --concurrency')
+    arguments.add_argument('--requests', type=int, default=200, help='requests per step')
+    arguments.add_argument('--seed', type=int, default=0)
+    arguments.add_argument('--no-unique', action='store_true', help='let identical snippets repeat (and coalesce)')
+    arguments.add_argument('--output', help='save the results as JSON')
+    arguments.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two saved results')
+    options = arguments.parse_args(argv)
+
+    if options.compare:
+        with open(options.compare[0]) as baseline, open(options.compare[1]) as current:
+            print(compare(json.load(baseline), json.load(current)))
+        return 0
+
+    try:
+        mix = parse_mix(options.mix)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    target = HttpTarget(options.url, options.server_pid) if options.url else InProcessTarget()
+    open_loop = options.rate is not None
+    levels = [float(level) for level in (options.rate if open_loop else options.concurrency).split(',')]
+    results = load_test(target, mix, levels, options.requests, open_loop, options.seed, not options.no_unique)
+    print(format_results(results))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=1)
+    return 1 if any(step['errors'] for step in results['steps']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,77 +1,370 @@
-from flask import Flask, request, jsonify
+import json
+from time import perf_counter
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from lexical_analysis import lexer, get_token_type
-from utils import separate_errors, print_clean
+from utils import print_clean
+from objects import Diagnostics
 from semantic_analysis import semantic_analyzer
 from syntactic_analysis import parser
+from pipeline import fused_analysis
+from warmup import Readiness, load_corpus
+from coalescing import SingleFlight, request_key
+from slow_profiler import SlowRequestProfiler
+from sessions import SessionManager
+from admission import AdmissionController, Rejected, estimate_cost
+from token_format import MEDIA_TYPES, FORMATS, ENCODINGS, encode_columnar, encode_binary, compress
 
 app = Flask('V1')
 CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+readiness = Readiness()
+in_flight = SingleFlight()
+admission = AdmissionController()
+sessions = SessionManager(lambda snippet, session, checkpoint: analyze_session(snippet, session, checkpoint))
+slow_profiler = None  # SlowRequestProfiler when capture of slow requests is enabled
+
+
+def timed(function, *args):
+    """
+    Return (function(*args), its wall time in milliseconds). Run as the
+    admitted job, this leaves out the time spent waiting in the queue.
+    """
+    start = perf_counter()
+    result = function(*args)
+    return result, (perf_counter() - start) * 1000
+
+
+def observe_latency(snippet, elapsed_ms, endpoint):
+    """
+    Hand the analysis time of a request to the slow request profiler, if enabled.
+    """
+    if slow_profiler is not None:
+        slow_profiler.observe(snippet, elapsed_ms, endpoint)
+
+
+def admitted_capture(function, code):
+    """
+    Run a slow request capture through admission, as one client of its own,
+    so it is scheduled and metered like the requests it profiles.
+    """
+    return admission.run('slow-profiler', estimate_cost(code), function, code)
+
+
+def client_id():
+    """
+    Client a request is scheduled for: the X-Client-Id header (e.g. one per
+    editor tab), or else the remote address.
+    """
+    return request.headers.get('X-Client-Id') or request.remote_addr
+
+
+def rejected_message(error):
+    """
+    User-facing message for a request the admission controller refused.
+    """
+    if error.status == 413:
+        return 'Código grande demais para ser analisado.'
+    return 'Muitas análises na fila para este cliente; tente novamente mais tarde.'
+
+
+def rejected_response(error):
+    """
+    Answer a request the admission controller refused.
+    """
+    print(str(error))
+    return jsonify({'is_success': False, 'message': rejected_message(error)}), error.status
+
+
+@app.route("/ready", methods=['GET'])
+def ready():
+    status = readiness.status()
+    if status['ready']:
+        return jsonify({'is_success': True, 'message': 'Pronto.', **status}), 200
+    return jsonify({'is_success': False, 'message': 'Aquecendo.', **status}), 503
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    return jsonify({'is_success': True, 'coalescing': in_flight.info(), 'sessions': sessions.info(),
+                    'admission': admission.info()}), 200
+
+
+@app.route("/profiles", methods=['GET'])
+def profiles():
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'is_success': False, 'message': 'Disponível apenas localmente.'}), 403
+    if slow_profiler is None:
+        return jsonify({'is_success': False, 'message': 'Captura de perfis desativada.'}), 404
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'is_success': True, 'threshold_ms': slow_profiler.threshold_ms,
+                    'profiles': slow_profiler.captures(limit)}), 200
+
+
+@app.route("/profiles/<digest>", methods=['GET'])
+def profile_stacks(digest):
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'is_success': False, 'message': 'Disponível apenas localmente.'}), 403
+    stacks = slow_profiler.stacks(digest) if slow_profiler is not None else None
+    if stacks is None:
+        return jsonify({'is_success': False, 'message': 'Perfil não encontrado.'}), 404
+    return Response(stacks, status=200, content_type='text/plain; charset=utf-8')
 
 
 @app.route("/analise-lexica", methods=['POST'])
 def lexical_analysis():
     try:
         snippet = request.get_json().get('snippet')
-        response = lexer(snippet)
+        response, elapsed_ms = in_flight.do(request_key('lexica', snippet), admission.run,
+                                            client_id(), estimate_cost(snippet), timed, lexer, snippet)
+        observe_latency(snippet, elapsed_ms, 'analise-lexica')
         success = bool(response)
         message = 'Analise lexica realizada com sucesso!' if success else 'Erro na realização da analise lexica.'
         print(message)
+        wire_format = request.args.get('format') or FORMATS.get(
+            request.accept_mimetypes.best_match(list(MEDIA_TYPES.values()), MEDIA_TYPES['json']))
+        if wire_format in ('columnar', 'binary'):
+            return compact_tokens_response(snippet, response, success, message, wire_format)
         return jsonify({'is_success': success, 'message': message, 'response': response}), 200
+    except Rejected as e:
+        return rejected_response(e)
     except BaseException as e:
         print(str(e))
         return jsonify({'is_success': False, 'message': str(e)}), 500
 
 
+def compact_tokens_response(snippet, tokens, success, message, wire_format):
+    """
+    Token list of `snippet` in the columnar JSON or packed binary format
+    (see token_format), gzip/deflate-compressed when the client accepts it.
+    """
+    if wire_format == 'binary':
+        body = encode_binary(tokens, snippet)
+    else:
+        body = json.dumps({'is_success': success, 'message': message,
+                           'response': encode_columnar(tokens)}, ensure_ascii=False).encode('utf-8')
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    headers = {'Vary': 'Accept, Accept-Encoding', 'X-Token-Count': str(len(tokens))}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(compress(body, encoding), status=200, headers=headers,
+                    content_type=MEDIA_TYPES[wire_format])
+
+
+def run_full_analysis(snippet, mode=None, session=None, checkpoint=None):
+    """
+    Run the three stages over `snippet` and render the report.
+    Returns (report, is_success).
+
+    The stages share one Diagnostics collector, so lexical errors never
+    reach the parser and each section is rendered from the collector.
+
+    For an editor `session`, lexing reuses the session's last tokens and
+    the new state is kept in it; `checkpoint()` is called first, between
+    stages and between statements, and raises to abandon a superseded
+    analysis.
+    """
+    diagnostics = Diagnostics()
+    checkpoint = checkpoint or (lambda: None)
+    checkpoint()  # superseded while it waited for its turn
+    fused = mode == 'fused' and session is None
+    fused_error = None
+    tokens = symbol_table = None
+
+    def fused_stage(index):
+        # The fused pass interleaves the stages, so a failure is reported by each
+        if fused_error is not None:
+            raise fused_error
+        return fused[index]
+
+    response = "Lexical Analysis:\n"
+    is_success = True
+    try:
+        if session is not None:
+            tokens = session.lex(snippet, diagnostics)
+        elif fused:
+            # Fused mode runs all three stages in a single streaming pass up front
+            try:
+                fused = fused_analysis(snippet, diagnostics=diagnostics)
+            except Exception as e:
+                fused_error = e
+                raise
+        else:
+            tokens = lexer(snippet, diagnostics)
+        if diagnostics.has_errors('lexical'):
+            response += f"Lexical Errors ❌:\n{print_clean(diagnostics.select('lexical'))}\n"
+        else:
+            response += "Lexicon OK ✅\n"
+    except Exception as e:
+        response += f"Lexer Error: {e}\n"
+        is_success = False
+
+    checkpoint()
+    response += "\nSyntactic Analysis:\n"
+    try:
+        valid, symbol_table, _ = fused_stage(1) if fused else parser(
+            tokens, on_statement=lambda chunk, errors: checkpoint(), diagnostics=diagnostics)
+        if valid:
+            response += "Syntax OK ✅\n"
+        else:
+            response += f"Syntax Errors ❌:\n{print_clean(diagnostics.select('syntactic'))}\n"
+    except Exception as e:
+        response += f"Parser Error: {e}\n"
+        is_success = False
+
+    checkpoint()
+    response += "\nSemantic Analysis:\n"
+    try:
+        success, _, _, _ = fused_stage(2) if fused else semantic_analyzer(tokens, symbol_table, diagnostics=diagnostics)
+        if success:
+            response += "Semantics OK ✅\n"
+        else:
+            response += f"Semantic Errors ❌:\n{print_clean(diagnostics.select('semantic', 'error'))}\n"
+        warnings = diagnostics.warnings('semantic')
+        if warnings:
+            response += f"Warnings ⚠️ :\n{print_clean(warnings)}\n"
+    except Exception as e:
+        response += f"Semantic Error: {e}\n"
+        is_success = False
+    if session is not None and is_success:
+        session.remember(snippet, tokens, diagnostics, symbol_table)
+    return response, is_success
+
+
 @app.route("/analise-completa", methods=['POST'])
 def full_analysis():
     try:
-        snippet = request.get_json().get('snippet')
+        data = request.get_json()
+        snippet = data.get('snippet')
         print(f"Code:\n{snippet.strip()}\n")
 
-        response = "Lexical Analysis:\n"
-        is_success = True
-        try:
-            tokens = lexer(snippet)
-            lex_errors = separate_errors(tokens)
-            if lex_errors:
-                response += f"Lexical Errors ❌:\n{print_clean(lex_errors)}\n"
-            else:
-                response += "Lexicon OK ✅\n"
-        except Exception as e:
-            response += f"Lexer Error: {e}\n"
-            is_success = False
-
-        response += "\nSyntactic Analysis:\n"
-        try:
-            valid, symbol_table, parse_errors = parser(tokens)
-            if valid:
-                response += "Syntax OK ✅\n"
-            else:
-                response += f"Syntax Errors ❌:\n{print_clean(parse_errors)}\n"
-        except Exception as e:
-            response += f"Parser Error: {e}\n"
-            is_success = False
-
-        response += "\nSemantic Analysis:\n"
-        try:
-            success, sem_errors, warnings, _ = semantic_analyzer(tokens, symbol_table)
-            if success:
-                response += "Semantics OK ✅\n"
-            else:
-                response += f"Semantic Errors ❌:\n{print_clean(sem_errors)}\n"
-            if warnings:
-                response += f"Warnings ⚠️ :\n{('\n'.join(warnings))}\n"
-        except Exception as e:
-            response += f"Semantic Error: {e}\n"
-            is_success = False
+        # Identical snippets posted concurrently share one analysis
+        mode = data.get('mode')
+        (response, is_success), elapsed_ms = in_flight.do(
+            request_key('completa', snippet, mode=mode), admission.run,
+            client_id(), estimate_cost(snippet), timed, run_full_analysis, snippet, mode)
+        observe_latency(snippet, elapsed_ms, 'analise-completa')
 
         print(response)
         return jsonify({'is_success': is_success, 'response': response, 'message': 'Analisado com sucesso.'}), 200
+    except Rejected as e:
+        return rejected_response(e)
     except BaseException as e:
         print(str(e))
         return jsonify({'is_success': False, 'message': f'Erro na analise: {str(e)}'}), 500
 
 
+# Editor sessions: the editor posts every version of its text and polls for
+# the analysis of the latest one; see sessions.EditorSession
+def analyze_session(snippet, session, checkpoint):
+    """
+    Analyze a version of an editor session's text. It is admitted and
+    scheduled like any other request, for the client that opened the
+    session, but always runs in this process, which holds the session, and
+    its CPU time is counted on the lane thread that runs it.
+    """
+    try:
+        return admission.run(session.client, estimate_cost(snippet), session.measure, run_full_analysis,
+                             snippet, None, session, checkpoint, local=True)
+    except Rejected as e:
+        print(str(e))
+        return rejected_message(e), False
+
+
+@app.route("/sessoes", methods=['POST'])
+def create_session():
+    session = sessions.create(client_id())
+    return jsonify({'is_success': True, 'session': session.id, 'debounce_ms': session.debounce_ms,
+                    'message': 'Sessão criada.'}), 201
+
+
+@app.route("/sessoes/<session_id>", methods=['DELETE'])
+def close_session(session_id):
+    if not sessions.close(session_id):
+        return jsonify({'is_success': False, 'message': 'Sessão não encontrada.'}), 404
+    return jsonify({'is_success': True, 'message': 'Sessão encerrada.'}), 200
+
+
+@app.route("/sessoes/<session_id>/edicoes", methods=['POST'])
+def submit_edit(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'is_success': False, 'message': 'Sessão não encontrada.'}), 404
+    snippet = (request.get_json(silent=True) or {}).get('snippet')
+    if not isinstance(snippet, str):
+        return jsonify({'is_success': False, 'message': 'Campo snippet ausente.'}), 400
+    return jsonify({'is_success': True, 'version': session.submit(snippet), 'message': 'Edição recebida.'}), 202
+
+
+@app.route("/sessoes/<session_id>/resultado", methods=['GET'])
+def session_result(session_id):
+    """
+    Long poll for the analysis of `version` (the latest by default), waiting
+    up to `timeout` seconds (at most 30).
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'is_success': False, 'message': 'Sessão não encontrada.'}), 404
+    version = request.args.get('version', type=int)
+    timeout = min(max(request.args.get('timeout', 10.0, type=float), 0.0), 30.0)
+    result = session.wait(version, timeout)
+    if result is None:
+        return jsonify({'is_success': False, 'ready': False, 'version': session.version,
+                        'message': 'Análise em andamento.'}), 202
+    return jsonify({'is_success': result['is_success'], 'ready': True, 'version': result['version'],
+                    'latest': result['version'] == session.version, 'response': result['response'],
+                    'message': 'Analisado com sucesso.'}), 200
+
+
+@app.route("/sessoes/<session_id>/simbolos", methods=['GET'])
+def session_symbols(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'is_success': False, 'message': 'Sessão não encontrada.'}), 404
+    symbol_table = session.symbol_table
+    return jsonify({'is_success': True,
+                    'symbols': symbol_table.dump() if symbol_table is not None else {},
+                    'functions': {name: {'return_type': attributes['return_type'], 'params': attributes['params'],
+                                         'line': attributes['line']}
+                                  for name, attributes in symbol_table.functions.items()} if symbol_table else {},
+                    'message': 'Tabela de símbolos da última análise.'}), 200
+
+
 if __name__ == '__main__':
-    app.run(debug=True, use_reloader=False)  # Critical fix
+    import argparse
+
+    arguments = argparse.ArgumentParser(description='Compiler analysis service.')
+    arguments.add_argument('--workers', type=int, default=0,
+                           help='pre-forked worker processes; 0 runs the debug server')
+    arguments.add_argument('--host', default='127.0.0.1')
+    arguments.add_argument('--port', type=int, default=5000)
+    arguments.add_argument('--warmup-corpus', help='directory of .c files to warm up with')
+    arguments.add_argument('--profile-slow-ms', type=float,
+                           help='profile requests slower than this in the background')
+    arguments.add_argument('--profile-dir', default='.profiles')
+    arguments.add_argument('--debounce-ms', type=float, default=250,
+                           help='quiet time before an editor session is analyzed')
+    arguments.add_argument('--slow-cost', type=int, default=admission.slow_cost,
+                           help='estimated cost above which a request goes to the slow lane')
+    arguments.add_argument('--max-cost', type=int, help='refuse requests with a higher estimated cost')
+    arguments.add_argument('--client-weight', action='append', default=[], metavar='CLIENT=WEIGHT',
+                           help='share of the analysis time for a client id (repeatable; default 1)')
+    options = arguments.parse_args()
+    sessions.debounce_ms = options.debounce_ms
+    admission.slow_cost = options.slow_cost
+    admission.max_cost = options.max_cost
+    for option in options.client_weight:
+        client, _, weight = option.partition('=')
+        admission.weights[client] = float(weight)
+    if options.profile_slow_ms is not None:
+        slow_profiler = SlowRequestProfiler(options.profile_dir, options.profile_slow_ms, run=admitted_capture)
+    corpus = load_corpus(options.warmup_corpus) if options.warmup_corpus else None
+
+    if options.workers:
+        from prefork import serve_prefork
+        # Warm up once in the parent; every worker is forked ready
+        serve_prefork(app, options.host, options.port, options.workers,
+                      before_fork=lambda: readiness.run(corpus))
+    else:
+        readiness.start(corpus)
+        app.run(host=options.host, port=options.port, debug=True, use_reloader=False)  # Critical fix
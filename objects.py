@@ -1,3 +1,6 @@
+import bisect
+import heapq
+import math
 from typing import TypedDict
 
 class Tag:
@@ -15,6 +18,9 @@ class Tag:
     MULTILINE_END = '*/'
     QUOTATION_MARK = '"'
 
+BRACKET_PAIRS = {'(': ')', '{': '}', '[': ']'}
+CLOSING_BRACKETS = {closer: opener for opener, closer in BRACKET_PAIRS.items()}
+
 # --- Token Type Definition ---
 
 class Token(TypedDict):
@@ -32,6 +38,98 @@ class Token(TypedDict):
     token: str
 
 
+class Diagnostic(TypedDict):
+    """
+    A problem reported by one of the analysis stages.
+    Fields:
+        - stage: Stage that reported it ('lexical', 'syntactic' or 'semantic')
+        - severity: 'error' or 'warning'
+        - type: LEXICAL ERROR, SYNTAX_ERROR, SEMANTIC_ERROR or WARNING
+        - message: Description; semantic messages carry their own label
+        - line: Line number in the source code, -1 when not tied to a place
+        - position: Column/character position in the line, -1 likewise
+    """
+    stage: str
+    severity: str
+    type: str
+    message: str
+    line: int
+    position: int
+
+
+# --- Diagnostics ---
+
+class Diagnostics:
+    """
+    Collector of the diagnostics of every stage, handed to `lexer`, `parser`
+    and `semantic_analyzer` through their `diagnostics` argument.
+
+    Records are kept per stage in source order: a record is inserted after
+    those at or before its position, so the usual in-order report is an
+    append, and records not tied to a place go last in the order reported.
+    Reading them back touches only the records, never the tokens.
+    """
+
+    STAGES = ('lexical', 'syntactic', 'semantic')
+
+    def __init__(self):
+        self.records = {stage: [] for stage in self.STAGES}
+        self.counts = {}
+
+    @staticmethod
+    def _order(record):
+        line = record['line']
+        return (line, record['position']) if line >= 0 else (math.inf, 0)
+
+    def add(self, stage, severity, type, message, line=-1, position=-1) -> Diagnostic:
+        """
+        Record a diagnostic and return it.
+        """
+        record = {'stage': stage, 'severity': severity, 'type': type, 'message': message,
+                  'line': line, 'position': position}
+        records = self.records[stage]
+        if records and self._order(record) < self._order(records[-1]):
+            bisect.insort_right(records, record, key=self._order)
+        else:
+            records.append(record)
+        self.counts[stage, severity] = self.counts.get((stage, severity), 0) + 1
+        return record
+
+    def select(self, stage=None, severity=None):
+        """
+        Lazily yield the records of `stage` (all stages when None) with the
+        given `severity` (any when None), in source order.
+        """
+        stages = self.STAGES if stage is None else (stage,)
+        records = heapq.merge(*(self.records[name] for name in stages), key=self._order)
+        return (record for record in records if severity is None or record['severity'] == severity)
+
+    def errors(self, stage=None):
+        """
+        Return the error records of `stage` (all stages when None).
+        """
+        return list(self.select(stage, 'error'))
+
+    def warnings(self, stage=None):
+        """
+        Return the warning records of `stage` (all stages when None).
+        """
+        return list(self.select(stage, 'warning'))
+
+    def has_errors(self, stage=None):
+        """
+        Return True if `stage` (any stage when None) reported an error.
+        """
+        stages = self.STAGES if stage is None else (stage,)
+        return any(self.counts.get((name, 'error')) for name in stages)
+
+    def __iter__(self):
+        return self.select()
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+
 # --- Symbol Table ---
 
 class SymbolTable:
@@ -43,10 +141,17 @@ class SymbolTable:
         - used: Whether the variable was ever used
         - initialized: Whether the variable was initialized before use
         - const: Whether the variable is constant (immutable)
+        - value: Folded constant value of the last assignment, when known
+
+    A function's scope is a table whose `parent` is the global one: lookups
+    and marks fall back to the parent for names not declared locally.
+    Function definitions are kept in the global table's `functions`.
     """
 
-    def __init__(self):
+    def __init__(self, parent=None):
         self.table = {}
+        self.parent = parent
+        self.functions = {}
 
     def insert(self, name, attributes: dict, errors: list):
         """
@@ -71,39 +176,87 @@ class SymbolTable:
         """
         Return the symbol attributes if declared, else None.
         """
-        return self.table.get(name)
+        entry = self.table.get(name)
+        if entry is None and self.parent is not None:
+            return self.parent.lookup(name)
+        return entry
+
+    def _owner(self, name):
+        """
+        Return the table in the scope chain that declares `name`, or None.
+        """
+        table = self
+        while table is not None and name not in table.table:
+            table = table.parent
+        return table
 
     def mark_used(self, name):
         """
         Mark a variable as used.
         """
-        if name in self.table:
-            self.table[name]['used'] = True
+        owner = self._owner(name)
+        if owner is not None:
+            owner.table[name]['used'] = True
 
     def mark_initialized(self, name):
         """
         Mark a variable as initialized.
         """
-        if name in self.table:
-            self.table[name]['initialized'] = True
+        owner = self._owner(name)
+        if owner is not None:
+            owner.table[name]['initialized'] = True
+
+    def set_value(self, name, value):
+        """
+        Record the constant value folded from a variable's last assignment.
+        """
+        owner = self._owner(name)
+        if owner is not None:
+            owner.table[name]['value'] = value
 
     def is_initialized(self, name):
         """
         Check if a variable is initialized.
         """
-        return self.table.get(name, {}).get('initialized', False)
+        return (self.lookup(name) or {}).get('initialized', False)
 
     def is_const(self, name):
         """
         Check if a variable is declared as constant.
         """
-        return self.table.get(name, {}).get('const', False)
+        return (self.lookup(name) or {}).get('const', False)
+
+    def declare_function(self, name, attributes: dict, errors: list):
+        """
+        Record a function definition or prototype in the global table.
+
+        Attributes: return_type, params ([(type, name)]), line, and for
+        definitions body ((line, position) of its '{') and scope (its table).
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        existing = root.functions.get(name)
+        if existing is not None and existing.get('body') and attributes.get('body'):
+            errors.append(f"Semantic Error: Redefinition of function '{name}'.")
+            return
+        if existing is None or attributes.get('body'):
+            root.functions[name] = attributes
+
+    def function(self, name):
+        """
+        Return the attributes of function `name` if declared, else None.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return root.functions.get(name)
 
     def undeclared_variables(self, used_symbols):
         """
         Return a list of symbols used but not declared.
         """
-        return [symbol for symbol in used_symbols if symbol not in self.table]
+        return [symbol for symbol in used_symbols if self.lookup(symbol) is None]
 
     def unused_variables(self):
         """
@@ -116,3 +269,137 @@ class SymbolTable:
         Return a copy of the current symbol table state (for diagnostics or reporting).
         """
         return {name: info.copy() for name, info in self.table.items()}
+
+
+# --- Bracket Index ---
+
+class BracketIndex:
+    """
+    Pairs every opening bracket with its closer in one linear pass.
+
+    Tokens are fed in order with their index in the stream. Afterwards:
+        - pairs: opener index -> index of its matching closer
+        - unmatched_closers: (index, token) of closers with no opener
+        - unmatched_openers(): (index, token) of openers never closed
+    """
+
+    def __init__(self):
+        self.pairs = {}
+        self.unmatched_closers = []
+        self._open = []
+
+    def add(self, index, token: Token):
+        """
+        Account for the token at `index`; anything but a bracket is ignored.
+        """
+        if token['type'] != 'PUNCTUATION':
+            return
+        value = token['token']
+        if value in BRACKET_PAIRS:
+            self._open.append((index, token))
+        elif value in CLOSING_BRACKETS:
+            if self._open and self._open[-1][1]['token'] == CLOSING_BRACKETS[value]:
+                self.pairs[self._open.pop()[0]] = index
+            else:
+                self.unmatched_closers.append((index, token))
+
+    def unmatched_openers(self):
+        """
+        Return the openers still waiting for a closer.
+        """
+        return list(self._open)
+
+
+# --- Token Stream ---
+
+MATCH_LOOKAHEAD = 10000  # tokens read ahead for a bracket's closer before giving up on it
+
+
+class TokenStream:
+    """
+    Index-addressable window over a (possibly lazy) sequence of tokens.
+
+    Tokens are pulled from the underlying iterator only when an index is
+    first accessed, so the parser can look ahead a few tokens without the
+    whole stream being materialized. Indices are absolute; `release` drops
+    everything before a committed position to keep the window small.
+
+    Every token entering the window also goes through `brackets`, so bracket
+    pairs are known as soon as their closer has been read. A list is used as
+    is, which indexes all of its brackets up front; its caller already holds
+    it whole, so released tokens are only hidden, never deleted.
+    """
+
+    def __init__(self, tokens):
+        self._buffer = []
+        self._offset = 0  # absolute index of self._buffer[0]
+        self._start = 0   # absolute index of the first token not released
+        self._owned = not isinstance(tokens, list)
+        self.brackets = BracketIndex()
+        if not self._owned:
+            self._buffer = tokens
+            for index, token in enumerate(tokens):
+                self.brackets.add(index, token)
+            tokens = ()
+        self._source = iter(tokens)
+
+    def _pull(self):
+        try:
+            token = next(self._source)
+        except StopIteration:
+            return False
+        self.brackets.add(self._offset + len(self._buffer), token)
+        self._buffer.append(token)
+        return True
+
+    def __getitem__(self, index):
+        if index < self._start:
+            raise IndexError(f"Token {index} was already released.")
+        relative = index - self._offset
+        while relative >= len(self._buffer):
+            if not self._pull():
+                raise IndexError(f"Token index {index} out of range.")
+        return self._buffer[relative]
+
+    def has(self, index):
+        """
+        Return True if a token exists at `index`, pulling from the source if needed.
+        """
+        try:
+            self[index]
+        except IndexError:
+            return False
+        return True
+
+    def matching(self, index):
+        """
+        Return the index of the bracket closing the one at `index`, or None
+        if it is not closed within MATCH_LOOKAHEAD tokens. Reads ahead only
+        as far as that closer; an opener left unmatched stays in `brackets`
+        and is paired later if its closer does stream in.
+        """
+        pairs = self.brackets.pairs
+        limit = index + MATCH_LOOKAHEAD
+        while index not in pairs and self._offset + len(self._buffer) <= limit and self._pull():
+            pass
+        return pairs.get(index)
+
+    def slice(self, start, end):
+        """
+        Return the buffered tokens in the absolute range [start, end).
+        """
+        return self._buffer[start - self._offset:end - self._offset]
+
+    def release(self, index):
+        """
+        Forget every token before `index`; they can no longer be accessed.
+        Pulled tokens are deleted once they outnumber the ones still held,
+        so each token is moved a bounded number of times.
+        """
+        if index <= self._start:
+            return
+        self._start = index
+        drop = index - self._offset
+        if self._owned and 2 * drop >= len(self._buffer):
+            del self._buffer[:drop]
+            self._offset = index
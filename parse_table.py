@@ -0,0 +1,215 @@
+# Generated by grammar.py from its GRAMMAR; do not edit.
+# Regenerate with `python grammar.py --write` after changing the grammar.
+
+LITERALS = frozenset(['!=', '(', ')', '*', '+', ',', '-', '/', ';', '<', '<=', '=', '==', '>', '>=', 'const',
+ 'if', 'return', 'void', 'while', '{', '}'])
+STATEMENTS = frozenset(['block_item', 'item'])
+START = {'block': 'block_item', 'file': 'item'}
+
+# (rule, ((kind, symbol), ...)) per alternative, in grammar order
+PRODUCTIONS = (('item', (('literal', 'return'), ('nonterminal', 'return_value'))),
+ ('item', (('literal', 'if'), ('nonterminal', 'control'))),
+ ('item', (('literal', 'while'), ('nonterminal', 'control'))),
+ ('item', (('literal', 'const'), ('nonterminal', 'const_declaration'))),
+ ('item', (('type', 'KEYWORD'), ('action', 'type'), ('nonterminal', 'declarator_or_function'))),
+ ('item', (('type', 'IDENTIFIER'), ('nonterminal', 'identifier_statement'))),
+ ('block_item', (('literal', 'return'), ('nonterminal', 'return_value'))),
+ ('block_item', (('literal', 'if'), ('nonterminal', 'control'))),
+ ('block_item', (('literal', 'while'), ('nonterminal', 'control'))),
+ ('block_item', (('literal', 'const'), ('nonterminal', 'const_declaration'))),
+ ('block_item', (('type', 'KEYWORD'), ('action', 'type'), ('nonterminal', 'declarator'))),
+ ('block_item', (('type', 'IDENTIFIER'), ('nonterminal', 'identifier_statement'))),
+ ('block', (('literal', '}'),)),
+ ('block', (('end', '$'),)),
+ ('block', (('nonterminal', 'block_item'), ('action', 'commit'), ('nonterminal', 'block'))),
+ ('return_value', (('nonterminal', 'expression'), ('literal', ';'))),
+ ('control',
+  (('literal', '('),
+   ('nonterminal', 'expression'),
+   ('literal', ')'),
+   ('literal', '{'),
+   ('nonterminal', 'block'))),
+ ('const_declaration', (('type', 'KEYWORD'), ('action', 'const_type'), ('nonterminal', 'declarator'))),
+ ('declarator', (('type', 'IDENTIFIER'), ('action', 'name'), ('nonterminal', 'declaration'))),
+ ('declaration', (('nonterminal', 'initializer'), ('action', 'declare'), ('nonterminal', 'declaration_end'))),
+ ('initializer', (('literal', '='), ('nonterminal', 'expression'), ('action', 'initialized'))),
+ ('initializer', ()),
+ ('declaration_end', (('literal', ','), ('nonterminal', 'declarator'))),
+ ('declaration_end', (('literal', ';'),)),
+ ('identifier_statement', (('literal', '='), ('nonterminal', 'assignment'))),
+ ('identifier_statement', (('literal', '('), ('nonterminal', 'call_arguments'))),
+ ('assignment', (('nonterminal', 'expression'), ('literal', ';'))),
+ ('call_arguments', (('literal', ')'), ('nonterminal', 'call_end'))),
+ ('call_arguments', (('nonterminal', 'expression'), ('nonterminal', 'call_more'))),
+ ('call_more', (('literal', ','), ('nonterminal', 'call_arguments'))),
+ ('call_more', (('literal', ')'), ('nonterminal', 'call_end'))),
+ ('call_end', (('literal', ';'),)),
+ ('declarator_or_function',
+  (('type', 'IDENTIFIER'), ('action', 'name'), ('nonterminal', 'function_or_declaration'))),
+ ('function_or_declaration',
+  (('literal', '('),
+   ('action', 'function'),
+   ('nonterminal', 'parameters'),
+   ('nonterminal', 'function_body'))),
+ ('function_or_declaration', (('nonterminal', 'declaration'),)),
+ ('parameters', (('literal', ')'),)),
+ ('parameters', (('literal', 'void'), ('nonterminal', 'void_parameters'))),
+ ('parameters', (('nonterminal', 'parameter'),)),
+ ('void_parameters', (('literal', ')'),)),
+ ('void_parameters', (('type', 'IDENTIFIER'), ('action', 'parameter'), ('nonterminal', 'more_parameters'))),
+ ('parameter',
+  (('literal', 'const'),
+   ('action', 'const_parameter'),
+   ('type', 'KEYWORD'),
+   ('type', 'IDENTIFIER'),
+   ('action', 'parameter'),
+   ('nonterminal', 'more_parameters'))),
+ ('parameter',
+  (('type', 'KEYWORD'), ('type', 'IDENTIFIER'), ('action', 'parameter'), ('nonterminal', 'more_parameters'))),
+ ('more_parameters', (('literal', ')'),)),
+ ('more_parameters', (('literal', ','), ('nonterminal', 'parameter'))),
+ ('function_body', (('literal', ';'), ('action', 'prototype'))),
+ ('function_body',
+  (('literal', '{'), ('action', 'enter_function'), ('nonterminal', 'block'), ('action', 'leave_function'))),
+ ('expression', (('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '<'), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '<='), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '>'), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '>='), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '=='), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', (('literal', '!='), ('nonterminal', 'additive'), ('nonterminal', 'comparison'))),
+ ('comparison', ()),
+ ('additive', (('nonterminal', 'term'), ('nonterminal', 'more_terms'))),
+ ('more_terms', (('literal', '+'), ('nonterminal', 'term'), ('nonterminal', 'more_terms'))),
+ ('more_terms', (('literal', '-'), ('nonterminal', 'term'), ('nonterminal', 'more_terms'))),
+ ('more_terms', ()),
+ ('term', (('nonterminal', 'primary'), ('nonterminal', 'more_factors'))),
+ ('more_factors', (('literal', '*'), ('nonterminal', 'primary'), ('nonterminal', 'more_factors'))),
+ ('more_factors', (('literal', '/'), ('nonterminal', 'primary'), ('nonterminal', 'more_factors'))),
+ ('more_factors', ()),
+ ('primary', (('type', 'IDENTIFIER'), ('nonterminal', 'call'))),
+ ('primary', (('type', 'NUMBER'),)),
+ ('primary', (('literal', '('), ('nonterminal', 'expression'), ('literal', ')'))),
+ ('call', (('literal', '('), ('nonterminal', 'arguments'))),
+ ('call', ()),
+ ('arguments', (('literal', ')'),)),
+ ('arguments', (('nonterminal', 'expression'), ('nonterminal', 'more_arguments'))),
+ ('more_arguments', (('literal', ')'),)),
+ ('more_arguments', (('literal', ','), ('nonterminal', 'expression'), ('nonterminal', 'more_arguments'))))
+
+# rule -> {lookahead terminal: alternative}
+TABLE = {'additive': {'(': 54, 'IDENTIFIER': 54, 'NUMBER': 54},
+ 'arguments': {'(': 68, ')': 67, 'IDENTIFIER': 68, 'NUMBER': 68},
+ 'assignment': {'(': 26, 'IDENTIFIER': 26, 'NUMBER': 26},
+ 'block': {'$': 13,
+           'IDENTIFIER': 14,
+           'KEYWORD': 14,
+           'const': 14,
+           'if': 14,
+           'return': 14,
+           'while': 14,
+           '}': 12},
+ 'block_item': {'IDENTIFIER': 11, 'KEYWORD': 10, 'const': 9, 'if': 7, 'return': 6, 'while': 8},
+ 'call': {'!=': 66,
+          '(': 65,
+          ')': 66,
+          '*': 66,
+          '+': 66,
+          ',': 66,
+          '-': 66,
+          '/': 66,
+          ';': 66,
+          '<': 66,
+          '<=': 66,
+          '==': 66,
+          '>': 66,
+          '>=': 66},
+ 'call_arguments': {'(': 28, ')': 27, 'IDENTIFIER': 28, 'NUMBER': 28},
+ 'call_end': {';': 31},
+ 'call_more': {')': 30, ',': 29},
+ 'comparison': {'!=': 52, ')': 53, ',': 53, ';': 53, '<': 47, '<=': 48, '==': 51, '>': 49, '>=': 50},
+ 'const_declaration': {'KEYWORD': 17},
+ 'control': {'(': 16},
+ 'declaration': {',': 19, ';': 19, '=': 19},
+ 'declaration_end': {',': 22, ';': 23},
+ 'declarator': {'IDENTIFIER': 18},
+ 'declarator_or_function': {'IDENTIFIER': 32},
+ 'expression': {'(': 46, 'IDENTIFIER': 46, 'NUMBER': 46},
+ 'function_body': {';': 44, '{': 45},
+ 'function_or_declaration': {'(': 33, ',': 34, ';': 34, '=': 34},
+ 'identifier_statement': {'(': 25, '=': 24},
+ 'initializer': {',': 21, ';': 21, '=': 20},
+ 'item': {'IDENTIFIER': 5, 'KEYWORD': 4, 'const': 3, 'if': 1, 'return': 0, 'while': 2},
+ 'more_arguments': {')': 69, ',': 70},
+ 'more_factors': {'!=': 61,
+                  ')': 61,
+                  '*': 59,
+                  '+': 61,
+                  ',': 61,
+                  '-': 61,
+                  '/': 60,
+                  ';': 61,
+                  '<': 61,
+                  '<=': 61,
+                  '==': 61,
+                  '>': 61,
+                  '>=': 61},
+ 'more_parameters': {')': 42, ',': 43},
+ 'more_terms': {'!=': 57,
+                ')': 57,
+                '+': 55,
+                ',': 57,
+                '-': 56,
+                ';': 57,
+                '<': 57,
+                '<=': 57,
+                '==': 57,
+                '>': 57,
+                '>=': 57},
+ 'parameter': {'KEYWORD': 41, 'const': 40},
+ 'parameters': {')': 35, 'KEYWORD': 37, 'const': 37, 'void': 36},
+ 'primary': {'(': 64, 'IDENTIFIER': 62, 'NUMBER': 63},
+ 'return_value': {'(': 15, 'IDENTIFIER': 15, 'NUMBER': 15},
+ 'term': {'(': 58, 'IDENTIFIER': 58, 'NUMBER': 58},
+ 'void_parameters': {')': 38, 'IDENTIFIER': 39}}
+
+# rule -> alternative taken when the lookahead has no entry
+DEFAULTS = {'additive': 54,
+ 'assignment': 26,
+ 'block': 14,
+ 'call': 66,
+ 'call_end': 31,
+ 'comparison': 53,
+ 'const_declaration': 17,
+ 'control': 16,
+ 'declaration': 19,
+ 'declarator': 18,
+ 'declarator_or_function': 32,
+ 'expression': 46,
+ 'function_or_declaration': 34,
+ 'initializer': 21,
+ 'more_factors': 61,
+ 'more_terms': 57,
+ 'return_value': 15,
+ 'term': 58}
+
+# rule -> syntax error message
+ERRORS = {'assignment': 'Invalid assignment statement',
+ 'block_item': "Unexpected token '{token}'",
+ 'call_arguments': 'Invalid function call arguments',
+ 'call_end': "Expected ';' after function call",
+ 'call_more': "Expected ',' or ')' in function call",
+ 'const_declaration': "Expected type after 'const'",
+ 'control': 'Invalid control structure syntax',
+ 'declaration_end': "Expected ';' after declaration",
+ 'declarator': 'Expected variable name after type',
+ 'declarator_or_function': 'Expected variable name after type',
+ 'function_body': "Expected '{' or ';' after function declarator",
+ 'identifier_statement': "Unexpected token '{first}'",
+ 'initializer': 'Invalid assignment expression',
+ 'item': "Unexpected token '{token}'",
+ 'more_parameters': "Expected ',' or ')' in parameter list",
+ 'parameter': 'Invalid parameter declaration',
+ 'parameters': 'Invalid parameter declaration',
+ 'return_value': 'Invalid return statement syntax',
+ 'void_parameters': 'Invalid parameter declaration'}
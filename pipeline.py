@@ -0,0 +1,55 @@
+from lexical_analysis import iter_tokens
+from syntactic_analysis import parser
+from semantic_analysis import SemanticAnalyzer
+from objects import SymbolTable
+
+
+def fused_analysis(code, on_diagnostic=None, config=None, diagnostics=None):
+    """
+    Run lexing, parsing and semantic analysis as one streaming pass.
+
+    The parser pulls tokens from the lexer on demand, and every statement it
+    reduces is handed straight to the semantic analyzer, so only the current
+    statement is ever buffered. `on_diagnostic(stage, diagnostic)` is called
+    as soon as each problem is found, with stage one of 'lexical',
+    'syntactic' or 'semantic'. `config` is passed to the semantic analyzer.
+    With a `Diagnostics` collector every stage also records there, and
+    lexical errors are kept out of the token stream the parser reads.
+
+    Unlike the three-call API, semantic checks see the symbol table as it was
+    when each statement was reduced, so a variable read before its later
+    declaration is reported as used before initialization.
+
+    Returns:
+        (lex_errors, (valid, symbol_table, parse_errors),
+         (is_valid, semantic_errors, warnings, symbol_table_snapshot))
+    """
+    def report(stage, diagnostics):
+        if on_diagnostic is not None:
+            for diagnostic in diagnostics:
+                on_diagnostic(stage, diagnostic)
+
+    lex_errors = []
+
+    def tokens():
+        for token in iter_tokens(code):
+            if token['type'] == 'LEXICAL ERROR':
+                lex_errors.append(token)
+                report('lexical', [token])
+                if diagnostics is not None:
+                    diagnostics.add('lexical', 'error', token['type'], token['message'], token['line'], token['position'])
+                    continue
+            yield token
+
+    symbol_table = SymbolTable()
+    analyzer = SemanticAnalyzer(symbol_table, config, diagnostics)
+
+    def on_statement(chunk, parse_errors):
+        report('syntactic', parse_errors)
+        report('semantic', analyzer.feed(chunk))
+
+    valid, symbol_table, parse_errors = parser(tokens(), on_statement, symbol_table, diagnostics)
+    finished = len(analyzer.errors)
+    semantic_result = analyzer.finish()
+    report('semantic', semantic_result[1][finished:])
+    return lex_errors, (valid, symbol_table, parse_errors), semantic_result
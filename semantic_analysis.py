@@ -1,133 +1,730 @@
+from time import perf_counter
 from objects import Token, SymbolTable
+from control_flow import (ControlFlowGraph, FlowState, build_statements, uninitialized_reads, dead_stores,
+                          unreachable_statements)
+
+# Top-level statements are handed to the flow rules in batches of at least
+# this many tokens, which bounds what the analyzer keeps of its input
+FLOW_BATCH = 256
+
+# Arithmetic types by conversion rank
+ARITHMETIC_RANKS = {'char': 0, 'short': 1, 'int': 2, 'long': 3, 'float': 4, 'double': 5}
+INTEGER_TYPES = {'char', 'short', 'int', 'long'}
+
+# Binary operators by precedence; two-character ones arrive as two tokens
+BINARY_PRECEDENCE = {
+    '||': 1, '&&': 2, '|': 3, '&': 4,
+    '==': 5, '!=': 5,
+    '<': 6, '>': 6, '<=': 6, '>=': 6,
+    '+': 7, '-': 7,
+    '*': 8, '/': 8,
+}
+COMPARISON_OPERATORS = {'==', '!=', '<', '>', '<=', '>=', '||', '&&'}
+
 
 def can_assign(to_type, from_type):
     """
     Determine if a value of `from_type` can be assigned to a variable of `to_type`.
     - Allows exact matches (e.g., int → int)
-    - Allows promotion from int to float
+    - Allows widening between arithmetic types (e.g., char → int, int → float)
     - All other combinations are considered invalid
     """
     if to_type == from_type:
         return True
-    if to_type == 'float' and from_type == 'int':
-        return True  # Allow promotion
+    if to_type in ARITHMETIC_RANKS and from_type in ARITHMETIC_RANKS:
+        return ARITHMETIC_RANKS[from_type] <= ARITHMETIC_RANKS[to_type]  # Allow promotion
     return False  # Disallow all other combinations
 
-def semantic_analyzer(tokens: list[Token], symbol_table: SymbolTable):
+
+def common_type(left, right):
+    """
+    Result type of a binary arithmetic operation under C's usual arithmetic
+    conversions: integer operands are promoted to at least int, then the
+    operand of lower rank converts to the other's type.
+    """
+    left = 'int' if ARITHMETIC_RANKS[left] < ARITHMETIC_RANKS['int'] else left
+    right = 'int' if ARITHMETIC_RANKS[right] < ARITHMETIC_RANKS['int'] else right
+    return left if ARITHMETIC_RANKS[left] >= ARITHMETIC_RANKS[right] else right
+
+
+class ExpressionError(Exception):
+    """
+    Raised while evaluating an expression to report its single diagnostic.
+    """
+
+
+# --- Rule registry ---
+
+class SemanticRule:
+    """
+    A semantic check run by `SemanticAnalyzer`.
+
+    Fields:
+        - name: Unique rule name, used to enable/disable it in the config
+        - kinds: Event kinds the rule is dispatched on; either a token type
+          (e.g. 'IDENTIFIER') or one of the analyzer events:
+            'assignment_start' (target, declaration), 'assignment' (target,
+            entry, type, value, error), 'assignment_end' (target,
+            declaration), 'read' (name, entry),
+            'flow' (tokens, cfg, state: the tokens, ControlFlowGraph and
+            FlowState of the next top-level statements, handed over once
+            they end and hold FLOW_BATCH tokens, or at the end of input),
+            'program' (tokens, cfg: the ControlFlowGraph of the whole input), 'end'
+
+          Only 'program' rules keep the whole input in memory.
+        - check: Function (analyzer, event) returning messages, or None
+        - severity: 'error' or 'warning'
+    """
+
+    def __init__(self, name, kinds, check, severity='error'):
+        self.name = name
+        self.kinds = tuple(kinds)
+        self.check = check
+        self.severity = severity
+
+
+RULES = {}
+DISABLED_BY_DEFAULT = set()
+
+
+def register_rule(name, *kinds, severity='error', enabled=True):
+    """
+    Decorator registering `check(analyzer, event)` as a semantic rule for
+    the given event kinds. Rules registered with `enabled=False` only run
+    when the analyzer config turns them on.
+    """
+    def decorator(check):
+        RULES[name] = SemanticRule(name, kinds, check, severity)
+        if not enabled:
+            DISABLED_BY_DEFAULT.add(name)
+        return check
+    return decorator
+
+
+def build_dispatch(config=None):
+    """
+    Return {event kind: [rules]} for the rules enabled by `config`, a
+    mapping of rule name to bool; unlisted rules keep their default.
+    """
+    config = config or {}
+    dispatch = {}
+    for name, rule in RULES.items():
+        if config.get(name, name not in DISABLED_BY_DEFAULT):
+            for kind in rule.kinds:
+                dispatch.setdefault(kind, []).append(rule)
+    return dispatch
+
+
+# --- Built-in rules ---
+
+@register_rule('const-assignment', 'assignment_start', 'assignment_end')
+def check_const_assignment(analyzer, event):
+    target = event['target']
+    if target and not event['declaration'] and analyzer.symbol_table.is_const(target):
+        if event['kind'] == 'assignment_start':
+            return [f"Semantic Error: Assignment to constant variable '{target}'."]
+        return [f"Semantic Error: Cannot assign to constant variable '{target}'."]
+
+
+@register_rule('invalid-expression', 'assignment')
+def check_invalid_expression(analyzer, event):
+    if event['error']:
+        target = event['target']
+        return [f"Semantic Error: {event['error']}" + (f" in assignment to '{target}'." if target else ".")]
+
+
+@register_rule('type-mismatch', 'assignment')
+def check_type_mismatch(analyzer, event):
+    entry, rhs_type = event['entry'], event['type']
+    if entry and rhs_type is not None and not can_assign(entry.get('type'), rhs_type):
+        return [
+            f"Semantic Error: Type mismatch — cannot assign {rhs_type} expression "
+            f"to '{event['target']}' of type '{entry.get('type')}'."
+        ]
+
+
+@register_rule('use-before-init', 'read')
+def check_use_before_init(analyzer, event):
+    entry = event['entry']
+    if not (entry and entry.get('initialized')):
+        return [f"Semantic Error: Variable '{event['name']}' used before initialization."]
+
+
+@register_rule('maybe-uninitialized', 'flow')
+def check_maybe_uninitialized(analyzer, event):
+    # Assigned on some paths only, e.g. inside an `if`; reads with no
+    # assignment before them in source order are left to use-before-init
+    messages, seen = [], set()
+    for read in uninitialized_reads(event['cfg'], event['state']):
+        name, line = read['name'], read['line']
+        if (read['possibly'] and not read['definitely'] and read['earlier']
+                and analyzer.symbol_table.lookup(name) and (name, line) not in seen):
+            seen.add((name, line))
+            messages.append(f"Semantic Error: Variable '{name}' may be used before initialization at line {line}.")
+    return messages
+
+
+@register_rule('unused-value', 'program', severity='warning', enabled=False)
+def check_unused_value(analyzer, event):
+    cfg = event['cfg']
+    read = {name for block in cfg.blocks for statement in block.statements
+            for action, name, _ in statement.effects if action == 'read'}
+    # Variables never read at all are reported by unused-variable
+    return [f"Warning: Value assigned to '{name}' at line {line} is never used."
+            for name, line in dead_stores(cfg) if name in read]
+
+
+@register_rule('unreachable-code', 'program', severity='warning', enabled=False)
+def check_unreachable_code(analyzer, event):
+    return [f"Warning: Unreachable code at line {statement.line}."
+            for statement in unreachable_statements(event['cfg'])]
+
+
+@register_rule('undeclared-variable', 'end')
+def check_undeclared(analyzer, event):
+    return [f"Semantic Error: Variable '{symbol}' not declared."
+            for symbol in analyzer.symbol_table.undeclared_variables(analyzer.used_symbols)]
+
+
+@register_rule('unused-variable', 'end', severity='warning')
+def check_unused(analyzer, event):
+    return [f"Warning: Variable '{symbol}' declared but never used."
+            for symbol in analyzer.symbol_table.unused_variables()]
+
+
+def semantic_analyzer(tokens: list[Token], symbol_table: SymbolTable, config=None, diagnostics=None):
     """
     Perform semantic analysis on a stream of tokens using a given symbol table.
-    Checks for:
+    Checks for (see the built-in rules above):
     - Assignment to `const` variables
     - Type compatibility in assignments
-    - Use-before-initialization
+    - Use-before-initialization, and use of variables only assigned on
+      some control-flow paths
     - Use of undeclared variables
     - Declared but unused variables (as warnings)
+    - Opt-in: values never read and unreachable code (as warnings)
+
+    `config` maps rule names to True/False to enable or disable them.
+    Diagnostics are also recorded in `diagnostics`, a `Diagnostics`
+    collector, if given.
 
     Returns:
         (is_valid: bool, errors: list[str], warnings: list[str], symbol_table_snapshot: dict)
     """
-    errors = []
-    warnings = []
-    has_error = False
-
-    used_symbols = set()          # Track all used identifiers
-    is_rhs = False                # Flag: inside the right-hand side of an assignment
-    assignment_target = None      # Current left-hand-side variable being assigned to
-
-    for i, token in enumerate(tokens):
-
-        # Detect assignment operator
-        if token['type'] == 'OPERATOR' and token['token'] == '=':
-            is_rhs = True
-            # Check for identifier immediately before '=' to determine assignment target
-            if i > 0 and tokens[i - 1]['type'] == 'IDENTIFIER':
-                assignment_target = tokens[i - 1]['token']
-
-                # Error: assignment to const variable
-                if symbol_table.is_const(assignment_target):
-                    errors.append(f"Semantic Error: Assignment to constant variable '{assignment_target}'.")
-                    has_error = True
-
-        # Handle literals (numbers) in RHS
-        elif token['type'] == 'NUMBER' and is_rhs and assignment_target:
-            rhs_type = 'float' if '.' in token['token'] else 'int'
-            declared_entry = symbol_table.lookup(assignment_target)
-
-            if declared_entry:
-                lhs_type = declared_entry.get('type')
-                if not can_assign(lhs_type, rhs_type):
-                    errors.append(f"Semantic Error: Cannot assign {rhs_type} to {lhs_type} variable '{assignment_target}'.")
-                    has_error = True
-
-        # Statement end; finalize assignment
-        elif token['type'] == 'PUNCTUATION' and token['token'] == ';':
-            if assignment_target:
-                if symbol_table.is_const(assignment_target):
-                    errors.append(f"Semantic Error: Cannot assign to constant variable '{assignment_target}'.")
-                    has_error = True
+    analyzer = SemanticAnalyzer(symbol_table, config, diagnostics)
+    analyzer.feed(tokens)
+    return analyzer.finish()
+
+
+class SemanticAnalyzer:
+    """
+    Incremental form of `semantic_analyzer`.
+
+    Tokens may be fed in any number of consecutive chunks (e.g. one per
+    statement reduced by the parser); the state carried between chunks is
+    the same the single-pass analysis keeps between tokens.
+
+    The right-hand side of each assignment is collected up to its end and
+    evaluated once: its type follows C's usual arithmetic conversions,
+    constant subexpressions are folded, and at most one type diagnostic is
+    reported per expression.
+
+    The checks themselves are the registered rules; the traversal raises
+    events and runs the rules found in a dispatch table built once from
+    `config`. With `config['profile']` set, the time spent in each rule is
+    accumulated in `timings`.
+
+    Diagnostics also go to the `diagnostics` collector, when given, placed
+    at the token they were raised on, or at the start of the assignment
+    for the checks of an assignment; end-of-input checks have no place.
+    """
+
+    def __init__(self, symbol_table: SymbolTable, config=None, diagnostics=None):
+        self.symbol_table = symbol_table
+        self.errors = []
+        self.warnings = []
+        self.has_error = False
+        self.dispatch = build_dispatch(config)
+        self.timings = {} if config and config.get('profile') else None
+        self.tokens = [] if 'program' in self.dispatch else None  # kept for whole-program rules
+        self.statements = [] if 'flow' in self.dispatch else None  # next top-level statements, for flow rules
+        self.statement_depth = 0        # Brace nesting inside them
+        self.preprocessor_line = -1     # Line of the last directive, whose ';' ends no statement
+        self.flow = FlowState()
+        self.config = config
+        self.diagnostics = diagnostics
+        self.function = None            # Analyzer of the function body being read
+        self.function_depth = 0         # Brace nesting inside that body
+        self.function_merged = (0, 0)   # Its errors and warnings merged so far
+
+        self.used_symbols = set()       # Track all used identifiers
+        self.is_rhs = False             # Flag: inside the right-hand side of an assignment
+        self.assignment_target = None   # Current left-hand-side variable being assigned to
+        self.assignment_start = None    # Token the current assignment starts at
+        self.declaring = False          # Inside a declaration statement
+        self.declaration = False        # The current assignment initializes a declared variable
+        self.previous = None            # Last token seen, possibly from the previous chunk
+        self.rhs = []                   # Tokens of the right-hand side read so far
+        self.depth = 0                  # Bracket nesting inside the right-hand side
+
+    def emit(self, kind, event):
+        """
+        Run every enabled rule registered for `kind` on `event`.
+        """
+        rules = self.dispatch.get(kind)
+        if not rules:
+            return
+        event['kind'] = kind
+        for rule in rules:
+            if self.timings is None:
+                messages = rule.check(self, event)
+            else:
+                start = perf_counter()
+                messages = rule.check(self, event)
+                self.timings[rule.name] = self.timings.get(rule.name, 0.0) + perf_counter() - start
+            if messages:
+                if rule.severity == 'error':
+                    self.errors.extend(messages)
+                    self.has_error = True
                 else:
-                    symbol_table.mark_initialized(assignment_target)
-            is_rhs = False
-            assignment_target = None
-
-        # Handle identifiers in RHS (e.g., x = y)
-        elif is_rhs and token['type'] == 'IDENTIFIER':
-            used_symbols.add(token['token'])
-            symbol_table.mark_used(token['token'])
-
-            # Error: use-before-initialization
-            if not symbol_table.is_initialized(token['token']):
-                errors.append(f"Semantic Error: Variable '{token['token']}' used before initialization.")
-                has_error = True
-
-            # Check type compatibility between identifiers
-            if assignment_target:
-                lhs = symbol_table.lookup(assignment_target)
-                rhs = symbol_table.lookup(token['token'])
-
-                if lhs and rhs:
-                    lhs_type = lhs.get('type')
-                    rhs_type = rhs.get('type')
-                    if not can_assign(lhs_type, rhs_type):
-                        errors.append(
-                            f"Semantic Error: Type mismatch — cannot assign variable '{token['token']}' "
-                            f"of type '{rhs_type}' to '{assignment_target}' of type '{lhs_type}'."
-                        )
-                        has_error = True
-
-        # Handle literals like string, char in RHS
-        elif is_rhs and token['type'] in {'NUMBER', 'STRING', 'CHAR'}:
-            if assignment_target:
-                lhs = symbol_table.lookup(assignment_target)
-                if lhs:
-                    lhs_type = lhs.get('type')
-
-                    # Determine literal type
-                    if token['type'] == 'NUMBER':
-                        rhs_type = 'float' if '.' in token['token'] else 'int'
-                    elif token['type'] == 'STRING':
-                        rhs_type = 'string'
-                    elif token['type'] == 'CHAR':
-                        rhs_type = 'char'
+                    self.warnings.extend(messages)
+                if self.diagnostics is not None:
+                    self.collect(kind, event, rule.severity, messages)
+
+    def collect(self, kind, event, severity, messages):
+        """
+        Record `messages` raised on `event` in the diagnostics collector.
+        """
+        at = event.get('token') or (None if kind in ('flow', 'program', 'end') else self.assignment_start)
+        for message in messages:
+            self.diagnostics.add('semantic', severity, 'SEMANTIC_ERROR' if severity == 'error' else 'WARNING',
+                                 message, at['line'] if at else -1, at['position'] if at else -1)
+
+    def feed(self, tokens: list[Token]):
+        """
+        Analyze the next chunk of tokens. Returns the errors it produced.
+
+        The body of every function definition recorded by the parser is
+        handed to a nested analyzer over the function's scope, whose
+        diagnostics are merged in as they are found.
+        """
+        first_error = len(self.errors)
+        if self.function is None and not self.symbol_table.functions:
+            self.analyze(tokens)
+            return self.errors[first_error:]
+
+        tokens = list(tokens)
+        i = 0
+        while i < len(tokens):
+            if self.function is not None:
+                # Up to the '}' closing the body
+                end = i
+                while end < len(tokens):
+                    if tokens[end]['type'] == 'PUNCTUATION' and tokens[end]['token'] in {'{', '}'}:
+                        if tokens[end]['token'] == '{':
+                            self.function_depth += 1
+                        elif self.function_depth == 0:
+                            break
+                        else:
+                            self.function_depth -= 1
+                    end += 1
+                self.function.feed(tokens[i:end])
+                self.merge_function()
+                if end < len(tokens):
+                    self.leave_function(tokens[end])
+                    end += 1
+                i = end
+            else:
+                # Up to the '{' opening the next function body
+                start, attributes = i, None
+                while start < len(tokens):
+                    if tokens[start]['token'] == '{' and tokens[start]['type'] == 'PUNCTUATION':
+                        attributes = self.function_bodies().get((tokens[start]['line'], tokens[start]['position']))
+                        if attributes is not None:
+                            break
+                    start += 1
+                self.analyze(tokens[i:start])
+                if attributes is not None:
+                    self.enter_function(attributes, tokens[start])
+                    start += 1
+                i = start
+        return self.errors[first_error:]
+
+    def function_bodies(self):
+        """
+        Map the (line, position) of each function body's '{' to its attributes.
+        """
+        return {attributes['body']: attributes for attributes in self.symbol_table.functions.values()
+                if attributes.get('body')}
+
+    def enter_function(self, attributes, opener):
+        """
+        Start analyzing a function body in its own scope. Whole-program rules
+        of this scope only see the body's braces.
+        """
+        self.keep([opener])
+        self.function = SemanticAnalyzer(attributes['scope'], self.config, self.diagnostics)
+        self.function_depth = 0
+        self.function_merged = (0, 0)
+
+    def merge_function(self):
+        """
+        Take over the diagnostics the function analyzer produced since the last merge.
+        """
+        nested = self.function
+        errors, warnings = self.function_merged
+        self.errors.extend(nested.errors[errors:])
+        self.warnings.extend(nested.warnings[warnings:])
+        self.has_error = self.has_error or nested.has_error
+        self.function_merged = (len(nested.errors), len(nested.warnings))
+
+    def leave_function(self, closer=None):
+        """
+        Run the function's end-of-scope checks and return to the enclosing scope.
+        """
+        if closer is not None:
+            self.keep([closer])
+        self.function.finish()
+        self.merge_function()
+        if self.timings is not None:
+            for name, seconds in self.function.timings.items():
+                self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.function = None
+
+    def analyze(self, tokens: list[Token]):
+        """
+        Run the checks over tokens of the current scope.
+        """
+        dispatch = self.dispatch
+
+        for i, token in enumerate(tokens):
+            kind, text = token['type'], token['token']
+            if kind in dispatch:
+                self.emit(kind, {'token': token})
+            # `==` is lexed as two '=': the first one is not an assignment
+            comparison = text == '=' and i + 1 < len(tokens) and tokens[i + 1]['token'] == '='
+
+            if self.is_rhs:
+                # End of the right-hand side: evaluate it
+                if kind == 'PUNCTUATION' and (text in {';', '{', '}'} or
+                                              (text in {',', ')'} and self.depth == 0)):
+                    self.end_assignment()
+
+                elif kind == 'OPERATOR' and text == '=' and not comparison:
+                    if self.previous['type'] == 'IDENTIFIER' and self.rhs and self.rhs[-1] is self.previous:
+                        # Chained assignment: the identifier is the next target
+                        self.rhs.pop()
+                        if self.rhs:
+                            self.evaluate_rhs()
+                        self.rhs = []
+                        self.depth = 0
+                        self.begin_assignment(self.previous['token'], self.previous)
                     else:
-                        rhs_type = 'unknown'
+                        self.rhs.append(token)  # second half of <=, >=, !=, ==
+
+                else:
+                    if kind == 'PUNCTUATION' and text in {'(', '['}:
+                        self.depth += 1
+                    elif kind == 'PUNCTUATION' and text in {')', ']'}:
+                        self.depth -= 1
+                    self.rhs.append(token)
+
+            # Detect assignment operator
+            elif kind == 'KEYWORD' and (text in ARITHMETIC_RANKS or text == 'const'):
+                self.declaring = True
+
+            elif kind == 'OPERATOR' and text == '=' and not comparison:
+                # Check for identifier immediately before '=' to determine assignment target
+                if self.previous is not None and self.previous['type'] == 'IDENTIFIER':
+                    self.begin_assignment(self.previous['token'], self.previous)
+                elif self.previous is None or self.previous['token'] not in {'<', '>', '!', '='}:
+                    self.begin_assignment(None, token)
+
+            # The returned expression is checked like a right-hand side
+            elif kind == 'KEYWORD' and text == 'return':
+                self.begin_assignment(None, token)
+
+            if kind == 'PUNCTUATION' and text in {';', '{', '}'}:
+                self.declaring = False
+            self.previous = token
+        self.keep(tokens)
+
+    def keep(self, tokens):
+        """
+        Keep `tokens` for the flow rules: in the whole input for the
+        'program' rules, and in the next top-level statements for the
+        'flow' rules, which run on a batch as soon as its last statement ends.
+        """
+        if self.tokens is not None:
+            self.tokens.extend(tokens)
+        if self.statements is None:
+            return
+        for token in tokens:
+            self.statements.append(token)
+            text = token['token']
+            if text == '{':
+                self.statement_depth += 1
+            elif text == '}':
+                self.statement_depth = max(self.statement_depth - 1, 0)
+            elif (text == ';' and not self.statement_depth and len(self.statements) >= FLOW_BATCH
+                  and token['line'] != self.preprocessor_line):
+                self.end_statements()
+            elif token['type'] == 'PREPROCESSOR':
+                self.preprocessor_line = token['line']
+
+    def end_statements(self):
+        """
+        Run the flow rules on the top-level statements read so far.
+        """
+        tokens, self.statements = self.statements, []
+        statements = build_statements(tokens)
+        if statements:
+            self.emit('flow', {'tokens': tokens, 'cfg': ControlFlowGraph(statements), 'state': self.flow})
+
+    def begin_assignment(self, target, start=None):
+        """
+        Start collecting the right-hand side of an assignment to `target`
+        that starts at the token `start`.
+        """
+        self.is_rhs = True
+        self.assignment_target = target
+        self.assignment_start = start
+        self.declaration = self.declaring and target is not None
+        self.emit('assignment_start', {'target': target, 'declaration': self.declaration})
+
+    def end_assignment(self):
+        """
+        Evaluate the collected right-hand side and finalize the assignment.
+        """
+        target = self.assignment_target
+        self.evaluate_rhs()
+        self.emit('assignment_end', {'target': target, 'declaration': self.declaration})
+        if target and not self.symbol_table.is_const(target):
+            self.symbol_table.mark_initialized(target)
+        self.is_rhs = False
+        self.assignment_target = None
+        self.rhs = []
+        self.depth = 0
+
+    def evaluate_rhs(self):
+        """
+        Infer the type of the collected right-hand side, fold it if constant
+        and raise the 'assignment' and 'read' events for it.
+        """
+        target = self.assignment_target
+        evaluator = ExpressionEvaluator(self.rhs, self.symbol_table)
+        error = None
+        try:
+            rhs_type, value = evaluator.evaluate()
+        except ExpressionError as e:
+            rhs_type, value, error = None, None, e
+
+        entry = self.symbol_table.lookup(target) if target else None
+        self.emit('assignment', {'target': target, 'entry': entry, 'type': rhs_type,
+                                 'value': value, 'error': error})
+        # A constant keeps the value it was declared with, whatever is assigned to it later
+        if (entry and value is not None and rhs_type is not None and can_assign(entry.get('type'), rhs_type)
+                and (self.declaration or not self.symbol_table.is_const(target))):
+            self.symbol_table.set_value(target, float(value) if entry.get('type') in {'float', 'double'} else value)
+
+        # Identifiers read by the expression, each looked up once
+        for name, read_entry in evaluator.identifiers.items():
+            self.emit('read', {'name': name, 'entry': read_entry})
+            self.used_symbols.add(name)
+            self.symbol_table.mark_used(name)
+
+    def finish(self):
+        """
+        Run the end-of-input checks and return the `semantic_analyzer` result tuple.
+        """
+        if self.function is not None:  # body never closed
+            self.leave_function()
+        if self.is_rhs:
+            self.end_assignment()
+        if self.statements:
+            self.end_statements()
+        if self.tokens is not None:
+            cfg = ControlFlowGraph(build_statements(self.tokens))
+            self.emit('program', {'tokens': self.tokens, 'cfg': cfg})
+        self.emit('end', {})
+
+        # Return analysis result
+        return not self.has_error, self.errors, self.warnings, self.symbol_table.dump()
+
+
+class ExpressionEvaluator:
+    """
+    Precedence-climbing evaluator over the tokens of one expression.
+
+    `evaluate()` returns (type, value): the C type of the expression, or None
+    when it depends on something unknown (an undeclared variable, malformed
+    syntax), and its folded value, or None when it is not a constant.
+    Identifiers are looked up once; `identifiers` maps each name read to its
+    symbol entry (None if undeclared).
+    """
+
+    def __init__(self, tokens: list[Token], symbol_table: SymbolTable):
+        self.tokens = tokens
+        self.symbol_table = symbol_table
+        self.identifiers = {}
+        self.pos = 0
+
+    def evaluate(self):
+        if not self.tokens:
+            return None, None
+        result = self.binary(0)
+        if self.pos < len(self.tokens):
+            # Malformed: still record the identifiers it reads
+            for token in self.tokens[self.pos:]:
+                if token['type'] == 'IDENTIFIER':
+                    self.identifier(token['token'])
+            return None, None
+        return result
+
+    def peek_operator(self):
+        """
+        Return the operator at the current position, joining two-token ones.
+        """
+        if self.pos >= len(self.tokens) or self.tokens[self.pos]['type'] != 'OPERATOR':
+            return None
+        operator = self.tokens[self.pos]['token']
+        if self.pos + 1 < len(self.tokens) and self.tokens[self.pos + 1]['type'] == 'OPERATOR':
+            joined = operator + self.tokens[self.pos + 1]['token']
+            if joined in BINARY_PRECEDENCE:
+                return joined
+        return operator
+
+    def binary(self, min_precedence):
+        left_type, left_value = self.unary()
+        while True:
+            operator = self.peek_operator()
+            precedence = BINARY_PRECEDENCE.get(operator)
+            if precedence is None or precedence <= min_precedence:
+                return left_type, left_value
+            self.pos += len(operator)
+            right_type, right_value = self.binary(precedence)
+            left_type, left_value = self.apply(operator, left_type, left_value, right_type, right_value)
+
+    def unary(self):
+        operator = self.peek_operator()
+        if operator in {'-', '+', '!'}:
+            self.pos += 1
+            operand_type, value = self.unary()
+            if operand_type is not None and operand_type not in ARITHMETIC_RANKS:
+                raise ExpressionError(f"Invalid operand of type '{operand_type}' to unary '{operator}'")
+            if operator == '!':
+                return 'int', None if value is None else int(not value)
+            if operand_type is not None:
+                operand_type = common_type(operand_type, 'int')
+            return operand_type, None if value is None else (-value if operator == '-' else value)
+        return self.primary()
+
+    def primary(self):
+        if self.pos >= len(self.tokens):
+            return None, None
+        token = self.tokens[self.pos]
+        kind, text = token['type'], token['token']
+        self.pos += 1
+
+        if kind == 'PUNCTUATION' and text == '(':
+            result = self.binary(0)
+            if self.pos < len(self.tokens) and self.tokens[self.pos]['token'] == ')':
+                self.pos += 1
+            return result
+        if kind in {'NUMBER', 'DECIMAL'}:
+            if '.' in text:
+                return 'float', float(text)
+            return 'int', int(text)
+        if kind == 'HEX':
+            return 'int', int(text, 16)
+        if kind == 'CHAR':
+            return 'char', ord(text[1])
+        if kind == 'STRING':
+            return 'string', None
+        if kind == 'IDENTIFIER' and self.pos < len(self.tokens) and self.tokens[self.pos]['token'] == '(':
+            return self.call(text)
+        if kind == 'IDENTIFIER':
+            entry = self.identifier(text)
+            if not entry:
+                return None, None
+            declared_type = entry.get('type')
+            if declared_type not in ARITHMETIC_RANKS and declared_type != 'string':
+                return None, None
+            return declared_type, entry.get('value') if entry.get('const') else None
+
+        self.pos -= 1
+        return None, None
+
+    def call(self, name):
+        """
+        Evaluate the arguments of a call to `name`; the call has the
+        function's return type, or None when the function is unknown.
+        """
+        self.pos += 1  # '('
+        if self.pos < len(self.tokens) and self.tokens[self.pos]['token'] == ')':
+            self.pos += 1
+        else:
+            while self.pos < len(self.tokens):
+                self.binary(0)
+                separator = self.tokens[self.pos]['token'] if self.pos < len(self.tokens) else None
+                self.pos += 1
+                if separator != ',':
+                    break
+        function = self.symbol_table.function(name)
+        return (function['return_type'] if function else None), None
 
-                    if not can_assign(lhs_type, rhs_type):
-                        errors.append(
-                            f"Semantic Error: Type mismatch — cannot assign {rhs_type} literal to '{assignment_target}' of type '{lhs_type}'."
-                        )
-                        has_error = True
+    def identifier(self, name):
+        if name not in self.identifiers:
+            self.identifiers[name] = self.symbol_table.lookup(name)
+        return self.identifiers[name]
 
-    # Final checks
+    def apply(self, operator, left_type, left_value, right_type, right_value):
+        """
+        Type and, when both sides are constant, fold one binary operation.
+        """
+        for operand_type in (left_type, right_type):
+            if operand_type is not None and operand_type not in ARITHMETIC_RANKS:
+                raise ExpressionError(f"Invalid operand of type '{operand_type}' to '{operator}'")
 
-    # Undeclared variable use
-    for symbol in symbol_table.undeclared_variables(used_symbols):
-        errors.append(f"Semantic Error: Variable '{symbol}' not declared.")
-        has_error = True
+        if operator in COMPARISON_OPERATORS:
+            result_type = 'int'
+        elif left_type is None or right_type is None:
+            result_type = None
+        else:
+            result_type = common_type(left_type, right_type)
+        if operator in {'&', '|'} and {left_type, right_type} - INTEGER_TYPES - {None}:
+            raise ExpressionError(f"Invalid floating operand to '{operator}'")
 
-    # Unused variable warnings
-    for symbol in symbol_table.unused_variables():
-        warnings.append(f"Warning: Variable '{symbol}' declared but never used.")
+        if left_value is None or right_value is None:
+            return result_type, None
+        if operator == '/' and right_value == 0:
+            raise ExpressionError("Division by zero in constant expression")
 
-    # Return analysis result
-    return not has_error, errors, warnings, symbol_table.dump()
+        if operator == '+':
+            value = left_value + right_value
+        elif operator == '-':
+            value = left_value - right_value
+        elif operator == '*':
+            value = left_value * right_value
+        elif operator == '/':
+            if result_type in INTEGER_TYPES:
+                # C truncates integer division toward zero
+                value = abs(left_value) // abs(right_value)
+                value = -value if (left_value < 0) != (right_value < 0) else value
+            else:
+                value = left_value / right_value
+        elif operator == '&':
+            value = left_value & right_value
+        elif operator == '|':
+            value = left_value | right_value
+        else:
+            value = int({
+                '==': left_value == right_value, '!=': left_value != right_value,
+                '<': left_value < right_value, '>': left_value > right_value,
+                '<=': left_value <= right_value, '>=': left_value >= right_value,
+                '&&': bool(left_value) and bool(right_value),
+                '||': bool(left_value) or bool(right_value),
+            }[operator])
+        if result_type in {'float', 'double'}:
+            value = float(value)
+        return result_type, value
@@ -0,0 +1,306 @@
+import bisect
+import secrets
+import threading
+import time
+
+from lexical_analysis import iter_tokens
+
+
+class Cancelled(BaseException):
+    """
+    Raised at a checkpoint of an analysis that a newer version of the text
+    superseded. Like asyncio.CancelledError it is not an Exception, so the
+    per-stage error handling of the analysis lets it through.
+    """
+
+
+def _token_end_line(token):
+    return token['line'] + token['token'].count('\n')
+
+
+def reusable_prefix(previous, tokens, lexical, lines):
+    """
+    Split the tokens and lexical errors of the text `previous` at the first
+    of `lines` (the new text, split) that differs from it.
+
+    A token depends only on its own line, except a block comment, which
+    also depends on the lines up to its end, and an unclosed one, which
+    depends on everything after it. Everything that ends before the first
+    changed line and precedes any unclosed comment is kept.
+
+    Returns (tokens kept, errors kept, (line, position) to lex from).
+    """
+    old_lines = previous.split('\n')
+    changed = 0
+    while changed < min(len(old_lines), len(lines)) and old_lines[changed] == lines[changed]:
+        changed += 1
+    if changed == len(old_lines) == len(lines):
+        return tokens, lexical, (len(lines), 0)
+
+    resume = (changed, 0)
+    for error in lexical:
+        if error['line'] >= changed:
+            break
+        if error['message'] == 'Unclosed block comment':
+            resume = (error['line'], error['position'])
+            break
+
+    # Tokens are in source order; only the last one starting before the
+    # cut can run past it
+    cut = bisect.bisect_left(tokens, resume, key=lambda token: (token['line'], token['position']))
+    if cut and _token_end_line(tokens[cut - 1]) >= resume[0]:
+        cut -= 1
+        resume = (tokens[cut]['line'], tokens[cut]['position'])
+    kept_errors = [error for error in lexical if (error['line'], error['position']) < resume]
+    return tokens[:cut], kept_errors, resume
+
+
+class EditorSession:
+    """
+    The document of one editor, analyzed as it is edited.
+
+    Every `submit` is a new version of the text. Analysis starts once no
+    new version has arrived for `debounce_ms` (trailing-edge debounce), on a
+    timer thread made by `timer` (threading.Timer's signature), and checks
+    between stages and parsed statements whether it is still the latest
+    version; if not, it stops by raising Cancelled.
+
+    The tokens, lexical errors and symbol table of the last completed
+    analysis are kept: `lex` lexes only from the first line that changed
+    since, and the symbol table is served as is until the next analysis
+    completes.
+
+    Counters: `submitted` versions, `started`, `cancelled` and `completed`
+    analyses, and the thread CPU time spent in analyses (`cpu_seconds`)
+    and in cancelled ones (`wasted_cpu_seconds`). Analyses may run on
+    another thread than the timer's, so that time is counted by `measure`,
+    on the thread doing the work.
+    """
+
+    def __init__(self, session_id, analyze, debounce_ms=250, client=None, timer=threading.Timer):
+        self.id = session_id
+        self.client = client        # Who opened the session, for scheduling its analyses
+        self.analyze = analyze
+        self.debounce_ms = debounce_ms
+        self.version = 0
+        self.snippet = None
+        self.result = None          # {'version', 'response', 'is_success'} of the latest completed analysis
+        self.last_active = time.monotonic()
+
+        self.code = None            # Text of the last completed analysis
+        self.tokens = None          # Its tokens,
+        self.lexical = []           # lexical errors
+        self.symbol_table = None    # and symbol table
+
+        self.submitted = 0
+        self.started = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.cpu_seconds = 0.0
+        self.wasted_cpu_seconds = 0.0
+
+        self.timer = timer
+        self._timer = None
+        self._changed = threading.Condition()
+
+    def submit(self, snippet):
+        """
+        Record a new version of the text and (re)start the debounce timer.
+        Returns its version number.
+        """
+        with self._changed:
+            self.version += 1
+            self.snippet = snippet
+            self.submitted += 1
+            self.last_active = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self.timer(self.debounce_ms / 1000, self._run, (self.version,))
+            self._timer.daemon = True
+            self._timer.start()
+            return self.version
+
+    def checkpoint(self, version):
+        """
+        Raise Cancelled if `version` is no longer the latest one.
+        """
+        if self.version != version:
+            raise Cancelled(version)
+
+    def _run(self, version):
+        with self._changed:
+            if version != self.version:
+                return
+            snippet = self.snippet
+            self.started += 1
+        try:
+            response, is_success = self.analyze(snippet, self, lambda: self.checkpoint(version))
+        except Cancelled:
+            with self._changed:
+                self.cancelled += 1
+            return
+        except Exception as e:
+            response, is_success = f'Erro na analise: {e}', False
+        with self._changed:
+            self.completed += 1
+            if self.result is None or version > self.result['version']:
+                self.result = {'version': version, 'response': response, 'is_success': is_success}
+            self._changed.notify_all()
+
+    def measure(self, function, *args):
+        """
+        Call `function(*args)` and count the CPU time of the calling thread
+        meanwhile in `cpu_seconds`, and in `wasted_cpu_seconds` too if it
+        is cancelled.
+        """
+        start = time.thread_time()
+        try:
+            return function(*args)
+        except Cancelled:
+            with self._changed:
+                self.wasted_cpu_seconds += time.thread_time() - start
+            raise
+        finally:
+            with self._changed:
+                self.cpu_seconds += time.thread_time() - start
+
+    def lex(self, code, diagnostics):
+        """
+        Tokens of `code`, its lexical errors recorded in `diagnostics`,
+        reusing those of the last completed analysis before the first
+        changed line.
+        """
+        with self._changed:
+            previous, tokens, lexical = self.code, self.tokens, self.lexical
+        if previous is None:
+            return list(iter_tokens(code, diagnostics))
+        tokens, lexical, (line, position) = reusable_prefix(previous, tokens, lexical, code.split('\n'))
+        for error in lexical:
+            diagnostics.add(error['stage'], error['severity'], error['type'], error['message'],
+                            error['line'], error['position'])
+        return tokens + list(iter_tokens(code, diagnostics, line, position))
+
+    def remember(self, code, tokens, diagnostics, symbol_table):
+        """
+        Keep the state of a completed analysis of `code` for the next one.
+        """
+        with self._changed:
+            self.code = code
+            self.tokens = tokens
+            self.lexical = diagnostics.errors('lexical')
+            self.symbol_table = symbol_table
+
+    def wait(self, version=None, timeout=None):
+        """
+        Wait up to `timeout` seconds for the analysis of `version` (the
+        latest when None) or a newer one. Returns the result, or None.
+        """
+        with self._changed:
+            version = self.version if version is None else version
+            self._changed.wait_for(lambda: self.result is not None and self.result['version'] >= version,
+                                   timeout)
+            self.last_active = time.monotonic()
+            if self.result is not None and self.result['version'] >= version:
+                return self.result
+            return None
+
+    def close(self):
+        """
+        Stop the pending analysis, if any; a running one stops at its next checkpoint.
+        """
+        with self._changed:
+            if self._timer is not None:
+                self._timer.cancel()
+            self.version += 1
+            self._changed.notify_all()
+
+    def info(self):
+        """
+        Return the counters of this session.
+        """
+        with self._changed:
+            return {
+                'version': self.version,
+                'submitted': self.submitted,
+                'started': self.started,
+                'cancelled': self.cancelled,
+                'completed': self.completed,
+                'cpu_seconds': self.cpu_seconds,
+                'wasted_cpu_seconds': self.wasted_cpu_seconds,
+            }
+
+
+class SessionManager:
+    """
+    Editor sessions of this process, by id. Sessions idle for longer than
+    `idle_timeout` seconds are closed when a new one is created; beyond
+    `max_sessions` the least recently active is closed.
+
+    The state is per process, so with pre-forked workers an editor must
+    keep talking to the same one (an unknown id means: create a session
+    and submit the text again).
+    """
+
+    def __init__(self, analyze, debounce_ms=250, idle_timeout=600, max_sessions=1000):
+        self.analyze = analyze
+        self.debounce_ms = debounce_ms
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._closed = {'submitted': 0, 'started': 0, 'cancelled': 0, 'completed': 0,
+                        'cpu_seconds': 0.0, 'wasted_cpu_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def create(self, client=None):
+        """
+        Open a new session for `client` and return it.
+        """
+        session = EditorSession(secrets.token_urlsafe(16), self.analyze, self.debounce_ms, client)
+        with self._lock:
+            now = time.monotonic()
+            idle = [s for s in self._sessions.values() if now - s.last_active > self.idle_timeout]
+            active = sorted((s for s in self._sessions.values() if s not in idle), key=lambda s: s.last_active)
+            for stale in idle + active[:max(len(active) - self.max_sessions + 1, 0)]:
+                self._close(stale)
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        """
+        Return the session `session_id`, or None.
+        """
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        """
+        Close the session `session_id`. Returns False if there was none.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            self._close(session)
+            return True
+
+    def _close(self, session):
+        del self._sessions[session.id]
+        session.close()
+        for key, value in session.info().items():
+            if key in self._closed:
+                self._closed[key] += value
+
+    def info(self):
+        """
+        Return the counters summed over every session, open or closed,
+        and the number of open sessions.
+        """
+        with self._lock:
+            totals = dict(self._closed)
+            for session in self._sessions.values():
+                for key, value in session.info().items():
+                    if key in totals:
+                        totals[key] += value
+            totals['sessions'] = len(self._sessions)
+        totals['wasted_cpu_rate'] = totals['wasted_cpu_seconds'] / totals['cpu_seconds'] if totals['cpu_seconds'] else 0.0
+        return totals
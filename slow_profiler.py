@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from lexical_analysis import lexer
+from syntactic_analysis import parser
+from semantic_analysis import semantic_analyzer
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}:{code.co_name}'
+
+
+def collapsed_stacks(stacks, root, function, *args):
+    """
+    Call `function(*args)` under a deterministic tracer and add the self
+    time (microseconds) of every call path to `stacks`, keyed by the
+    ';'-joined frame names starting at `root`; the collapsed-stack format
+    flame graph tools read. Returns the function's result.
+    """
+    stack = [root]
+    last = perf_counter()
+
+    def profile(frame, event, arg):
+        nonlocal last
+        now = perf_counter()
+        stacks[tuple(stack)] += (now - last) * 1e6
+        if event == 'call':
+            stack.append(_frame_name(frame))
+        elif event == 'c_call':
+            stack.append(f'<builtin>:{getattr(arg, "__qualname__", getattr(arg, "__name__", "?"))}')
+        elif event in ('return', 'c_return', 'c_exception') and len(stack) > 1:
+            stack.pop()
+        last = perf_counter()
+
+    sys.setprofile(profile)
+    try:
+        return function(*args)
+    finally:
+        sys.setprofile(None)
+
+
+def profile_snippet(code):
+    """
+    Run the three stages over `code` twice: untraced for the stage timings
+    (milliseconds), then traced for the collapsed stacks.
+    Returns (stage timings, collapsed stack lines).
+    """
+    timings = {}
+    start = perf_counter()
+    tokens = lexer(code)
+    timings['lexer'] = (perf_counter() - start) * 1000
+    start = perf_counter()
+    _, symbol_table, _ = parser(tokens)
+    timings['parser'] = (perf_counter() - start) * 1000
+    start = perf_counter()
+    semantic_analyzer(tokens, symbol_table)
+    timings['semantic_analyzer'] = (perf_counter() - start) * 1000
+
+    stacks = defaultdict(float)
+    tokens = collapsed_stacks(stacks, 'lexer', lexer, code)
+    _, symbol_table, _ = collapsed_stacks(stacks, 'parser', parser, tokens)
+    collapsed_stacks(stacks, 'semantic_analyzer', semantic_analyzer, tokens, symbol_table)
+    lines = [f'{";".join(path)} {round(micros)}' for path, micros in sorted(stacks.items()) if round(micros) > 0]
+    return timings, lines
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in capture of slow requests.
+
+    `observe` is called with the wall time of every analysis; snippets
+    slower than `threshold_ms` are re-run under the tracer on a background
+    thread, and the snippet hash, stage timings and collapsed stacks are
+    saved under `directory` as <hash prefix>.json and .folded files. The snippet
+    itself is not stored. Each snippet is captured once, and only the
+    `max_captures` slowest captures are kept.
+
+    Captures are as expensive as the slow analyses they follow, so a server
+    passes `run(function, code)` to schedule them like any other job (see
+    admission); by default they run on the background thread itself.
+    """
+
+    def __init__(self, directory, threshold_ms=500, max_captures=100, run=None):
+        self.directory = directory
+        self.threshold_ms = threshold_ms
+        self.max_captures = max_captures
+        self.run = run if run is not None else lambda function, code: function(code)
+        self._executor = None  # started on the first capture, so it is never forked
+        self._pending = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def observe(self, code, elapsed_ms, endpoint=None):
+        """
+        Schedule a capture of `code` if it took longer than the threshold.
+        Returns the future of the capture, or None.
+        """
+        if elapsed_ms < self.threshold_ms:
+            return None
+        digest = hashlib.sha256(code.encode('utf-8', 'surrogatepass')).hexdigest()
+        with self._lock:
+            if digest in self._pending or os.path.exists(self._path(digest, '.json')):
+                return None
+            self._pending.add(digest)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-profiler')
+        return self._executor.submit(self._capture, digest, code, elapsed_ms, endpoint)
+
+    def _path(self, digest, suffix):
+        return os.path.join(self.directory, digest[:16] + suffix)
+
+    def _capture(self, digest, code, elapsed_ms, endpoint):
+        try:
+            timings, stacks = self.run(profile_snippet, code)
+            record = {
+                'hash': digest,
+                'endpoint': endpoint,
+                'captured_at': time.time(),
+                'observed_ms': round(elapsed_ms, 3),
+                'stage_ms': {stage: round(ms, 3) for stage, ms in timings.items()},
+                'length': len(code),
+                'lines': code.count('\n') + 1,
+            }
+            with open(self._path(digest, '.folded'), 'w') as folded:
+                folded.write('\n'.join(stacks) + '\n')
+            with open(self._path(digest, '.json'), 'w') as summary:
+                json.dump(record, summary)
+            self._trim()
+            return record
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def captures(self, limit=20):
+        """
+        Return the summaries of the `limit` slowest captures, slowest first.
+        """
+        records = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name)) as summary:
+                        records.append(json.load(summary))
+                except (OSError, ValueError):
+                    continue
+        records.sort(key=lambda record: record['observed_ms'], reverse=True)
+        return records[:limit]
+
+    def stacks(self, digest):
+        """
+        Return the collapsed stacks captured for `digest` (or a prefix of
+        at least 16 characters), or None.
+        """
+        if len(digest) < 16 or not all(char in '0123456789abcdef' for char in digest):
+            return None
+        try:
+            with open(self._path(digest, '.folded')) as folded:
+                return folded.read()
+        except OSError:
+            return None
+
+    def _trim(self):
+        for record in self.captures(limit=None)[self.max_captures:]:
+            for suffix in ('.json', '.folded'):
+                try:
+                    os.remove(self._path(record['hash'], suffix))
+                except OSError:
+                    pass
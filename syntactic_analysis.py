@@ -1,292 +1,306 @@
-from objects import Token, SymbolTable
-
-def parser(tokens: list[Token]):
+from objects import Token, TokenStream, SymbolTable
+from parse_table import START, STATEMENTS, PRODUCTIONS, TABLE, DEFAULTS, ERRORS
+
+# Token types whose text can be a grammar literal
+LITERAL_TYPES = {'KEYWORD', 'PUNCTUATION', 'OPERATOR'}
+
+# Right-hand side of each alternative, reversed for pushing on the parse stack
+EXPANSIONS = tuple(tuple(reversed(rhs)) for _, rhs in PRODUCTIONS)
+
+
+def _skip_preprocessor_lines(tokens):
+    """
+    Streaming counterpart of the preprocessor filter in `parser`.
+    The lexer emits tokens in non-decreasing line order, so buffering a
+    single line is enough to drop every line holding a directive.
+    """
+    line_tokens = []
+    current_line = None
+    for token in tokens:
+        if token['line'] != current_line:
+            if not any(t['type'] == 'PREPROCESSOR' for t in line_tokens):
+                yield from line_tokens
+            line_tokens = []
+            current_line = token['line']
+        if token['type'] not in {'COMMENT_LINE', 'COMMENT_BLOCK'}:
+            line_tokens.append(token)
+    if not any(t['type'] == 'PREPROCESSOR' for t in line_tokens):
+        yield from line_tokens
+
+
+def parser(tokens: list[Token], on_statement=None, symbol_table: SymbolTable | None = None, diagnostics=None):
+    """
+    Parse a token list (or any token iterator) and build the symbol table.
+
+    The parser is driven by the LL(1) table in `parse_table`, generated from
+    the grammar in `grammar.py`. A syntax error is reported once per
+    statement, which is then skipped, and parsing resumes with the next one.
+
+    `on_statement`, when given, is called as `on_statement(chunk, new_errors)`
+    every time a statement is reduced, with the tokens consumed since the
+    previous call and the syntax errors raised meanwhile. Consumed tokens are
+    released afterwards, so a lazy input is never held in memory as a whole.
+    A caller-owned `symbol_table` lets it be inspected while parsing is underway.
+    Errors are also recorded in `diagnostics`, a `Diagnostics` collector, if given;
+    redeclarations found while declaring are placed at their statement.
+    """
     errors = []
 
-    # Collect lines that contain preprocessor directives
-    preproc_lines = {t['line'] for t in tokens if t['type'] == 'PREPROCESSOR'}
+    if isinstance(tokens, list):
+        # Collect lines that contain preprocessor directives
+        preproc_lines = {t['line'] for t in tokens if t['type'] == 'PREPROCESSOR'}
 
-    # Remove comments and lines with preprocessor directives
-    filtered_tokens = [
-        t for t in tokens
-        if t['type'] not in {'COMMENT_LINE', 'COMMENT_BLOCK'} and t['line'] not in preproc_lines
-    ]
+        # Remove comments and lines with preprocessor directives
+        filtered_tokens = TokenStream([
+            t for t in tokens
+            if t['type'] not in {'COMMENT_LINE', 'COMMENT_BLOCK'} and t['line'] not in preproc_lines
+        ])
+    else:
+        filtered_tokens = TokenStream(_skip_preprocessor_lines(tokens))
 
     pos = 0
-    symbol_table = SymbolTable()
-    bracket_stack = []
-
-    # Skips to next statement end on error
-    def synchronize():
+    if symbol_table is None:
+        symbol_table = SymbolTable()
+    scope = symbol_table  # where declarations go: the enclosing function's table inside a body
+    committed = 0
+    reported = 0
+    collected = 0
+    brackets = filtered_tokens.brackets
+    reported_closers = 0
+
+    # Reports closing brackets the bracket index could not pair, up to `pos`
+    def report_unmatched_closers():
+        nonlocal reported_closers
+        while reported_closers < len(brackets.unmatched_closers):
+            index, token = brackets.unmatched_closers[reported_closers]
+            if index >= pos:
+                break
+            errors.append({
+                'line': token['line'],
+                'position': token['position'],
+                'type': 'SYNTAX_ERROR',
+                'message': f"Unmatched closing bracket '{token['token']}'"
+            })
+            reported_closers += 1
+
+    # Moves the errors raised since the last call to `diagnostics`
+    def collect():
+        nonlocal collected
+        for error in errors[collected:]:
+            if isinstance(error, dict):
+                diagnostics.add('syntactic', 'error', error['type'], error['message'], error['line'], error['position'])
+            else:
+                start = filtered_tokens[committed] if committed < pos else None
+                diagnostics.add('syntactic', 'error', 'SEMANTIC_ERROR', error,
+                                start['line'] if start else -1, start['position'] if start else -1)
+        collected = len(errors)
+
+    # Hands the tokens reduced since the last call to `on_statement` and drops them
+    def commit():
+        nonlocal committed, reported
+        report_unmatched_closers()
+        if diagnostics is not None:
+            collect()
+        if on_statement is not None:
+            on_statement(filtered_tokens.slice(committed, pos), errors[reported:])
+            reported = len(errors)
+        filtered_tokens.release(pos)
+        committed = pos
+
+    # Skips to the end of the statement on error, stepping over whole blocks.
+    # Inside a block the block's own '}' is left for it to close.
+    def synchronize(in_block=False):
         nonlocal pos
-        while pos < len(filtered_tokens) and filtered_tokens[pos]['token'] not in {';', '}'}:
+        jumped = False
+        while filtered_tokens.has(pos) and filtered_tokens[pos]['token'] not in {';', '}'}:
             token = filtered_tokens[pos]
-            if token['type'] == 'PUNCTUATION' and token['token'] in {')', '}', ']'}:
-                match('PUNCTUATION', token['token'])  # Trigger bracket check
-            else:
-                pos += 1
-        if pos < len(filtered_tokens):
+            closer = filtered_tokens.matching(pos) if token['token'] == '{' else None
+            jumped = closer is not None
+            pos = closer if jumped else pos + 1
+        if filtered_tokens.has(pos) and (jumped or not in_block or filtered_tokens[pos]['token'] != '}'):
             pos += 1
 
-    # Match a token by type and optionally by exact value
-    def match(expected_type, expected_value=None) -> bool:
-        nonlocal pos
-        if pos < len(filtered_tokens):
-            token = filtered_tokens[pos]
-            if token['type'] == expected_type and (expected_value is None or token['token'] == expected_value):
-
-                # Track opening brackets
-                if expected_value in {'(', '{', '['}:
-                    bracket_stack.append((expected_value, token['line'], token['position']))
-                # Track and verify closing brackets
-                elif expected_value in {')', '}', ']'}:
-                    if bracket_stack and {'(': ')', '{': '}', '[': ']'}[bracket_stack[-1][0]] == expected_value:
-                        bracket_stack.pop()
-                    else:
-                        errors.append({
-                            'line': token['line'],
-                            'position': token['position'],
-                            'type': 'SYNTAX_ERROR',
-                            'message': f"Unmatched closing bracket '{expected_value}'"
-                        })
-                pos += 1
-                return True
-        return False
-
-    # Parses an expression with recursive precedence levels
-    def expression() -> bool:
-        nonlocal pos
+    # Reports a syntax error at the current token
+    def syntax_error(message):
+        errors.append({
+            'line': filtered_tokens[pos]['line'] if filtered_tokens.has(pos) else -1,
+            'position': filtered_tokens[pos]['position'] if filtered_tokens.has(pos) else -1,
+            'type': 'SYNTAX_ERROR',
+            'message': message
+        })
 
-        def primary():
-            return (
-                match('IDENTIFIER') or
-                match('NUMBER') or
-                (match('PUNCTUATION', '(') and expression() and match('PUNCTUATION', ')'))
-            )
-
-        def term():
-            nonlocal pos
-            if not primary():
-                return False
-            while pos < len(filtered_tokens) and filtered_tokens[pos]['type'] == 'OPERATOR' and filtered_tokens[pos]['token'] in '*/':
-                pos += 1
-                if not primary():
-                    return False
-            return True
-
-        def additive():
-            nonlocal pos
-            if not term():
-                return False
-            while pos < len(filtered_tokens) and filtered_tokens[pos]['type'] == 'OPERATOR' and filtered_tokens[pos]['token'] in '+-':
-                pos += 1
-                if not term():
-                    return False
-            return True
-
-        def comparison():
-            nonlocal pos
-            if not additive():
-                return False
-            while pos < len(filtered_tokens) and filtered_tokens[pos]['type'] == 'OPERATOR' and filtered_tokens[pos]['token'] in ['<', '<=', '>', '>=', '==', '!=']:
-                pos += 1
-                if not additive():
-                    return False
-            return True
-
-        return comparison()
-
-    # Parses a single statement or declaration
-    def statement():
-        nonlocal pos
-        start_pos = pos
+    # --- Grammar actions (the @names in grammar.GRAMMAR) ---
+    declaration = {}  # type, const, name, line and initialized of the current declarator
+    function = {}     # name, attributes and parameters of the function being declared
+    statements = []   # (stack height, first token, enclosing message) of the statements being parsed
+
+    def declare_type(is_const=False):
+        declaration['type'] = filtered_tokens[pos - 1]['token']
+        declaration['const'] = is_const
+
+    def declare_name():
+        token = filtered_tokens[pos - 1]
+        declaration.update(name=token['token'], line=token['line'], initialized=False)
+
+    def declare():
+        scope.insert(declaration['name'], {
+            'type': declaration['type'],
+            'used': False,
+            'initialized': declaration['initialized'],
+            'const': declaration['const']
+        }, errors)
+
+    def begin_function():
+        function.clear()
+        function.update(name=declaration['name'], const_params=set(), const=False, attributes={
+            'return_type': declaration['type'],
+            'params': [],
+            'line': declaration['line'],
+        })
 
-        # Handle return statements
-        if match('KEYWORD', 'return'):
-            if not expression() or not match('PUNCTUATION', ';'):
-                errors.append({
-                    'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                    'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                    'type': 'SYNTAX_ERROR',
-                    'message': "Invalid return statement syntax"
-                })
-                synchronize()
-                return False
-            return True
-
-        # Handle variable declarations
-        if match('KEYWORD'):  # Type or 'const'
-            var_type = filtered_tokens[pos - 1]['token']
-            is_const = False
-
-            if var_type == 'const':
-                is_const = True
-                if not match('KEYWORD'):
-                    errors.append({
-                        'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                        'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                        'type': 'SYNTAX_ERROR',
-                        'message': "Expected type after 'const'"
-                    })
-                    synchronize()
-                    return False
-                var_type = filtered_tokens[pos - 1]['token']
-
-            while True:
-                # Expect variable name
-                if not match('IDENTIFIER'):
-                    errors.append({
-                        'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                        'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                        'type': 'SYNTAX_ERROR',
-                        'message': "Expected variable name after type"
-                    })
-                    synchronize()
-                    return False
-
-                var_name = filtered_tokens[pos - 1]['token']
-                attributes = {
-                    'type': var_type,
-                    'used': False,
-                    'initialized': False,
-                    'const': is_const
-                }
-
-                # Optional initialization
-                if match('OPERATOR', '='):
-                    if not expression():
-                        errors.append({
-                            'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                            'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                            'type': 'SYNTAX_ERROR',
-                            'message': "Invalid assignment expression"
-                        })
-                        synchronize()
-                        return False
-                    attributes['initialized'] = True
-
-                symbol_table.insert(var_name, attributes, errors)
-
-                if not match('PUNCTUATION', ','):
-                    break
-
-            if not match('PUNCTUATION', ';'):
-                errors.append({
-                    'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                    'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                    'type': 'SYNTAX_ERROR',
-                    'message': "Expected ';' after declaration"
-                })
-                synchronize()
-                return False
-            return True
-
-        # Handle assignments or function calls
-        if match('IDENTIFIER'):
-            var_name = filtered_tokens[pos - 1]['token']
-            if match('OPERATOR', '='):
-                if expression() and match('PUNCTUATION', ';'):
-                    return True
-                else:
-                    errors.append({
-                        'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                        'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                        'type': 'SYNTAX_ERROR',
-                        'message': "Invalid assignment statement"
-                    })
-                    synchronize()
-                    return False
-
-            elif match('PUNCTUATION', '('):  # Function call
-                while not match('PUNCTUATION', ')'):
-                    if not expression():
-                        errors.append({
-                            'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                            'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                            'type': 'SYNTAX_ERROR',
-                            'message': "Invalid function call arguments"
-                        })
-                        synchronize()
-                        return False
-                    if not match('PUNCTUATION', ',') and (pos >= len(filtered_tokens) or filtered_tokens[pos]['token'] != ')'):
-                        errors.append({
-                            'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                            'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                            'type': 'SYNTAX_ERROR',
-                            'message': "Expected ',' or ')' in function call"
-                        })
-                        synchronize()
-                        return False
-
-                if not match('PUNCTUATION', ';'):
-                    errors.append({
-                        'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                        'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                        'type': 'SYNTAX_ERROR',
-                        'message': "Expected ';' after function call"
-                    })
-                    synchronize()
-                    return False
-                return True
-
-        pos = start_pos
-        return False
-
-    # Parses if/while control structures with block bodies
-    def control_structure():
+    def add_parameter():
+        name = filtered_tokens[pos - 1]['token']
+        function['attributes']['params'].append((filtered_tokens[pos - 2]['token'], name))
+        if function['const']:
+            function['const_params'].add(name)
+        function['const'] = False
+
+    # The body is parsed into the function's own scope
+    def enter_function():
+        nonlocal scope
+        function_scope = SymbolTable(parent=symbol_table)
+        for param_type, param_name in function['attributes']['params']:
+            function_scope.insert(param_name, {'type': param_type, 'initialized': True,
+                                               'const': param_name in function['const_params']}, errors)
+        opener = filtered_tokens[pos - 1]
+        function['attributes']['body'] = (opener['line'], opener['position'])
+        function['attributes']['scope'] = function_scope
+        symbol_table.declare_function(function['name'], function['attributes'], errors)
+        scope = function_scope
+
+    def leave_function():
+        nonlocal scope
+        scope = symbol_table
+
+    def end_statement():
+        commit()
+        statements.pop()
+
+    actions = {
+        'type': declare_type,
+        'const_type': lambda: declare_type(is_const=True),
+        'name': declare_name,
+        'initialized': lambda: declaration.update(initialized=True),
+        'declare': declare,
+        'function': begin_function,
+        'const_parameter': lambda: function.update(const=True),
+        'parameter': add_parameter,
+        'prototype': lambda: symbol_table.declare_function(function['name'], function['attributes'], errors),
+        'enter_function': enter_function,
+        'leave_function': leave_function,
+        'commit': end_statement,
+    }
+
+    # Parses one statement with the LL(1) table: every step either matches
+    # the current token or picks the alternative its lookahead predicts.
+    # `message` is the error of the innermost rule that has one; a
+    # ('message', previous) entry restores the outer one when its rule ends.
+    def parse_statement(start):
         nonlocal pos
-        start_pos = pos
-
-        if match('KEYWORD', 'while') or match('KEYWORD', 'if'):
-            if not match('PUNCTUATION', '(') or not expression() or not match('PUNCTUATION', ')') or not match('PUNCTUATION', '{'):
+        stack = [('nonterminal', start)]
+        message = None
+        token_at = None
+        while stack:
+            kind, symbol = stack.pop()
+            if token_at != pos:
+                token_at = pos
+                try:
+                    token = filtered_tokens[pos]
+                    text = token['token'] if token['type'] in LITERAL_TYPES else None
+                except IndexError:
+                    token = text = None
+            if kind == 'nonterminal':
+                if symbol in STATEMENTS:
+                    statements.append((len(stack), pos, message))
+                row = TABLE[symbol]
+                if token is None:
+                    alternative = row.get('$')
+                else:
+                    alternative = row.get(text) if text is not None else None
+                    if alternative is None:
+                        alternative = row.get(token['type'])
+                if alternative is None:
+                    alternative = DEFAULTS.get(symbol)
+                if alternative is not None:
+                    expansion = EXPANSIONS[alternative]
+                    if expansion:
+                        rule_message = ERRORS.get(symbol)
+                        if rule_message is not None and rule_message != message:
+                            stack.append(('message', message))
+                            message = rule_message
+                        stack.extend(expansion)
+                    continue
+                message = ERRORS.get(symbol, message)
+            elif kind == 'literal':
+                if text == symbol:
+                    pos += 1
+                    continue
+            elif kind == 'type':
+                if token is not None and token['type'] == symbol:
+                    pos += 1
+                    continue
+            elif kind == 'action':
+                actions[symbol]()
+                continue
+            elif kind == 'message':
+                message = symbol
+                continue
+            elif token is None:  # 'end'
+                continue
+
+            # Syntax error: drop the rest of the innermost statement and skip its tokens
+            height, first, message_before = statements[-1]
+            if '{first}' in message:
                 errors.append({
-                    'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                    'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
+                    'line': filtered_tokens[first]['line'],
+                    'position': filtered_tokens[first]['position'],
                     'type': 'SYNTAX_ERROR',
-                    'message': "Invalid control structure syntax"
+                    'message': message.format(first=filtered_tokens[first]['token'])
                 })
-                synchronize()
-                return False
-
-            # Parse block body
-            while pos < len(filtered_tokens) and not match('PUNCTUATION', '}'):
-                if not statement() and not control_structure():
-                    synchronize()
-                    return False
-            return True
-
-        pos = start_pos
-        return False
+            elif token is None and '{token}' in message:
+                syntax_error("Unexpected end of input")
+            else:
+                syntax_error(message.format(token=token['token'] if token else ''))
+            del stack[height:]
+            message = message_before
+            synchronize(in_block=len(statements) > 1)
+        statements.clear()
 
     # Main parsing loop
-    while pos < len(filtered_tokens):
+    start = START['file'] if symbol_table.parent is None else START['block']
+    while filtered_tokens.has(pos):
         token = filtered_tokens[pos]
 
-        # Detect unmatched closing brackets early
+        # Stray closing brackets were already diagnosed by the bracket index
         if token['type'] == 'PUNCTUATION' and token['token'] in {')', '}', ']'}:
-            match('PUNCTUATION', token['token'])
+            pos += 1
+            commit()
             continue
 
-        if not (control_structure() or statement()):
-            errors.append({
-                'line': filtered_tokens[pos]['line'] if pos < len(filtered_tokens) else -1,
-                'position': filtered_tokens[pos]['position'] if pos < len(filtered_tokens) else -1,
-                'type': 'SYNTAX_ERROR',
-                'message': f"Unexpected token '{filtered_tokens[pos]['token']}'" if pos < len(filtered_tokens) else "Unexpected end of input"
-            })
-            synchronize()
+        parse_statement(start)
+        commit()
 
     # Add unmatched opening brackets to errors
-    for bracket, line, position in bracket_stack:
+    for _, token in brackets.unmatched_openers():
         errors.append({
-            'line': line,
-            'position': position,
+            'line': token['line'],
+            'position': token['position'],
             'type': 'SYNTAX_ERROR',
-            'message': f"Unmatched opening bracket '{bracket}'"
+            'message': f"Unmatched opening bracket '{token['token']}'"
         })
 
     # Extra token(s) at end
-    if pos < len(filtered_tokens):
+    if filtered_tokens.has(pos):
         errors.append({
             'type': 'SYNTAX_ERROR',
             'message': 'Extra tokens after valid input',
@@ -294,4 +308,6 @@ def parser(tokens: list[Token]):
             'position': filtered_tokens[pos]['position']
         })
 
+    if diagnostics is not None:
+        collect()
     return (False, symbol_table, errors) if errors else (True, symbol_table, errors)
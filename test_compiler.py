@@ -1,7 +1,38 @@
+import contextlib
+import io
+import json
+import marshal
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 import unittest
-from lexical_analysis import lexer  # Lexical analysis module
+import zlib
+from unittest import mock
+from lexical_analysis import lexer, get_token_type, token_type_cache  # Lexical analysis module
 from syntactic_analysis import parser  # Syntactic analysis module
-from semantic_analysis import semantic_analyzer  # Semantic analysis module
+from semantic_analysis import semantic_analyzer, register_rule, RULES  # Semantic analysis module
+from pipeline import fused_analysis  # Fused streaming pipeline
+from analysis_cache import AnalysisCache, run_analysis  # Persistent analysis cache
+import cli  # Command-line entry point
+from vectorized_lexer import vectorized_lexer, load_numpy  # Optional NumPy lexer backend
+from warmup import Readiness  # Worker warm-up
+from coalescing import SingleFlight, request_key  # Request coalescing
+from fuzz import fuzz, check_invariants  # Fuzzing harness
+from slow_profiler import SlowRequestProfiler  # Slow request capture
+from control_flow import ControlFlowGraph, build_statements, uninitialized_reads, dead_stores, unreachable_statements  # Flow analyses
+from token_format import encode_columnar, encode_binary, compress, decode  # Compact token wire formats
+from translation_unit import analyze_translation_unit  # Per-function analysis
+from grammar import generate, GrammarError, TABLE_MODULE  # LL(1) table generator
+from objects import Diagnostics, TokenStream, MATCH_LOOKAHEAD  # Shared diagnostics collector, token window
+from utils import print_clean  # Report rendering
+from sessions import EditorSession, Cancelled  # Editor sessions
+from loadtest import InProcessTarget, load_test, parse_mix, percentile, compare  # Load testing harness
+from admission import Lane, AdmissionController, Rejected, estimate_cost  # Admission control
+import main  # Web service
 
 class TestCompiler(unittest.TestCase):
 
@@ -191,6 +222,483 @@ class TestCompiler(unittest.TestCase):
         self.assertFalse(valid)
         self.assertTrue(any("Invalid control structure syntax" in e['message'] for e in errors))
 
+    # ❌ Syntactic: Recovery skips a broken control structure's whole block
+    def test_recovery_skips_block(self):
+        code = "if (a < ) { b = 1; c = 2; }\nint d = 1;"
+        tokens = lexer(code)
+        valid, symbol_table, errors = parser(tokens)
+        self.assertFalse(valid)
+        self.assertEqual([e['message'] for e in errors], ["Invalid control structure syntax"])
+        self.assertIsNotNone(symbol_table.lookup('d'))
+
+    # ✅ Syntactic: Released tokens are hidden, and an unclosed block is not read to the end
+    def test_token_stream_window(self):
+        tokens = [{'token': '{', 'type': 'DELIMITER'}] + [{'token': 'x', 'type': 'IDENTIFIER'}] * (3 * MATCH_LOOKAHEAD)
+        stream = TokenStream(tokens)
+        stream.release(5)
+        self.assertEqual(len(tokens), 3 * MATCH_LOOKAHEAD + 1)  # the caller's list is left alone
+        self.assertIs(stream[5], tokens[5])
+        with self.assertRaises(IndexError):
+            stream[4]
+        pulled = []
+        def source():
+            for token in tokens:
+                pulled.append(token)
+                yield token
+        stream = TokenStream(source())
+        self.assertIsNone(stream.matching(0))
+        self.assertLessEqual(len(pulled), MATCH_LOOKAHEAD + 1)
+
+    # ✅ Lexical: Repeated lexemes are classified from the cache
+    def test_token_type_cache(self):
+        token_type_cache.clear()
+        for _ in range(3):
+            self.assertEqual(get_token_type('int'), 'KEYWORD')
+            self.assertEqual(get_token_type('counter'), 'IDENTIFIER')
+        info = token_type_cache.info()
+        self.assertEqual((info['hits'], info['misses']), (4, 2))
+        self.assertEqual((info['permanent'], info['recent']), (1, 1))
+
+    # ✅ Lexical: NumPy backend produces the reference token stream
+    @unittest.skipIf(load_numpy() is None, "NumPy not installed")
+    def test_vectorized_lexer_matches_reference(self):
+        code = ("#include <stdio.h>\nint a_b = 5, _c = 0x1F;\nfloat d = 3.14;\n"
+                "/* multi\nline */ char e = 'x';\nprintf(\"hi\"); int f = a_b $ 2; // done\n")
+        self.assertEqual(vectorized_lexer(code), lexer(code))
+
+    # ✅ Semantic: Constant expressions are folded once
+    def test_constant_folding(self):
+        tokens = lexer("int a = (2 + 3) * 4;\nint b = a / 3;")
+        _, sym_table, _ = parser(tokens)
+        success, _, _, symbols = semantic_analyzer(tokens, sym_table)
+        self.assertTrue(success)
+        self.assertEqual(symbols['a']['value'], 20)
+
+    # ✅ Semantic: Comparing a constant or initializing it is not an assignment to it
+    def test_const_comparison(self):
+        tokens = lexer("const int a = 1; if (a == 1) {}")
+        _, sym_table, _ = parser(tokens)
+        success, sem_errors, _, _ = semantic_analyzer(tokens, sym_table)
+        self.assertTrue(success)
+        self.assertEqual(sem_errors, [])
+
+    # ❌ Semantic: Assigning to a constant is reported and leaves its value alone
+    def test_const_assignment_keeps_value(self):
+        tokens = lexer("const int k = 3; k = 4; int m = k * 2;")
+        _, sym_table, _ = parser(tokens)
+        success, sem_errors, _, symbols = semantic_analyzer(tokens, sym_table)
+        self.assertFalse(success)
+        self.assertEqual(sem_errors, ["Semantic Error: Assignment to constant variable 'k'.",
+                                      "Semantic Error: Cannot assign to constant variable 'k'."])
+        self.assertEqual((symbols['k']['value'], symbols['m']['value']), (3, 6))
+
+    # ❌ Semantic: One type diagnostic per expression
+    def test_single_diagnostic_per_expression(self):
+        tokens = lexer("float f = 1;\nint a = f + f * f - f;")
+        _, sym_table, _ = parser(tokens)
+        success, sem_errors, _, _ = semantic_analyzer(tokens, sym_table)
+        self.assertFalse(success)
+        self.assertEqual(len(sem_errors), 1, sem_errors)
+
+    # ⚠️ Semantic: Custom rules plug into the dispatch and can be disabled
+    def test_custom_rule_registration(self):
+        @register_rule('short-name', 'IDENTIFIER', severity='warning')
+        def check_short_name(analyzer, event):
+            if len(event['token']['token']) == 1:
+                return [f"Warning: Short name '{event['token']['token']}'."]
+        self.addCleanup(RULES.pop, 'short-name')
+
+        code = "int a = 5;\nint count = a;"
+        tokens = lexer(code)
+        _, sym_table, _ = parser(tokens)
+        _, _, warnings, _ = semantic_analyzer(tokens, sym_table)
+        self.assertEqual(warnings.count("Warning: Short name 'a'."), 2)
+
+        _, sym_table, _ = parser(tokens)
+        _, _, warnings, _ = semantic_analyzer(tokens, sym_table, {'short-name': False, 'unused-variable': False})
+        self.assertEqual(warnings, [])
+
+    # ✅ Pipeline: Cached analyses are reused across cache instances
+    def test_analysis_cache_roundtrip(self):
+        code = "int a = 5;\nint b = a + 1;"
+        with tempfile.TemporaryDirectory() as directory:
+            first = AnalysisCache(directory).analyze(code)
+            cache = AnalysisCache(directory)
+            self.assertEqual(cache.analyze(code), first)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(first, run_analysis(code))
+
+    # ✅ Pipeline: A full cache evicts below its budget, so it is not walked on every write
+    def test_analysis_cache_eviction(self):
+        records = [{'data': os.urandom(1000).hex()} for _ in range(200)]
+        size = len(zlib.compress(marshal.dumps(records[0])))
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AnalysisCache(directory, max_bytes=50 * size)
+            with mock.patch.object(cache, '_entries', wraps=cache._entries) as walk:
+                for n, record in enumerate(records):
+                    cache.put(f'{n:064x}', record)
+            total = sum(entry_size for _, entry_size, _ in cache._entries())
+        self.assertLessEqual(total, 50 * size)
+        self.assertLessEqual(walk.call_count, 150 // 4)
+
+    # ✅ Pipeline: Fused mode agrees with the three-call API
+    def test_fused_pipeline_matches_stages(self):
+        code = "int a = 5;\nwhile (a < 10) {\n a = a + 1;\n}\nint b = a $ 2;\n}"
+        tokens = lexer(code)
+        valid, _, parse_errors = parser(tokens)
+        lex_errors, (fused_valid, _, fused_parse_errors), _ = fused_analysis(code)
+        self.assertEqual(lex_errors, [t for t in tokens if t['type'] == 'LEXICAL ERROR'])
+        self.assertEqual((valid, parse_errors), (fused_valid, fused_parse_errors))
+
+    # ❌ Pipeline: Diagnostics are reported while the input is still being read
+    def test_fused_pipeline_reports_early(self):
+        seen = []
+        fused_analysis("int x = y + 1;\nint a = 1;", lambda stage, d: seen.append(stage))
+        self.assertEqual(seen[0], 'semantic')
+
+    # ❌ CLI: Redeclarations, which the parser reports without a location, are printed per file
+    def test_cli_reports_redeclaration(self):
+        code = "int a = 1;\nint a = 2;\nint f(int n) {\n    int n = 1;\n    return n;\n}\n"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'r.c')
+            with open(path, 'w', encoding='utf-8') as source:
+                source.write(code)
+            for options in (['--no-cache'], ['--cache-dir', os.path.join(directory, 'cache')], ['--workers', '2']):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output), contextlib.redirect_stderr(io.StringIO()):
+                    status = cli.main(options + [path])
+                self.assertEqual(status, 1)
+                self.assertIn(f"{path}: Semantic Error: Redeclaration of variable 'a'.", output.getvalue())
+                self.assertIn(f"{path}: Semantic Error: Redeclaration of variable 'n'.", output.getvalue())
+
+    # ✅ Startup: The analyzer core loads without the web stack or NumPy
+    def test_core_import_is_lightweight(self):
+        probe = ("import sys, core, cli, pipeline, analysis_cache, vectorized_lexer\n"
+                 "core.lexer('int x = 1;')\n"
+                 "print(','.join(m for m in ('flask', 'werkzeug', 'numpy') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    # ✅ Startup: Workers only report ready once warm-up has finished
+    def test_readiness_after_warm_up(self):
+        readiness = Readiness()
+        self.assertFalse(readiness.status()['ready'])
+        readiness.start(["int x = 1;\nx = x + 2;"]).join()
+        status = readiness.status()
+        self.assertTrue(status['ready'])
+        self.assertEqual(status['warmup']['snippets'], 1)
+        self.assertEqual(get_token_type(';'), 'PUNCTUATION')
+
+    # ✅ Wire format: Compact token streams decode back to the token list
+    def test_compact_token_formats_roundtrip(self):
+        code = 'int x = 1;\n/* block\ncomment */ $ "str" // end'
+        tokens = lexer(code)
+        columnar = json.dumps({'response': encode_columnar(tokens)}).encode()
+        self.assertEqual(decode(columnar, 'application/vnd.compiler.tokens+json'), tokens)
+        packed = compress(encode_binary(tokens, code), 'gzip')
+        self.assertEqual(decode(packed, 'application/vnd.compiler.tokens', code, 'gzip'), tokens)
+        # A lexeme that is not the source text at its position travels inline
+        tokens[3]['token'] = '1.0'
+        self.assertEqual(decode(encode_binary(tokens, code), 'application/vnd.compiler.tokens', code), tokens)
+
+    # ✅ Service: Concurrent identical analyses run once and share the result
+    def test_single_flight_coalesces_requests(self):
+        joined = threading.Semaphore(0)
+        in_flight = SingleFlight(on_join=lambda key: joined.release())
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def analyze(code):
+            calls.append(code)
+            started.set()
+            release.wait(5)
+            return lexer(code)
+
+        key = request_key('lexica', 'int x = 1;')
+        results = []
+        leader = threading.Thread(target=lambda: results.append(in_flight.do(key, analyze, 'int x = 1;')))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        followers = [threading.Thread(target=lambda: results.append(in_flight.do(key, analyze, 'int x = 1;')))
+                     for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        for _ in followers:
+            self.assertTrue(joined.acquire(timeout=5))
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(in_flight.info()['in_flight'], 0)
+        self.assertNotEqual(key, request_key('lexica', 'int x = 1;', mode='fused'))
+
+    # ✅ Fuzzing: Alternative engines agree and nothing crashes on generated inputs
+    def test_fuzz_engines_agree(self):
+        findings = fuzz(iterations=20, generators=['statements', 'brackets', 'unterminated'], scale_every=0)
+        self.assertEqual([f for f in findings if f['kind'] in ('crash', 'equivalence')], [])
+
+    # ❌ Fuzzing: Tokens that skip or invent source text break the invariants
+    def test_fuzz_invariant_checker(self):
+        self.assertEqual(check_invariants('int x;', lexer('int x;')), [])
+        glued = [{'line': 0, 'position': 0, 'type': 'IDENTIFIER', 'token': 'ab'}]
+        self.assertTrue(check_invariants('a b', glued))
+        skipped = [{'line': 0, 'position': 2, 'type': 'IDENTIFIER', 'token': 'b'}]
+        self.assertTrue(check_invariants('a b', skipped))
+
+    # ✅ Lexical: Parts separated by spaces are never glued into one token
+    def test_lexer_keeps_separated_parts_apart(self):
+        code = "int my_var = 1; a = b / /* c */ 2;"
+        tokens = lexer(code)
+        self.assertEqual([t['token'] for t in tokens],
+                         ['int', 'my_var', '=', '1', ';', 'a', '=', 'b', '/', '/* c */', '2', ';'])
+        self.assertEqual(check_invariants(code, tokens), [])
+
+    # ✅ Profiling: Slow snippets are captured with stage timings and collapsed stacks
+    def test_slow_request_capture(self):
+        with tempfile.TemporaryDirectory() as directory:
+            admission = AdmissionController(slow_processes=0)
+            profiler = SlowRequestProfiler(directory, threshold_ms=10, run=main.admitted_capture)
+            self.assertIsNone(profiler.observe('int fast;', 1))
+            with mock.patch.object(main, 'admission', admission):
+                record = profiler.observe('int x = 1;\nx = x + 2;', 25, 'analise-completa').result()
+            self.assertEqual(set(record['stage_ms']), {'lexer', 'parser', 'semantic_analyzer'})
+            self.assertEqual(admission.info()['interactive']['served'], 1)  # captures are admitted jobs
+            self.assertIsNone(profiler.observe('int x = 1;\nx = x + 2;', 30))  # captured once
+            self.assertEqual([r['hash'] for r in profiler.captures()], [record['hash']])
+            stacks = profiler.stacks(record['hash']).splitlines()
+            self.assertTrue(any(line.startswith('parser;syntactic_analysis:parser') for line in stacks))
+
+    # ❌ Semantic: Assignment inside an if does not initialize on every path
+    def test_conditional_initialization(self):
+        code = "int c = 1;\nint x;\nif (c > 0) {\n    x = 1;\n}\nint y = x;"
+        tokens = lexer(code)
+        _, symbol_table, _ = parser(tokens)
+        valid, errors, _, _ = semantic_analyzer(tokens, symbol_table)
+        self.assertFalse(valid)
+        self.assertEqual(errors, ["Semantic Error: Variable 'x' may be used before initialization at line 5."])
+
+    # ✅ Flow: Definite assignment, dead stores and unreachable code over if/else and loops
+    def test_flow_analyses(self):
+        code = ("int c = 1;\nint x;\nif (c > 0) {\n    x = 1;\n} else {\n    x = 2;\n}\n"
+                "int y = x;\ny = 3;\nwhile (y < 10) {\n    y = y + c;\n}\nreturn y;\nc = 0;")
+        cfg = ControlFlowGraph(build_statements(lexer(code)))
+        self.assertTrue(all(read['definitely'] for read in uninitialized_reads(cfg)))
+        self.assertEqual(dead_stores(cfg), [('y', 7), ('c', 13)])
+        self.assertEqual([statement.line for statement in unreachable_statements(cfg)], [13])
+
+    # ✅ Flow: Flow rules run on bounded batches of statements, so fused mode does not keep the input
+    def test_fused_flow_rules_memory(self):
+        fused_analysis("int a = 1;")  # warm the caches first
+        overheads = []
+        for repeat in (150, 600):
+            code = "int a = 1;\nint b = 0;\n" + "if (a > 0) {\n    b = a + 1;\n}\na = b + 2;\n" * repeat
+            peaks = []
+            for config in (None, {'maybe-uninitialized': False}):
+                tracemalloc.start()
+                fused_analysis(code, config=config)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            overheads.append(peaks[0] - peaks[1])
+        self.assertLess(overheads[1], overheads[0] * 1.5, overheads)
+        _, _, (_, errors, _, _) = fused_analysis("int a = 1;\nint b;\nif (a > 0) {\n    b = 1;\n}\nint c = b;")
+        self.assertEqual(errors, ["Semantic Error: Variable 'b' may be used before initialization at line 5."])
+
+    # ✅ Functions: Definitions with parameters get their own scope
+    def test_function_definitions(self):
+        code = ("int total = 0;\nint square(int n) {\n    int r = n * n;\n    return r;\n}\n"
+                "void add(const int v, float scale) {\n    total = total + v;\n    v = 2;\n}\n"
+                "int main() {\n    int x = square(3);\n    int y = add(x, 1);\n    return x + y;\n}")
+        tokens = lexer(code)
+        valid, symbol_table, errors = parser(tokens)
+        self.assertTrue(valid, errors)
+        self.assertEqual(symbol_table.functions['add']['params'], [('int', 'v'), ('float', 'scale')])
+        self.assertEqual(set(symbol_table.table), {'total'})
+        self.assertEqual(set(symbol_table.functions['square']['scope'].table), {'n', 'r'})
+        valid, errors, warnings, _ = semantic_analyzer(tokens, symbol_table)
+        self.assertEqual(errors, ["Semantic Error: Assignment to constant variable 'v'.",
+                                  "Semantic Error: Cannot assign to constant variable 'v'.",
+                                  "Semantic Error: Type mismatch — cannot assign void expression to 'y' of type 'int'."])
+        self.assertEqual(warnings, ["Warning: Variable 'scale' declared but never used."])
+
+    # ✅ Functions: Bodies analyzed on a worker pool merge back in source order
+    def test_parallel_function_analysis(self):
+        code = "int total = 0;\n" + "\n".join(
+            f"int f{i}(int p) {{\n    int unused{i};\n    total = total + p + q{i};\n    return total;\n}}"
+            for i in range(4))
+        parallel = analyze_translation_unit(code, workers=2)
+        self.assertEqual(parallel, analyze_translation_unit(code, workers=1))
+        self.assertEqual({key: parallel[key] for key in run_analysis(code)}, run_analysis(code))
+        self.assertEqual(parallel['warnings'], [f"Warning: Variable 'unused{i}' declared but never used." for i in range(4)])
+        self.assertEqual(set(parallel['functions']['f2']['symbols']), {'p', 'unused2'})
+
+    # ✅ Grammar: The parse table is generated from the current grammar
+    def test_parse_table_up_to_date(self):
+        with open(TABLE_MODULE, encoding='utf-8') as module:
+            self.assertEqual(module.read(), generate(), "run `python grammar.py --write`")
+        with self.assertRaises(GrammarError):
+            generate("item -> IDENTIFIER '='\n     | IDENTIFIER ';'\nblock_item -> ';'\n")
+
+    # ❌ Grammar: A syntax error skips only its own statement, also inside blocks
+    def test_error_recovery_per_statement(self):
+        code = "int x = ;\nint y = 2;\nwhile (y) {\n    y = ;\n    5;\n    if (y) { y = 1; }\n    x = y;\n}"
+        tokens = lexer(code)
+        valid, symbol_table, errors = parser(tokens)
+        self.assertFalse(valid)
+        self.assertEqual([(error['line'], error['message']) for error in errors], [
+            (0, "Invalid assignment expression"),
+            (3, "Invalid assignment statement"),
+            (4, "Unexpected token '5'"),
+        ])
+        self.assertIn('y', symbol_table.table)
+
+    # ❌ Diagnostics: All stages report to one collector, in source order, off the token stream
+    def test_diagnostics_collector(self):
+        code = "int x = 1 $;\nint y = z;\nwhile (y) {\n    y = ;\n}"
+        diagnostics = Diagnostics()
+        tokens = lexer(code, diagnostics)
+        self.assertNotIn('LEXICAL ERROR', [token['type'] for token in tokens])
+        valid, symbol_table, _ = parser(tokens, diagnostics=diagnostics)
+        semantic_analyzer(tokens, symbol_table, diagnostics=diagnostics)
+
+        self.assertFalse(valid)
+        self.assertEqual([(record['stage'], record['line']) for record in diagnostics.errors()], [
+            ('lexical', 0), ('semantic', 1), ('syntactic', 3), ('semantic', -1),
+        ])
+        self.assertEqual(print_clean(diagnostics.select('lexical')),
+                         "LEXICAL ERROR: Unexpected character at line 0, position 10.")
+        self.assertEqual([record['severity'] for record in diagnostics.select('semantic')],
+                         ['error', 'error', 'warning', 'warning'])
+        self.assertTrue(diagnostics.has_errors('syntactic'))
+        self.assertEqual(len(diagnostics), 6)
+
+    # ✅ Sessions: Edits are debounced and a superseded analysis stops at its next checkpoint
+    def test_session_debounce_and_cancellation(self):
+        timers, started = [], []
+        running, proceed = threading.Event(), threading.Event()
+
+        class ManualTimer:
+            def __init__(self, interval, function, args):
+                self.fire = lambda: function(*args)
+                self.cancelled = False
+
+            def cancel(self):
+                self.cancelled = True
+
+            def start(self):
+                timers.append(self)
+
+        def analyze(snippet, session, checkpoint):
+            started.append(snippet)
+            if snippet == 'abc':  # hold it until a newer version arrives
+                running.set()
+                proceed.wait(5)
+            checkpoint()
+            return snippet.upper(), True
+
+        session = EditorSession('test', analyze, debounce_ms=50, timer=ManualTimer)
+        for snippet in ('a', 'ab', 'abc'):
+            session.submit(snippet)
+        self.assertEqual([timer.cancelled for timer in timers], [True, True, False])
+        superseded = threading.Thread(target=timers[2].fire)
+        superseded.start()
+        self.assertTrue(running.wait(5))
+        version = session.submit('abcd')
+        proceed.set()
+        superseded.join()
+        timers[3].fire()
+        result = session.wait(version, timeout=5)
+        self.assertEqual((result['version'], result['response']), (4, 'ABCD'))
+        self.assertEqual(started, ['abc', 'abcd'])
+        info = session.info()
+        self.assertEqual((info['submitted'], info['started'], info['cancelled'], info['completed']), (4, 2, 1, 1))
+        with self.assertRaises(Cancelled):
+            session.checkpoint(3)
+
+    # ✅ Sessions: Lexing reuses the tokens before the first changed line
+    def test_session_incremental_lexing(self):
+        session = EditorSession('test', None)
+        edits = ["int x = 1;\n/* note\n */ x = 2;\nint $ = 3;", "int x = 1;\n/* note\n */ x = 2;\nint y = 3;",
+                 "int x = 1;\n/* note\n x = 2;\nint y = 3;", "int x = 1;"]
+        for code in edits:
+            diagnostics, expected = Diagnostics(), Diagnostics()
+            tokens = session.lex(code, diagnostics)
+            self.assertEqual(tokens, lexer(code, expected))
+            self.assertEqual(diagnostics.errors(), expected.errors())
+            session.remember(code, tokens, diagnostics, None)
+
+    # ✅ Load testing: Steps report percentiles, throughput and errors, and compare across runs
+    def test_load_test_in_process(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 0.99), 99)
+        results = load_test(InProcessTarget(), parse_mix('lexica:small=1,completa:small=1'), [1, 2], 8)
+        self.assertEqual([step['requests'] for step in results['steps']], [8, 8])
+        self.assertEqual([step['errors'] for step in results['steps']], [0, 0])
+        for step in results['steps']:
+            latency = step['latency_ms']
+            self.assertLessEqual(latency['p50'], latency['p95'])
+            self.assertLessEqual(latency['p95'], latency['p99'])
+            self.assertEqual(set(step['by_kind']), {'lexica:small', 'completa:small'})
+        saved = json.loads(json.dumps(results))
+        self.assertIn('c=2: rps', compare(saved, saved))
+        with self.assertRaises(ValueError):
+            parse_mix('lexica:huge=1')
+
+    # ✅ Admission: Clients share a lane by weight, whatever the size of their jobs
+    def test_admission_fair_share(self):
+        self.assertGreater(estimate_cost('x' * 4000), estimate_cost('x\n' * 2000))
+        order, jobs, held, gate = [], [], threading.Event(), threading.Event()
+        lane = Lane('test', quantum=10, weights={'heavy': 2}, max_backlog=120)
+        lane.submit('light', 1, lambda: (held.set(), gate.wait()))
+        self.assertTrue(held.wait(5))  # the worker is busy: everything below queues up
+        for n in range(6):
+            jobs.append(lane.submit('bulk', 20, order.append, 'bulk'))
+            jobs.append(lane.submit('heavy', 10, order.append, 'heavy'))
+            jobs.append(lane.submit('light', 5, order.append, 'light'))
+        with self.assertRaises(Rejected) as error:
+            lane.submit('bulk', 1, order.append, 'bulk')
+        self.assertEqual(error.exception.status, 429)
+        gate.set()
+        for job in jobs:
+            self.assertTrue(job.done.wait(5))
+        # Each round gives 'heavy' (weight 2) 20 units and the others 10: 'bulk'
+        # runs one 20-unit job every other round, the others 2 jobs a round
+        self.assertEqual(order, ['heavy'] * 2 + ['light'] * 2 + ['bulk'] + (['heavy'] * 2 + ['light'] * 2) * 2
+                         + ['bulk'] * 5)
+        self.assertEqual(lane.info()['served'], 19)
+
+        admission = AdmissionController(slow_cost=1000, max_cost=2000, slow_processes=0)
+        self.assertEqual(admission.run('a', estimate_cost('int x = 1;'), lexer, 'int x = 1;'), lexer('int x = 1;'))
+        self.assertEqual(admission.run('a', 1500, len, 'abc'), 3)
+        self.assertEqual(admission.info()['slow']['served'], 1)
+        with self.assertRaises(Rejected) as error:
+            admission.run('a', 2001, len, 'abc')
+        self.assertEqual(error.exception.status, 413)
+
+    # ❌ Admission: Editor sessions are admitted like requests, and run in this process
+    def test_admission_covers_sessions(self):
+        admission = AdmissionController(slow_cost=50, max_cost=5000)
+        # A local job on the process-backed slow lane runs here: a lambda could not be sent to a process
+        self.assertEqual(admission.run('tab', 100, lambda: os.getpid(), local=True), os.getpid())
+        with mock.patch.object(main, 'admission', admission):
+            session = main.sessions.create('tab')
+            session.debounce_ms = 0
+            cpu = time.process_time()
+            analyzed = session.wait(session.submit('int a = 1;\n' * 400), 10)
+            cpu = time.process_time() - cpu
+            refused = session.wait(session.submit('x' * 10000), 10)
+            main.sessions.close(session.id)
+        self.assertTrue(analyzed['is_success'])
+        self.assertEqual((refused['is_success'], refused['response']), (False, 'Código grande demais para ser analisado.'))
+        self.assertEqual(admission.info()['slow']['served'], 2)
+        self.assertIsNotNone(session.symbol_table)
+        # Counted on the lane thread that ran the analysis, not the timer thread that waited for it
+        self.assertGreater(session.info()['cpu_seconds'], cpu / 2)
+
 
 # Run tests
 if __name__ == '__main__':
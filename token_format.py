@@ -0,0 +1,215 @@
+import gzip
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+# Wire formats of a token list, by name and media type
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.compiler.tokens+json',
+    'binary': 'application/vnd.compiler.tokens',
+}
+FORMATS = {media_type: name for name, media_type in MEDIA_TYPES.items()}
+ENCODINGS = ('gzip', 'deflate')
+
+MAGIC = b'TKS2'
+HEADER = struct.Struct('<4sIHHI')  # magic, token count, type count, message count, inline lexeme count
+STRING_LENGTH = struct.Struct('<H')
+LEXEME_LENGTH = struct.Struct('<I')
+
+
+def _intern(table, index, value):
+    """
+    Return the index of `value` in `table`, appending it on first sight.
+    """
+    position = index.get(value)
+    if position is None:
+        position = index[value] = len(table)
+        table.append(value)
+    return position
+
+
+def _line_starts(code):
+    """
+    Offset in `code` of the start of every line, plus one past the end.
+    """
+    starts = [0]
+    for line in code.split('\n'):
+        starts.append(starts[-1] + len(line) + 1)
+    return starts
+
+
+def encode_columnar(tokens):
+    """
+    Columnar form of `tokens`: one array per field instead of one object
+    per token, with types and error messages stored once in dictionaries.
+
+    `type` holds indices into `types`; `message` holds indices into
+    `messages`, or -1 for tokens without a message.
+    """
+    types, type_index = [], {}
+    messages, message_index = [], {}
+    columns = {'line': [], 'position': [], 'type': [], 'message': [], 'token': []}
+    for token in tokens:
+        columns['line'].append(token['line'])
+        columns['position'].append(token['position'])
+        columns['type'].append(_intern(types, type_index, token['type']))
+        message = token.get('message')
+        columns['message'].append(-1 if message is None else _intern(messages, message_index, message))
+        columns['token'].append(token['token'])
+    return {'format': 'columnar', 'types': types, 'messages': messages, **columns}
+
+
+def decode_columnar(columns):
+    """
+    Rebuild the token list from `encode_columnar` output.
+    """
+    types, messages = columns['types'], columns['messages']
+    tokens = []
+    for line, position, type_id, message_id, text in zip(columns['line'], columns['position'], columns['type'],
+                                                         columns['message'], columns['token']):
+        token = {'line': line, 'position': position, 'type': types[type_id]}
+        if message_id >= 0:
+            token['message'] = messages[message_id]
+        token['token'] = text
+        tokens.append(token)
+    return tokens
+
+
+def encode_binary(tokens, code):
+    """
+    Packed binary form of `tokens`, lexed from `code`. Lexemes that are a
+    slice of the source are not copied: only their length is stored and the
+    decoder cuts them out of the source the client already has. The others
+    (e.g. a decimal the lexer rebuilt from its parts) are sent inline.
+
+    Layout (little-endian):
+        header      magic 'TKS2', u32 token count, u16 type count, u16 message count,
+                    u32 inline count
+        types       per type: u16 byte length + UTF-8 name
+        messages    per message: u16 byte length + UTF-8 text
+        columns     u32 line[count], u32 position[count], u32 length[count],
+                    u8 type[count], u8 message[count] (0 = none, else index + 1)
+        inline      u32 token index[inline count], then per inline lexeme:
+                    u32 byte length + UTF-8 text
+    """
+    types, type_index = [], {}
+    messages, message_index = [], {}
+    lines, positions, lengths = array('I'), array('I'), array('I')
+    type_ids, message_ids = array('B'), array('B')
+    inline, inline_ids = [], array('I')
+    line_starts = _line_starts(code)
+    for k, token in enumerate(tokens):
+        text = token['token']
+        start = line_starts[token['line']] + token['position'] if token['line'] < len(line_starts) else -1
+        if start < 0 or code[start:start + len(text)] != text:
+            inline_ids.append(k)
+            inline.append(text)
+        lines.append(token['line'])
+        positions.append(token['position'])
+        lengths.append(len(text))
+        type_ids.append(_intern(types, type_index, token['type']))
+        message = token.get('message')
+        message_ids.append(0 if message is None else _intern(messages, message_index, message) + 1)
+
+    if sys.byteorder == 'big':
+        for column in (lines, positions, lengths, inline_ids):
+            column.byteswap()
+    parts = [HEADER.pack(MAGIC, len(lines), len(types), len(messages), len(inline))]
+    for text in types + messages:
+        data = text.encode('utf-8')
+        parts.append(STRING_LENGTH.pack(len(data)))
+        parts.append(data)
+    for column in (lines, positions, lengths, type_ids, message_ids, inline_ids):
+        parts.append(column.tobytes())
+    for text in inline:
+        data = text.encode('utf-8', 'surrogatepass')
+        parts.append(LEXEME_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def decode_binary(data, code):
+    """
+    Rebuild the token list from `encode_binary` output and the source `code`.
+    """
+    magic, count, type_count, message_count, inline_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a binary token stream')
+    offset = HEADER.size
+    strings = []
+    for _ in range(type_count + message_count):
+        (size,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(data[offset:offset + size].decode('utf-8'))
+        offset += size
+    types, messages = strings[:type_count], strings[type_count:]
+
+    columns = []
+    for typecode, length in zip('IIIBBI', (count,) * 5 + (inline_count,)):
+        column = array(typecode)
+        size = column.itemsize * length
+        column.frombytes(data[offset:offset + size])
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    lines, positions, lengths, type_ids, message_ids, inline_ids = columns
+    inline = {}
+    for k in inline_ids:
+        (size,) = LEXEME_LENGTH.unpack_from(data, offset)
+        offset += LEXEME_LENGTH.size
+        inline[k] = data[offset:offset + size].decode('utf-8', 'surrogatepass')
+        offset += size
+
+    line_starts = _line_starts(code)
+    tokens = []
+    for k in range(count):
+        line, position = lines[k], positions[k]
+        token = {'line': line, 'position': position, 'type': types[type_ids[k]]}
+        if message_ids[k]:
+            token['message'] = messages[message_ids[k] - 1]
+        if k in inline:
+            token['token'] = inline[k]
+        else:
+            start = line_starts[line] + position
+            token['token'] = code[start:start + lengths[k]]
+        tokens.append(token)
+    return tokens
+
+
+def compress(data, encoding):
+    """
+    Apply the HTTP content coding `encoding` ('gzip', 'deflate' or None).
+    """
+    if encoding == 'gzip':
+        return gzip.compress(data)
+    if encoding == 'deflate':
+        return zlib.compress(data)
+    return data
+
+
+def decompress(data, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'deflate':
+        return zlib.decompress(data)
+    return data
+
+
+def decode(body, content_type, code=None, content_encoding=None):
+    """
+    Decoder for `/analise-lexica` responses in any wire format: undo the
+    content coding, then return the token list. `code` (the analyzed
+    snippet) is required for the binary format.
+    """
+    body = decompress(body, content_encoding)
+    wire_format = FORMATS.get(content_type.split(';')[0].strip())
+    if wire_format == 'binary':
+        return decode_binary(body, code)
+    payload = json.loads(body)['response']
+    if wire_format == 'columnar':
+        return decode_columnar(payload)
+    return payload
@@ -0,0 +1,250 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lexical_analysis import lexer, SKIPPED_TYPES
+from syntactic_analysis import parser
+from semantic_analysis import SemanticAnalyzer
+from objects import SymbolTable
+
+
+def split_translation_unit(tokens):
+    """
+    Find the top-level function definitions in `tokens`: a '{' that follows
+    `type name ( ... )` outside any block.
+
+    Returns the skeleton (every token outside function bodies, the body
+    braces included) and one (header, body, closer) triple per function in
+    source order: the tokens from the return type to the '{', the tokens
+    inside the body, and the closing '}' (None when the body is unclosed).
+    """
+    preproc_lines = {t['line'] for t in tokens if t['type'] == 'PREPROCESSOR'}
+    significant = [k for k, t in enumerate(tokens) if t['type'] not in SKIPPED_TYPES and t['line'] not in preproc_lines]
+
+    skeleton, functions = [], []
+    copied = 0  # tokens before this index are accounted for
+    depth = 0
+    s = 0
+    while s < len(significant):
+        k = significant[s]
+        text = tokens[k]['token']
+        if text == '{':
+            depth += 1
+        elif text == '}':
+            depth = max(depth - 1, 0)
+        elif (depth == 0 and tokens[k]['type'] == 'KEYWORD' and s + 2 < len(significant)
+              and tokens[significant[s + 1]]['type'] == 'IDENTIFIER' and tokens[significant[s + 2]]['token'] == '('):
+            # Skip the parameter list, then look for the body
+            close, parentheses = s + 2, 0
+            while close < len(significant):
+                value = tokens[significant[close]]['token']
+                parentheses += (value == '(') - (value == ')')
+                if parentheses == 0 or value in ('{', '}', ';'):
+                    break
+                close += 1
+            if close + 1 < len(significant) and tokens[significant[close]]['token'] == ')' \
+                    and tokens[significant[close + 1]]['token'] == '{':
+                opener = significant[close + 1]
+                end, braces = close + 2, 0
+                while end < len(significant):
+                    value = tokens[significant[end]]['token']
+                    if value == '}' and braces == 0:
+                        break
+                    braces += (value == '{') - (value == '}')
+                    end += 1
+                closer = significant[end] if end < len(significant) else len(tokens)
+                skeleton.extend(tokens[copied:opener + 1])
+                functions.append((tokens[k:opener + 1], tokens[opener + 1:closer],
+                                  tokens[closer] if closer < len(tokens) else None))
+                copied = closer
+                s = end + 1
+                continue
+        s += 1
+    skeleton.extend(tokens[copied:])
+    return skeleton, functions
+
+
+def _globals(symbol_table, excluded):
+    """
+    Detached copy of the global table, without function scopes nor the
+    function `excluded`, to be sent to a worker.
+    """
+    copy = SymbolTable()
+    copy.table = {name: info.copy() for name, info in symbol_table.table.items()}
+    copy.functions = {name: {key: value for key, value in attributes.items() if key != 'scope'}
+                      for name, attributes in symbol_table.functions.items() if name != excluded}
+    return copy
+
+
+def _analyze_function(header, body, closer, globals_table, config=None):
+    """
+    Parse and analyze one function definition against a copy of the
+    globals. Runs in a worker.
+
+    Returns the parse errors, the semantic result of the body and
+    `globals`: the 'used', 'initialized' and 'value' changes the body made
+    to global variables.
+    """
+    before = {name: info.copy() for name, info in globals_table.table.items()}
+    _, _, parse_errors = parser(header + body + ([closer] if closer else []), symbol_table=globals_table)
+    if closer is None:  # the file's parse reports the unclosed '{' already
+        opener = header[-1]
+        parse_errors = [error for error in parse_errors if not (
+            isinstance(error, dict) and error['message'] == "Unmatched opening bracket '{'"
+            and (error['line'], error['position']) == (opener['line'], opener['position']))]
+    scope = globals_table.functions[header[1]['token']]['scope']
+    analyzer = SemanticAnalyzer(scope, config)
+    analyzer.feed(body)
+    valid, errors, warnings, symbols = analyzer.finish()
+    changes = {}
+    for name, info in globals_table.table.items():
+        changed = {key: value for key, value in info.items() if before[name].get(key, None) != value}
+        if changed:
+            changes[name] = changed
+    return {'parse_errors': parse_errors, 'valid': valid, 'errors': errors, 'warnings': warnings,
+            'symbols': symbols, 'globals': changes}
+
+
+class _Deferred:
+    """
+    Stands in for the analyzer of a function body that a worker analyzes;
+    remembers the globals as the body sees them and where the body's
+    diagnostics go in the file's lists.
+    """
+
+    def __init__(self, attributes, globals_table, errors_at, warnings_at):
+        self.attributes = attributes
+        self.globals = globals_table
+        self.values = {name: info.get('value') for name, info in globals_table.table.items()}
+        self.errors_at = errors_at
+        self.warnings_at = warnings_at
+        self.errors, self.warnings, self.has_error, self.timings = [], [], False, {}
+
+    def feed(self, tokens):
+        pass
+
+    def finish(self):
+        pass
+
+
+class _FileScopeAnalyzer(SemanticAnalyzer):
+    """
+    Semantic analyzer of the file scope that defers function bodies.
+    """
+
+    def __init__(self, symbol_table, config=None):
+        super().__init__(symbol_table, config)
+        self.deferred = []
+
+    def enter_function(self, attributes, opener):
+        self.keep([opener])
+        name = next(name for name, function in self.symbol_table.functions.items() if function is attributes)
+        self.function = _Deferred(attributes, _globals(self.symbol_table, name), len(self.errors), len(self.warnings))
+        self.function_depth = 0
+        self.function_merged = (0, 0)
+        self.deferred.append(self.function)
+
+
+def _interleave(outer, inner):
+    """
+    Insert each (offset, items) of `inner`, in order, at `offset` in `outer`.
+    """
+    merged, start = [], 0
+    for offset, items in inner:
+        merged.extend(outer[start:offset])
+        merged.extend(items)
+        start = offset
+    merged.extend(outer[start:])
+    return merged
+
+
+def analyze_translation_unit(code, workers=None, executor=None, config=None):
+    """
+    Analyze a C file function by function.
+
+    The file scope is parsed and analyzed first, with every function body
+    left empty. Each body is then parsed and analyzed in its own scope, on a
+    process pool (`executor`, or a new one with `workers` processes), and the
+    diagnostics are merged back in source order. With `workers=1` or fewer
+    than two functions the bodies are analyzed in this process.
+
+    A body sees the globals as the file-scope code before it left them; the
+    globals it reads or initializes are marked in the final table, but not
+    for other bodies, since a function does not run where it is written.
+
+    Returns the `run_analysis` record plus `functions`: {name:
+    {'return_type', 'params', 'line', 'symbols'}} for each definition.
+    """
+    tokens = lexer(code)
+    skeleton, functions = split_translation_unit(tokens)
+    # Where each body's parse errors go among the file's
+    parse_offsets, reported = {}, 0
+
+    def on_statement(chunk, new_errors):
+        nonlocal reported
+        reported += len(new_errors)
+        for token in chunk:
+            if token['token'] == '{':
+                parse_offsets[token['line'], token['position']] = reported
+
+    _, symbol_table, parse_errors = parser(skeleton, on_statement)
+    analyzer = _FileScopeAnalyzer(symbol_table, config)
+    analyzer.feed(skeleton)
+
+    # Every split body must be one the parser defined; otherwise fall back
+    # to analyzing the file as a whole
+    deferred_bodies = analyzer.deferred
+    definitions = {(header[-1]['line'], header[-1]['position']): (header, body, closer)
+                   for header, body, closer in functions}
+    if set(definitions) != {deferred.attributes['body'] for deferred in deferred_bodies}:
+        _, symbol_table, parse_errors = parser(tokens)
+        analyzer = SemanticAnalyzer(symbol_table, config)
+        analyzer.feed(tokens)
+        deferred_bodies = []
+
+    jobs = [(*definitions[deferred.attributes['body']], deferred.globals, config) for deferred in deferred_bodies]
+    if executor is None and len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(_analyze_function, *zip(*jobs), chunksize=max(len(jobs) // 32, 1)))
+    elif executor is not None and jobs:
+        results = list(executor.map(_analyze_function, *zip(*jobs)))
+    else:
+        results = [_analyze_function(*job) for job in jobs]
+
+    # Merge in source order. A value folded in a body is kept unless
+    # file-scope code after the function assigned the variable again.
+    file_scope = symbol_table.dump()
+    for deferred, result in zip(deferred_bodies, results):
+        for name, changes in result['globals'].items():
+            if file_scope[name].get('value') != deferred.values[name]:
+                changes.pop('value', None)
+            symbol_table.table[name].update(changes)
+        deferred.attributes['scope'].table = result['symbols']
+    semantic_valid, semantic_errors, warnings, symbols = analyzer.finish()
+    parse_errors = _interleave(parse_errors, [(parse_offsets[deferred.attributes['body']], result['parse_errors'])
+                                              for deferred, result in zip(deferred_bodies, results)])
+    semantic_errors = _interleave(semantic_errors, [(deferred.errors_at, result['errors'])
+                                                    for deferred, result in zip(deferred_bodies, results)])
+    warnings = _interleave(warnings, [(deferred.warnings_at, result['warnings'])
+                                      for deferred, result in zip(deferred_bodies, results)])
+
+    # Like the parser, report unclosed brackets last, in source order
+    unclosed = [error for error in parse_errors
+                if isinstance(error, dict) and error['message'].startswith('Unmatched opening bracket')]
+    if unclosed:
+        parse_errors = [error for error in parse_errors if not any(error is other for other in unclosed)]
+        parse_errors.extend(sorted(unclosed, key=lambda error: (error['line'], error['position'])))
+
+    return {
+        'tokens': tokens,
+        'lex_errors': [t for t in tokens if t['type'] == 'LEXICAL ERROR'],
+        'valid': not parse_errors,
+        'parse_errors': parse_errors,
+        'semantic_valid': semantic_valid and all(result['valid'] for result in results),
+        'semantic_errors': semantic_errors,
+        'warnings': warnings,
+        'symbols': symbols,
+        'functions': {name: {'return_type': attributes['return_type'], 'params': attributes['params'],
+                             'line': attributes['line'],
+                             'symbols': attributes['scope'].dump() if attributes.get('scope') else None}
+                      for name, attributes in symbol_table.functions.items()},
+    }
@@ -7,14 +7,20 @@ def separate_errors(dict_list):
 
     return errors
 
-def print_clean(dict_list):
-    str_list = []
-    for item in dict_list:
+# Diagnostic types whose message already starts with its own label
+LABELLED_TYPES = {'SEMANTIC_ERROR', 'WARNING'}
+
+def iter_clean(items):
+    """Lazily renders error dicts, Diagnostics records and plain messages, one line each"""
+    for item in items:
         if isinstance(item, dict):
-            str_list.append(
-                f'{item.get('type')}: {item.get('message')} '
-                f'at line {item.get('line')}, position {item.get('position')}.'
-            )
+            if item.get('type') in LABELLED_TYPES:
+                yield item.get('message')
+            else:
+                yield (f"{item.get('type')}: {item.get('message')} "
+                       f"at line {item.get('line')}, position {item.get('position')}.")
         elif isinstance(item, str):
-            str_list.append(item)
-    return '\n'.join(str_list)
\ No newline at end of file
+            yield item
+
+def print_clean(dict_list):
+    return '\n'.join(iter_clean(dict_list))
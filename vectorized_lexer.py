@@ -0,0 +1,137 @@
+from bisect import bisect_right
+
+from lexical_analysis import lexer, get_token_type, scan_at
+from objects import Tag
+
+# Character classes
+SPACE, NEWLINE, WORD, SINGLE, SCAN = range(5)
+
+_np = None        # NumPy, imported on first use; False when unavailable
+_CLASSES = None   # byte -> character class table
+
+
+def load_numpy():
+    """
+    Import NumPy and build the character class table on first use.
+    Returns the numpy module, or None when it is not installed.
+    """
+    global _np, _CLASSES
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:  # optional accelerated backend
+            _np = False
+            return None
+        classes = numpy.full(256, SINGLE, dtype=numpy.uint8)
+        classes[[9, 11, 12, 13, 28, 29, 30, 31, 32]] = SPACE  # str.isspace() in ASCII
+        classes[ord('\n')] = NEWLINE
+        for char in '0123456789_ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz':
+            classes[ord(char)] = WORD
+        # comments, chars, strings and directives go through the reference scanner
+        for char in '/\'"#':
+            classes[ord(char)] = SCAN
+        _np, _CLASSES = numpy, classes
+    return _np or None
+
+
+def vectorized_lexer(code):
+    """
+    Drop-in replacement for `lexer` that classifies characters in bulk with NumPy.
+
+    The source is viewed as a uint8 array; word runs, single-character tokens
+    and their line/position are computed with vectorized diff/searchsorted
+    operations, so Python only runs once per token instead of once per
+    character. Comments, strings, chars, directives and word runs whose
+    meaning depends on what follows them are handed to the reference scanner,
+    which keeps the output identical to `lexer`.
+
+    NumPy is only imported on the first call. Falls back to `lexer` when it
+    is not installed or the input is not ASCII.
+    """
+    np = load_numpy()
+    if np is None or not code.isascii():
+        return lexer(code)
+    return list(_iter_tokens(np, code))
+
+
+def _iter_tokens(np, code):
+    n = len(code)
+    data = np.frombuffer(code.encode('ascii'), dtype=np.uint8)
+    classes = _CLASSES[data]
+
+    # Word runs from the edges of the word mask
+    edges = np.diff((classes == WORD).astype(np.int8), prepend=0, append=0)
+    word_starts = np.flatnonzero(edges == 1)
+    word_ends = np.flatnonzero(edges == -1)
+
+    # First character after each run that is not a space (a newline ends the search)
+    solid = np.append(np.flatnonzero(classes != SPACE), n)
+    following = solid[np.searchsorted(solid, word_ends)]
+    following_class = np.append(classes, NEWLINE)[following]
+    following_char = np.append(data, ord('\n'))[following]
+
+    underscores = np.concatenate(([0], np.cumsum(data == ord('_'))))
+    has_underscore = underscores[word_ends] > underscores[word_starts]
+    next_has_underscore = np.append(has_underscore[1:], False)
+    digit_start = (data[word_starts] >= ord('0')) & (data[word_starts] <= ord('9'))
+
+    # try_n_catch glues a word to the next one when either holds a '_',
+    # and reads digits followed by '.' as a decimal
+    ambiguous = (((following_class == WORD) & (has_underscore | next_has_underscore))
+                 | (digit_start & (following_char == ord('.'))))
+
+    singles = np.flatnonzero(classes == SINGLE)
+    scans = np.flatnonzero(classes == SCAN)
+    starts = np.concatenate((word_starts, singles, scans))
+    ends = np.concatenate((word_ends, singles + 1, scans + 1))
+    kinds = np.concatenate((np.where(ambiguous, SCAN, WORD).astype(np.uint8),
+                            np.full(len(singles), SINGLE, dtype=np.uint8),
+                            np.full(len(scans), SCAN, dtype=np.uint8)))
+    order = np.argsort(starts, kind='stable')
+    starts, ends, kinds = starts[order], ends[order], kinds[order]
+
+    line_starts = np.concatenate(([0], np.flatnonzero(data == ord('\n')) + 1))
+    token_lines = np.searchsorted(line_starts, starts, side='right') - 1
+    token_positions = starts - line_starts[token_lines]
+
+    is_start = bytearray(n + 1)
+    for start in starts.tolist():
+        is_start[start] = 1
+    class_of = classes.tobytes()
+    line_offsets = line_starts.tolist()
+    lines = code.split('\n')
+    starts, ends, kinds = starts.tolist(), ends.tolist(), kinds.tolist()
+    token_lines, token_positions = token_lines.tolist(), token_positions.tolist()
+
+    k = 0
+    while k < len(starts):
+        kind = kinds[k]
+        line, position = token_lines[k], token_positions[k]
+
+        if kind != SCAN:
+            text = code[starts[k]:ends[k]]
+            token_type = get_token_type(text)
+            if token_type != Tag.UNKNOWN:
+                yield {"line": line, "position": position,
+                       "type": token_type, "token": text}
+            else:
+                yield {"line": line, "position": position,
+                       "type": 'LEXICAL ERROR', "message": 'Unexpected character', "token": text}
+            k += 1
+            continue
+
+        # Reference scanner, until we are back on a precomputed boundary
+        while True:
+            token, line, position = scan_at(lines, line, position)
+            yield token
+            offset = line_offsets[line] + position if line < len(lines) else n
+            while offset < n and class_of[offset] in (SPACE, NEWLINE):
+                offset += 1
+            if offset >= n or is_start[offset]:
+                break
+            line = bisect_right(line_offsets, offset) - 1
+            position = offset - line_offsets[line]
+
+        while k < len(starts) and starts[k] < offset:
+            k += 1
+